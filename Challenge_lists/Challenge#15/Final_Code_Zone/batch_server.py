@@ -0,0 +1,266 @@
+"""
+Asyncio dynamic-batching server around the TinyGPT-2 golden model
+
+Stand-in for the host service in front of the accelerator, used to size
+batching windows and tail latency before the SPI host path exists:
+    - clients submit one 16-token sequence and get a future back
+    - a single batcher task gathers requests into a batch until max_batch
+      requests are waiting or the oldest has waited max_wait_ms
+    - each batch runs through tiny_gpt2_hardware_model_batch on one worker
+      thread (one accelerator), so the event loop keeps accepting requests
+      while a batch is in flight
+    - token IDs are range-checked on submission; if a batch still fails,
+      its requests are rerun one by one so only the failing one sees the error
+    - queueing, service and end-to-end latency go into log-bucketed
+      histograms (constant memory however long the server runs)
+"""
+
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from new_benchmark import load_hardware_weights, tiny_gpt2_hardware_model_batch
+
+SEQ_LEN = 16
+VOCAB_SIZE = 16
+
+class LatencyHistogram:
+    """
+    Log-spaced latency histogram
+
+    Args:
+        min_s / max_s: range of the buckets in seconds (values outside land
+                       in the first / last bucket)
+        buckets_per_decade: resolution (10 = about 26% bucket width)
+    """
+
+    def __init__(self, min_s=1e-6, max_s=100.0, buckets_per_decade=10):
+        self.min_s = min_s
+        self.buckets_per_decade = buckets_per_decade
+        decades = math.log10(max_s / min_s)
+        self.edges = min_s * 10.0 ** (np.arange(int(round(decades * buckets_per_decade)) + 1) / buckets_per_decade)
+        self.counts = np.zeros(len(self.edges), dtype=np.int64)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        seconds = float(seconds)
+        index = int(math.log10(max(seconds, self.min_s) / self.min_s) * self.buckets_per_decade)
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def count(self):
+        return int(self.counts.sum())
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile (seconds)"""
+        n = self.count()
+        if n == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), math.ceil(p / 100 * n)))
+        edge = self.edges[min(index + 1, len(self.edges) - 1)]
+        return float(min(edge, self.max))
+
+    def summary(self):
+        """Count, mean, p50/p95/p99 and max in milliseconds"""
+        n = self.count()
+        return {
+            'count': n,
+            'mean_ms': self.total / n * 1e3 if n else 0.0,
+            'p50_ms': self.percentile(50) * 1e3,
+            'p95_ms': self.percentile(95) * 1e3,
+            'p99_ms': self.percentile(99) * 1e3,
+            'max_ms': self.max * 1e3,
+        }
+
+class BatchingServer:
+    """
+    Dynamic-batching inference server
+
+    Args:
+        weights: golden-model weights (None = the RTL weight file)
+        quantized: whether to use Q5.10 quantization
+        dtype: dtype policy of the model (None = the dtype of the weights)
+        max_batch: largest batch sent to the model
+        max_wait_ms: longest the oldest queued request waits for a batch to fill
+        model_fn: batched model, called as model_fn(tokens [B, 16], weights,
+                  quantized=..., capture=None, dtype=...)
+
+    Use as an async context manager (or call start() / stop()):
+        async with BatchingServer(weights, max_batch=32) as server:
+            probs = await server.submit(tokens)
+    """
+
+    def __init__(self, weights=None, quantized=False, dtype=None, max_batch=64, max_wait_ms=2.0,
+                 model_fn=tiny_gpt2_hardware_model_batch):
+        self.weights = load_hardware_weights() if weights is None else weights
+        self.quantized = quantized
+        self.dtype = dtype
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1e3
+        self.model_fn = model_fn
+        self.queue = None
+        self._task = None
+        self._executor = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.histograms = {name: LatencyHistogram() for name in ('queue', 'service', 'total')}
+        self.batch_sizes = np.zeros(self.max_batch + 1, dtype=np.int64)
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tiny-gpt2')
+        self._task = asyncio.create_task(self._batcher())
+
+    async def stop(self):
+        """Finish every queued request, then stop the batcher"""
+        await self.queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def submit_nowait(self, tokens):
+        """Queue one sequence; returns a future resolving to its [16] probabilities"""
+        tokens = np.asarray(tokens)
+        if tokens.shape != (SEQ_LEN,):
+            raise ValueError(f"expected {SEQ_LEN} token IDs, got shape {tokens.shape}")
+        if not np.issubdtype(tokens.dtype, np.integer):
+            raise ValueError(f"token IDs must be integers, got dtype {tokens.dtype}")
+        if tokens.min() < 0 or tokens.max() >= VOCAB_SIZE:
+            raise ValueError(f"token IDs must be in 0..{VOCAB_SIZE - 1}, got {tokens.tolist()}")
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((tokens, future, time.perf_counter()))
+        return future
+
+    async def submit(self, tokens):
+        """Run one sequence and return its [16] probabilities"""
+        return await self.submit_nowait(tokens)
+
+    async def _next_batch(self):
+        """Block for one request, then gather more until max_batch or the oldest's deadline"""
+        batch = [await self.queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _run_model(self, tokens):
+        probs, _ = self.model_fn(tokens, self.weights, quantized=self.quantized, capture=None,
+                                 dtype=self.dtype)
+        return probs
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            tokens = np.stack([tokens for tokens, _, _ in batch])
+            started = time.perf_counter()
+            try:
+                probs = await loop.run_in_executor(self._executor, self._run_model, tokens)
+            except Exception:
+                await self._run_one_by_one(batch)
+                continue
+            finished = time.perf_counter()
+
+            self.batch_sizes[len(batch)] += 1
+            for i, (_, future, arrival) in enumerate(batch):
+                self.histograms['queue'].record(started - arrival)
+                self.histograms['service'].record(finished - started)
+                self.histograms['total'].record(finished - arrival)
+                if not future.done():
+                    future.set_result(probs[i])
+                self.queue.task_done()
+
+    async def _run_one_by_one(self, batch):
+        """Rerun a failed batch request by request, so only the failing requests get the error"""
+        loop = asyncio.get_running_loop()
+        for tokens, future, arrival in batch:
+            started = time.perf_counter()
+            try:
+                probs = await loop.run_in_executor(self._executor, self._run_model, tokens[None])
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                finished = time.perf_counter()
+                self.batch_sizes[1] += 1
+                self.histograms['queue'].record(started - arrival)
+                self.histograms['service'].record(finished - started)
+                self.histograms['total'].record(finished - arrival)
+                if not future.done():
+                    future.set_result(probs[0])
+            self.queue.task_done()
+
+    def stats(self):
+        """Latency summaries plus batch count and mean batch size"""
+        batches = int(self.batch_sizes.sum())
+        sizes = np.arange(len(self.batch_sizes))
+        result = {name: hist.summary() for name, hist in self.histograms.items()}
+        result['batches'] = batches
+        result['mean_batch_size'] = float((sizes * self.batch_sizes).sum() / batches) if batches else 0.0
+        return result
+
+async def open_loop_load(server, rate_per_s, num_requests, seed=0):
+    """Submit num_requests random sequences with Poisson arrivals; wait for all of them"""
+    rng = np.random.default_rng(seed)
+    tokens = rng.integers(0, 16, size=(num_requests, SEQ_LEN))
+    gaps = rng.exponential(1.0 / rate_per_s, size=num_requests)
+    futures = []
+    next_time = time.perf_counter()
+    for i in range(num_requests):
+        next_time += gaps[i]
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        futures.append(server.submit_nowait(tokens[i]))
+    return await asyncio.gather(*futures)
+
+if __name__ == "__main__":
+    from new_benchmark import create_hardware_weights
+
+    print("🛰️  TinyGPT-2 Dynamic-Batching Server (golden model stand-in)")
+    print("=" * 78)
+
+    weights = create_hardware_weights(quantized=True, dtype='float32')
+
+    async def sweep():
+        policies = [(1, 0.0), (16, 1.0), (64, 2.0), (256, 5.0)]
+        rates = [1_000, 5_000, 20_000]
+        print(f"{'Rate/s':<8} {'Batch':<6} {'Wait ms':<8} {'Mean B':<7} "
+              f"{'Queue p50':<10} {'Queue p99':<10} {'Total p50':<10} {'Total p99':<10}")
+        print("-" * 78)
+        for rate in rates:
+            for max_batch, max_wait_ms in policies:
+                async with BatchingServer(weights, quantized=True, max_batch=max_batch,
+                                          max_wait_ms=max_wait_ms) as server:
+                    await open_loop_load(server, rate, num_requests=min(rate, 5_000))
+                stats = server.stats()
+                print(f"{rate:<8} {max_batch:<6} {max_wait_ms:<8.1f} {stats['mean_batch_size']:<7.1f} "
+                      f"{stats['queue']['p50_ms']:<10.3f} {stats['queue']['p99_ms']:<10.3f} "
+                      f"{stats['total']['p50_ms']:<10.3f} {stats['total']['p99_ms']:<10.3f}")
+
+    asyncio.run(sweep())
@@ -0,0 +1,182 @@
+"""
+Benchmark harness for the TinyGPT-2 golden models
+
+One-pass time.time() measurements at 1-4 sequences are mostly timer noise.
+This harness instead:
+    - builds weights and input sequences once, outside the timed region
+    - runs untimed warmup calls (token tables, allocator, BLAS threads)
+    - times repeated trials with time.perf_counter_ns
+    - reports p50/p95/p99 latency and throughput from the trial distribution
+    - optionally breaks a trial down per RTL FSM state (stage_profiler hook)
+    - writes JSON / CSV so runs can be diffed across commits
+"""
+
+import csv
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+def time_trials(fn, warmup=3, trials=30):
+    """
+    Time repeated calls of fn()
+
+    Args:
+        fn: zero-argument callable, one call = one trial
+        warmup: untimed calls before measuring
+        trials: timed calls
+
+    Returns:
+        int64 array of per-trial durations in nanoseconds
+    """
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(trials, dtype=np.int64)
+    for i in range(trials):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+    return samples
+
+def summarize_latencies(samples_ns, items_per_trial=1):
+    """Latency statistics (ms) and median-based throughput for a set of trials"""
+    samples_ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    percentiles = np.percentile(samples_ms, PERCENTILES)
+    summary = {
+        'trials': len(samples_ms),
+        'mean_ms': float(samples_ms.mean()),
+        'std_ms': float(samples_ms.std()),
+        'min_ms': float(samples_ms.min()),
+        'max_ms': float(samples_ms.max()),
+    }
+    for p, value in zip(PERCENTILES, percentiles):
+        summary[f'p{p}_ms'] = float(value)
+    summary['p50_us_per_item'] = summary['p50_ms'] * 1e3 / items_per_trial
+    summary['items_per_second'] = items_per_trial / (summary['p50_ms'] / 1e3)
+    return summary
+
+def benchmark_golden_model(batch_size, quantized=False, batched=True, warmup=3, trials=30,
+                           stage_breakdown=True, weights=None, seed=0):
+    """
+    Benchmark tiny_gpt2_hardware_model on a fixed batch of random sequences
+
+    Args:
+        batch_size: sequences processed per trial
+        quantized: whether to use Q5.10 quantization
+        batched: one batched call per trial instead of a per-sequence loop
+        warmup / trials: see time_trials
+        stage_breakdown: add per-FSM-state times from separate instrumented
+                         trials (the headline latencies stay uninstrumented)
+        weights: weights dict to reuse (created once if None)
+        seed: seed of the input sequences
+
+    Returns:
+        dictionary of configuration, latency statistics and stage breakdown
+    """
+    from new_benchmark import (create_hardware_weights, tiny_gpt2_hardware_model,
+                               tiny_gpt2_hardware_model_batch)
+    from stage_profiler import StageProfiler
+
+    if weights is None:
+        weights = create_hardware_weights(quantized=quantized)
+    sequences = np.random.default_rng(seed).integers(0, 16, size=(batch_size, 16))
+
+    def run(stage_timer=None):
+        if batched:
+            tiny_gpt2_hardware_model_batch(sequences, weights, quantized=quantized,
+                                           capture=None, stage_timer=stage_timer)
+        else:
+            for tokens in sequences:
+                tiny_gpt2_hardware_model(tokens, weights, quantized=quantized,
+                                         capture=None, stage_timer=stage_timer)
+
+    result = {
+        'model': 'tiny_gpt2_hardware_model',
+        'batch_size': batch_size,
+        'quantized': quantized,
+        'batched': batched,
+        'warmup': warmup,
+    }
+    result.update(summarize_latencies(time_trials(run, warmup, trials), batch_size))
+
+    if stage_breakdown:
+        profiler = StageProfiler(track_memory=False)
+        for _ in range(trials):
+            run(profiler)
+        result['stages'] = {name: {'mean_us': stats['wall_us'] / trials, 'share': stats['share']}
+                            for name, stats in profiler.report().items()}
+    return result
+
+def run_metadata():
+    """Environment details stored next to the numbers"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+def write_json(results, path, metadata=None):
+    """Write benchmark results (and run metadata) as JSON"""
+    with open(path, 'w') as f:
+        json.dump({'metadata': metadata or run_metadata(), 'results': results}, f, indent=2)
+
+def write_csv(results, path):
+    """Write benchmark results as CSV, one row per configuration (stages as stage_<STATE>_us columns)"""
+    rows = []
+    for result in results:
+        row = {k: v for k, v in result.items() if k != 'stages'}
+        for name, stats in result.get('stages', {}).items():
+            row[f'stage_{name}_us'] = stats['mean_us']
+        rows.append(row)
+    fieldnames = []
+    for row in rows:
+        fieldnames.extend(k for k in row if k not in fieldnames)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    from new_benchmark import create_hardware_weights
+
+    print("⏱️  TinyGPT-2 Golden Model Benchmark Harness")
+    print("=" * 60)
+
+    batch_sizes = [1, 2, 4, 8, 16, 32, 64, 256, 1024]
+    warmup, trials = 5, 50
+
+    results = []
+    for quantized in (False, True):
+        weights = create_hardware_weights(quantized=quantized)
+        for batch_size in batch_sizes:
+            results.append(benchmark_golden_model(batch_size, quantized=quantized, warmup=warmup,
+                                                  trials=trials, weights=weights))
+
+    print(f"\n{'Mode':<7} {'Seqs':<6} {'p50 (ms)':<10} {'p95 (ms)':<10} {'p99 (ms)':<10} {'μs/seq':<10} {'seqs/sec':<10}")
+    print("-" * 66)
+    for r in results:
+        mode = 'Q5.10' if r['quantized'] else 'Float'
+        print(f"{mode:<7} {r['batch_size']:<6} {r['p50_ms']:<10.3f} {r['p95_ms']:<10.3f} {r['p99_ms']:<10.3f} "
+              f"{r['p50_us_per_item']:<10.2f} {r['items_per_second']:<10.0f}")
+
+    largest = results[-1]
+    print(f"\n📊 Stage breakdown (Q5.10, {largest['batch_size']} seqs/call)")
+    for name, stats in largest['stages'].items():
+        print(f"   {name:<16} {stats['mean_us']:>9.1f} μs  {stats['share'] * 100:5.1f}%")
+
+    write_json(results, 'benchmark_results.json')
+    write_csv(results, 'benchmark_results.csv')
+    print("\n💾 Saved benchmark_results.json / benchmark_results.csv")
@@ -0,0 +1,285 @@
+"""
+Configurable-geometry TinyGPT-2 golden model
+
+Same pipeline as tiny_gpt2_hardware_model_batch, with every dimension a
+parameter instead of a hard-coded 16, so software throughput and
+fixed-point error can be measured for larger arrays before any RTL change:
+    d_model     embedding / hidden width            (hardware: 16)
+    seq_len     tokens per sequence                 (hardware: 16)
+    vocab_size  token IDs and output logits         (hardware: 16)
+    n_layers    stacked transformer blocks          (hardware: 1)
+    n_heads     attention heads, d_model // n_heads wide each (hardware: 1)
+    d_ff        feed-forward width                  (hardware: d_model)
+
+The hardware quirks are options, defaulting to the hardware behaviour:
+    attention_scale  scale scores by 1/sqrt(head_dim)   (hardware: False)
+    causal_mask      mask future positions              (hardware: False)
+    readout          'first' row / 'last' row / 'all'   (hardware: 'first')
+
+Per block, as wired in tiny_gpt2_top:
+    x -> LN -> Q,K,V -> softmax(QK^T) V -> x + attn -> LN1
+      -> FF1 -> GELU -> FF2 -> LN1 + FF2 -> LN2 -> (next block)
+followed by the output projection of every row (as COMPUTE_OUTPUT does) and
+a softmax on the readout row(s).
+The dtype policies of new_benchmark (float64 / float32 / int16 codes)
+apply unchanged. With DEFAULT_CONFIG and create_weights(seed=42) the
+outputs equal tiny_gpt2_hardware_model_batch on create_hardware_weights().
+"""
+
+import time
+
+import numpy as np
+
+import op_accounting
+import q5_10
+from new_benchmark import (cast_weights, create_hardware_weights, dtype_ops, quantize_q5_10, resolve_dtype,
+                           tiny_gpt2_hardware_model_batch)
+
+DEFAULT_CONFIG = {
+    'd_model': 16,
+    'seq_len': 16,
+    'vocab_size': 16,
+    'n_layers': 1,
+    'n_heads': 1,
+    'd_ff': None,               # None = d_model
+    'attention_scale': False,
+    'causal_mask': False,
+    'readout': 'first',
+}
+
+LAYER_WEIGHTS = ('w_q', 'w_k', 'w_v', 'w_ff1', 'w_ff2')
+
+def make_config(**overrides):
+    """DEFAULT_CONFIG with overrides applied and checked"""
+    unknown = set(overrides) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown config keys {sorted(unknown)}")
+    config = dict(DEFAULT_CONFIG, **overrides)
+    if config['d_ff'] is None:
+        config['d_ff'] = config['d_model']
+    if config['d_model'] % config['n_heads']:
+        raise ValueError(f"d_model={config['d_model']} is not divisible by n_heads={config['n_heads']}")
+    if config['readout'] not in ('first', 'last', 'all'):
+        raise ValueError(f"readout must be 'first', 'last' or 'all', got {config['readout']!r}")
+    return config
+
+def create_weights(config=None, seed=42, init_scale=0.02, quantized=False, dtype='float64'):
+    """
+    Random weights for a configuration (same draw order as create_hardware_weights)
+
+    Args:
+        config: make_config() dict (DEFAULT_CONFIG if None)
+        seed / init_scale: normal initialization
+        quantized: snap the weights to the Q5.10 grid
+        dtype: dtype policy of the arrays ('float64', 'float32', 'int16' codes)
+
+    Returns:
+        dictionary with 'embedding' [vocab_size * d_model], 'w_out' [d_model, vocab_size]
+        and 'layers': one dict of w_q/w_k/w_v [D, D], w_ff1 [D, d_ff], w_ff2 [d_ff, D] per block
+    """
+    config = config or make_config()
+    D, F, V = config['d_model'], config['d_ff'], config['vocab_size']
+    shapes = {'w_q': (D, D), 'w_k': (D, D), 'w_v': (D, D), 'w_ff1': (D, F), 'w_ff2': (F, D)}
+
+    np.random.seed(seed)
+    embedding = np.random.randn(V * D) * init_scale
+    layers = [{name: np.random.randn(*shapes[name]) * init_scale for name in LAYER_WEIGHTS}
+              for _ in range(config['n_layers'])]
+    w_out = np.random.randn(D, V) * init_scale
+
+    weights = {'embedding': embedding, 'layers': layers, 'w_out': w_out}
+    if quantized:
+        weights['embedding'] = quantize_q5_10(embedding)
+        weights['w_out'] = quantize_q5_10(w_out)
+        weights['layers'] = [{name: quantize_q5_10(w) for name, w in layer.items()} for layer in layers]
+    if resolve_dtype(dtype) != 'float64':
+        weights = _cast(weights, dtype)
+    return weights
+
+def _cast(weights, dtype):
+    cast = cast_weights({'embedding': weights['embedding'], 'w_out': weights['w_out']}, dtype)
+    cast['layers'] = [cast_weights(layer, dtype) for layer in _layers(weights)]
+    return cast
+
+def _layers(weights):
+    """Per-block weight dicts; a flat hardware weights dict is a single block"""
+    if 'layers' in weights:
+        return weights['layers']
+    return [{name: weights[name] for name in LAYER_WEIGHTS}]
+
+def _weights_dtype(weights):
+    return resolve_dtype(None, _layers(weights)[0])
+
+def transformer_model_batch(input_tokens, weights, config=None, quantized=False, dtype=None):
+    """
+    Batched golden model for any geometry
+
+    Args:
+        input_tokens: [B, seq_len] token IDs in [0, vocab_size)
+        weights: create_weights() dict (or a flat create_hardware_weights() dict)
+        config: make_config() dict (DEFAULT_CONFIG if None)
+        quantized: whether to use Q5.10 quantization after every stage
+        dtype: 'float64', 'float32' or 'int16' (None = the dtype of the weights);
+               'int16' runs on Q5.10 codes and always stays on the grid
+
+    Returns:
+        output_probs: [B, vocab_size] for 'first' / 'last' readout,
+                      [B, seq_len, vocab_size] for 'all'
+    """
+    config = config or make_config()
+    weights_dtype = _weights_dtype(weights)
+    dtype = weights_dtype if dtype is None else resolve_dtype(dtype)
+    if dtype != weights_dtype:
+        weights = _cast(weights, dtype)
+    ops = dtype_ops(dtype)
+    matmul, add = ops['matmul'], ops['add']
+    codes = dtype == 'int16'
+    quant = (lambda x: quantize_q5_10(x, out=x)) if quantized and not codes else (lambda x: x)
+    tokens = np.asarray(input_tokens)
+    B, T = tokens.shape
+    D, H = config['d_model'], config['n_heads']
+    head_dim = D // H
+
+    x = quant(weights['embedding'].reshape(config['vocab_size'], D)[tokens])      # [B, T, D]
+
+    softmax = ops['softmax']
+    if config['causal_mask']:
+        future = np.triu(np.ones((T, T), dtype=bool), k=1)
+        masked_value = q5_10.CODE_MIN if codes else -np.inf      # weight rounds to 0 either way
+
+        def softmax(scores):
+            scores = scores.copy()
+            scores[..., future] = masked_value
+            return ops['softmax'](scores)
+
+    for layer in _layers(weights):
+        ln_input = quant(ops['layernorm'](x))
+        Q = quant(matmul(ln_input, layer['w_q']))
+        K = quant(matmul(ln_input, layer['w_k']))
+        V = quant(matmul(ln_input, layer['w_v']))
+
+        if H == 1:
+            scores = matmul(Q, K.transpose(0, 2, 1))                                  # [B, T, T]
+        else:
+            Qh = Q.reshape(B, T, H, head_dim).transpose(0, 2, 1, 3)                   # [B, H, T, hd]
+            Kh = K.reshape(B, T, H, head_dim).transpose(0, 2, 1, 3)
+            scores = matmul(Qh, Kh.transpose(0, 1, 3, 2))                             # [B, H, T, T]
+        if config['attention_scale']:
+            if codes:
+                scores = q5_10.to_codes(q5_10.from_codes(scores, dtype=np.float32) / np.sqrt(head_dim))
+            else:
+                scores *= 1.0 / np.sqrt(head_dim)
+        scores = quant(scores)
+
+        attn_weights = quant(softmax(scores))
+        if H == 1:
+            attn = matmul(attn_weights, V)
+        else:
+            Vh = V.reshape(B, T, H, head_dim).transpose(0, 2, 1, 3)
+            attn = matmul(attn_weights, Vh).transpose(0, 2, 1, 3).reshape(B, T, D)
+        attn = quant(attn)
+
+        residual_1 = quant(add(x, attn))
+        ln1 = quant(ops['layernorm'](residual_1))
+        ff1 = quant(matmul(ln1, layer['w_ff1']))
+        gelu = quant(ops['gelu'](ff1))
+        ff2 = quant(matmul(gelu, layer['w_ff2']))
+        residual_2 = quant(add(ln1, ff2))
+        x = quant(ops['layernorm'](residual_2))
+
+    logits = quant(matmul(x, weights['w_out']))                                  # [B, T, V]
+    if config['readout'] == 'first':
+        logits = logits[:, 0, :]
+    elif config['readout'] == 'last':
+        logits = logits[:, -1, :]
+    probs = quant(ops['softmax'](logits))
+    if codes:
+        probs = q5_10.from_codes(probs, dtype=np.float32)
+    return probs
+
+def ops_per_sequence(config=None, quantized=False, dtype='float64'):
+    """
+    FLOPs per sequence for any geometry
+
+    The total of op_accounting.stage_op_counts over the same stage table:
+    2 FLOPs per MAC, LayerNorm / softmax / GELU / residual math, the Q5.10
+    snap of every result when quantized, the output projection of every
+    row and the output softmax of the readout row(s).
+    """
+    config = config or make_config()
+    return op_accounting.total_counts(
+        op_accounting.stage_op_counts(quantized=quantized, dtype=dtype, config=config))['flops']
+
+def check_op_accounting():
+    """
+    Check that ops_per_sequence on DEFAULT_CONFIG equals the hardware op
+    counts, and that the stage table matches the golden model's arrays
+
+    Raises:
+        AssertionError on the first mismatch
+    """
+    weights = create_hardware_weights(quantized=True)
+    probs, captured = tiny_gpt2_hardware_model_batch(np.zeros((1, DEFAULT_CONFIG['seq_len']), dtype=np.int64),
+                                                     weights, quantized=True, capture='all')
+    op_accounting.check_stage_table(probs[0], {name: value[0] for name, value in captured.items()}, weights)
+    for quantized in (False, True):
+        hardware = op_accounting.total_counts(op_accounting.stage_op_counts(quantized=quantized))['flops']
+        configurable = ops_per_sequence(make_config(), quantized)
+        assert configurable == hardware, f"quantized={quantized}: {configurable} != {hardware} FLOPs"
+
+def benchmark_config(config, num_sequences=1024, trials=5, quantized=False, seed=0):
+    """Median throughput of one configuration (weights and inputs built outside the timed region)"""
+    weights = create_weights(config, quantized=quantized)
+    tokens = np.random.default_rng(seed).integers(0, config['vocab_size'],
+                                                  size=(num_sequences, config['seq_len']))
+    transformer_model_batch(tokens[:2], weights, config, quantized)             # warm up
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter_ns()
+        transformer_model_batch(tokens, weights, config, quantized)
+        samples.append(time.perf_counter_ns() - start)
+    seconds = float(np.median(samples)) / 1e9
+    return {
+        'sequences_per_second': num_sequences / seconds,
+        'time_per_sequence_us': seconds / num_sequences * 1e6,
+        'gops': ops_per_sequence(config, quantized) * num_sequences / seconds / 1e9,
+    }
+
+def quantization_error(config, num_sequences=256, seed=0):
+    """Max / mean |p_q5.10 - p_float| of the output probabilities"""
+    float_weights = create_weights(config, quantized=False)
+    quant_weights = create_weights(config, quantized=True)
+    tokens = np.random.default_rng(seed).integers(0, config['vocab_size'],
+                                                  size=(num_sequences, config['seq_len']))
+    diff = np.abs(transformer_model_batch(tokens, quant_weights, config, quantized=True)
+                  - transformer_model_batch(tokens, float_weights, config, quantized=False))
+    return float(diff.max()), float(diff.mean())
+
+if __name__ == "__main__":
+    print("📐 Configurable-Geometry TinyGPT-2")
+    print("=" * 78)
+    check_op_accounting()
+    print(f"Op accounting: {ops_per_sequence()} FLOPs/sequence ({ops_per_sequence(quantized=True)} "
+          "quantized), matches op_accounting ✅\n")
+
+    sweep = [
+        {},
+        {'d_model': 32},
+        {'d_model': 64},
+        {'seq_len': 32},
+        {'seq_len': 64},
+        {'vocab_size': 64},
+        {'n_layers': 2},
+        {'n_heads': 4},
+        {'d_model': 64, 'n_heads': 4, 'attention_scale': True, 'causal_mask': True, 'readout': 'last'},
+    ]
+    print(f"{'Config':<46} {'Float seq/s':>12} {'Q5.10 seq/s':>12} {'max |Δp|':>8}")
+    print("-" * 82)
+    for overrides in sweep:
+        config = make_config(**overrides)
+        label = ', '.join(f"{k}={v}" for k, v in overrides.items()) or 'hardware (16x16x16, 1 layer)'
+        float_perf = benchmark_config(config, quantized=False)
+        quant_perf = benchmark_config(config, quantized=True)
+        max_err, _ = quantization_error(config)
+        print(f"{label[:46]:<46} {float_perf['sequences_per_second']:>12.0f} "
+              f"{quant_perf['sequences_per_second']:>12.0f} {max_err:>8.4f}")
@@ -0,0 +1,264 @@
+"""
+Autoregressive generation for the 16x16 TinyGPT-2 with a KV cache
+
+tiny_gpt2_hardware_model only scores one 16-token window. Here tokens are
+generated one at a time over a sliding window of the last 16 tokens.
+
+Why a cache makes each step one row of work:
+    - the model has no causal mask, but each row of K, V (and the
+      embedding / Q rows) depends only on its own token, so cached rows
+      never go stale
+    - every stage after attention is row-wise, so only the readout row
+      ('first' = hardware output_logits[0], or 'last') has to be carried
+      through attention, LayerNorm, FFN and the output projection
+A step therefore costs one K/V row append plus one query row, instead of
+recomputing 16 rows. With a full window the probabilities equal
+tiny_gpt2_hardware_model on that window.
+
+Modes:
+    'float'  - float64 golden model
+    'q5_10'  - golden model with Q5.10 rounding after every stage
+    'int'    - integer datapath of rtl_emulator (bit-exact stage
+               arithmetic, PE accumulators cleared per matmul; needs a
+               full 16-token window because COMPUTE_SCORES multiplies by
+               the whole K block)
+"""
+
+import time
+
+import numpy as np
+
+import q5_10
+import rtl_emulator
+from new_benchmark import (get_token_tables, gelu_tanh, layernorm_rows, quantize_q5_10,
+                           tiny_gpt2_hardware_model)
+from weight_store import WEIGHT_RAM_LAYOUT, ram_from_weights
+
+SEQ_LEN = 16
+D_MODEL = 16
+VOCAB_SIZE = 16
+MODES = ('float', 'q5_10', 'int')
+READOUTS = ('first', 'last')
+
+class KVCache:
+    """Ring buffer of the last `capacity` per-token rows (input, Q, K, V)"""
+
+    def __init__(self, capacity=SEQ_LEN, width=D_MODEL, dtype=np.float64):
+        self.capacity = capacity
+        self.rows = {name: np.zeros((capacity, width), dtype=dtype) for name in ('input', 'Q', 'K', 'V')}
+        self.tokens = np.zeros(capacity, dtype=np.int64)
+        self.start = 0          # slot of the oldest row
+        self.length = 0
+
+    def append(self, token, rows):
+        """Add one token's rows, evicting the oldest when full"""
+        slot = (self.start + self.length) % self.capacity
+        if self.length == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.length += 1
+        self.tokens[slot] = token
+        for name, value in rows.items():
+            self.rows[name][slot] = value
+
+    def _order(self):
+        return (self.start + np.arange(self.length)) % self.capacity
+
+    def window(self, name):
+        """Cached rows in window order (oldest first)"""
+        if self.start == 0:
+            return self.rows[name][:self.length]
+        return self.rows[name][self._order()]
+
+    def row(self, name, position):
+        """Row at window position (0 = oldest, -1 = newest)"""
+        return self.rows[name][(self.start + position % self.length) % self.capacity]
+
+    def window_tokens(self):
+        return self.tokens[self._order()]
+
+    def __len__(self):
+        return self.length
+
+class TinyGPT2Generator:
+    """
+    Incremental TinyGPT-2 decoder
+
+    Args:
+        weights: golden-model weights dict
+        mode: 'float', 'q5_10' or 'int'
+        readout: 'first' (hardware: output_logits[0]) or 'last'
+        window: context length kept in the KV cache (hardware: 16)
+    """
+
+    def __init__(self, weights, mode='float', readout='first', window=SEQ_LEN):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if readout not in READOUTS:
+            raise ValueError(f"readout must be one of {READOUTS}, got {readout!r}")
+        if mode == 'int' and window != SEQ_LEN:
+            raise ValueError("int mode follows the 16x16 RTL datapath and needs window=16")
+        self.weights = weights
+        self.mode = mode
+        self.readout = readout
+        self.window = window
+
+        if mode == 'int':
+            ram = ram_from_weights(weights)
+            self.blocks = {name: ram[start:end].reshape(D_MODEL, D_MODEL)
+                           for name, (start, end) in WEIGHT_RAM_LAYOUT.items()}
+            embedding = self.blocks['embedding']
+            ln_table = rtl_emulator.layernorm_rows(embedding)
+            self.tables = {'input': embedding}
+            for name, block in (('Q', 'w_q'), ('K', 'w_k'), ('V', 'w_v')):
+                self.tables[name] = rtl_emulator.matrix_mult(ln_table, self.blocks[block])[0]
+            self.cache = KVCache(window, dtype=np.int16)
+        else:
+            tables = get_token_tables(weights, quantized=(mode == 'q5_10'))
+            self.tables = {'input': tables['input_matrix'], 'Q': tables['Q'],
+                           'K': tables['K'], 'V': tables['V']}
+            self.cache = KVCache(window)
+
+    def reset(self):
+        self.cache = KVCache(self.window, dtype=self.cache.rows['K'].dtype)
+
+    def push(self, token):
+        """Append one token's cached rows (one gather per row type)"""
+        self.cache.append(token, {name: table[token] for name, table in self.tables.items()})
+
+    def prefill(self, tokens):
+        for token in tokens:
+            self.push(int(token))
+
+    def next_token_probs(self):
+        """Next-token distribution for the current window ([16] float, or int16 codes in int mode)"""
+        if self.mode == 'int':
+            if len(self.cache) < self.window:
+                raise ValueError("int mode needs a full 16-token window")
+            return self._probs_int()
+        return self._probs_float()
+
+    def _readout_position(self):
+        return 0 if self.readout == 'first' else -1
+
+    def _probs_float(self):
+        quantized = self.mode == 'q5_10'
+        quant = (lambda x: quantize_q5_10(x, out=x)) if quantized else (lambda x: x)
+        w = self.weights
+        position = self._readout_position()
+        q_row = self.cache.row('Q', position)[np.newaxis, :]
+        x_row = self.cache.row('input', position)[np.newaxis, :]
+
+        # COMPUTE_SCORES / SOFTMAX_SCORES / COMPUTE_ATTN for the readout row only
+        scores = quant(q_row @ self.cache.window('K').T)
+        exp_scores = np.exp(scores - np.max(scores, axis=-1, keepdims=True))
+        attn_weights = quant(exp_scores / np.sum(exp_scores, axis=-1, keepdims=True))
+        attn = quant(attn_weights @ self.cache.window('V'))
+
+        residual_1 = quant(x_row + attn)
+        ln1 = quant(layernorm_rows(residual_1))
+        ff1 = quant(ln1 @ w['w_ff1'])
+        gelu = quant(gelu_tanh(ff1))
+        ff2 = quant(gelu @ w['w_ff2'])
+        residual_2 = quant(ln1 + ff2)
+        ln2 = quant(layernorm_rows(residual_2))
+        logits = quant(ln2 @ w['w_out'])[0]
+
+        exp_logits = np.exp(logits - np.max(logits))
+        return quant(exp_logits / np.sum(exp_logits))
+
+    def _probs_int(self):
+        emu = rtl_emulator
+        position = self._readout_position()
+        q_row = self.cache.row('Q', position)[np.newaxis, :]
+        x_row = self.cache.row('input', position)[np.newaxis, :]
+
+        scores = emu.matrix_mult(q_row, self.cache.window('K').T)[0]          # K^T driven as matrix_b
+        attn_weights = emu.softmax_rows(scores)
+        attn = emu.matrix_mult(attn_weights, self.cache.window('V'))[0]       # V driven as matrix_b
+        residual_1 = emu.wrap16(x_row.astype(np.int64) + attn)
+        ln1 = emu.layernorm_rows(residual_1)
+        ff1 = emu.matrix_mult(ln1, self.blocks['w_ff1'])[0]
+        ff2 = emu.matrix_mult(emu.gelu(ff1), self.blocks['w_ff2'])[0]
+        residual_2 = emu.wrap16(ln1.astype(np.int64) + ff2)
+        ln2 = emu.layernorm_rows(residual_2)
+        logits = emu.matrix_mult(ln2, self.blocks['w_out'])[0]
+        return emu.softmax_rows(logits)[0]
+
+def _choose(probs, temperature, rng):
+    if temperature <= 0:
+        return int(np.argmax(probs))
+    logits = np.log(np.maximum(probs, 1e-12)) / temperature
+    p = np.exp(logits - logits.max())
+    return int(rng.choice(len(p), p=p / p.sum()))
+
+def generate(tokens, n_new, weights, mode='float', readout='first', temperature=0.0, seed=None,
+             return_probs=False):
+    """
+    Generate n_new tokens after a prompt
+
+    Args:
+        tokens: prompt token IDs (1-16 tokens; exactly 16 in int mode)
+        n_new: number of tokens to generate
+        weights: golden-model weights dict
+        mode: 'float', 'q5_10' or 'int'
+        readout: 'first' (hardware readout) or 'last'
+        temperature: 0 = greedy argmax, > 0 = sampling
+        seed: RNG seed for sampling
+        return_probs: also return the [n_new, 16] per-step distributions
+
+    Returns:
+        [len(tokens) + n_new] token IDs (and per-step probabilities)
+    """
+    generator = TinyGPT2Generator(weights, mode=mode, readout=readout)
+    rng = np.random.default_rng(seed)
+    generator.prefill(tokens)
+    out = list(int(t) for t in tokens)
+    step_probs = np.empty((n_new, VOCAB_SIZE))
+    for i in range(n_new):
+        probs = generator.next_token_probs()
+        if mode == 'int':
+            probs = q5_10.from_codes(probs)
+        step_probs[i] = probs
+        token = _choose(probs, temperature, rng)
+        out.append(token)
+        generator.push(token)
+    if return_probs:
+        return np.array(out), step_probs
+    return np.array(out)
+
+if __name__ == "__main__":
+    from new_benchmark import create_hardware_weights
+
+    print("🔁 TinyGPT-2 Autoregressive Generation (KV cache)")
+    print("=" * 60)
+
+    prompt = np.arange(16)
+    n_new = 256
+    for mode in MODES:
+        weights = create_hardware_weights(quantized=(mode != 'float'))
+        generator = TinyGPT2Generator(weights, mode=mode)
+        generator.prefill(prompt)
+        generator.next_token_probs()                      # warm up
+
+        samples = np.empty(n_new, dtype=np.int64)
+        for i in range(n_new):
+            start = time.perf_counter_ns()
+            probs = generator.next_token_probs()
+            token = int(np.argmax(probs))
+            generator.push(token)
+            samples[i] = time.perf_counter_ns() - start
+
+        # Same steps without a cache: rescore the whole 16-token window
+        window = generator.cache.window_tokens()
+        start = time.perf_counter_ns()
+        for _ in range(32):
+            if mode == 'int':
+                rtl_emulator.tiny_gpt2_rtl_emulator(window, ram_from_weights(weights), clear_accumulators=True)
+            else:
+                tiny_gpt2_hardware_model(window, weights, quantized=(mode == 'q5_10'), capture=None)
+        full_us = (time.perf_counter_ns() - start) / 32 / 1e3
+
+        p50, p99 = np.percentile(samples / 1e3, [50, 99])
+        print(f"{mode:<6} per-token p50 {p50:7.1f} μs, p99 {p99:7.1f} μs | "
+              f"full-window recompute {full_us:7.1f} μs")
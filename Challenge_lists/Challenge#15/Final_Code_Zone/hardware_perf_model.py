@@ -0,0 +1,247 @@
+"""
+Analytical cycle model of tiny_gpt2_top.v
+
+Builds per-sequence latency from the per-state latencies of the RTL instead
+of a single measured constant, so alternative schedules can be evaluated
+before touching RTL:
+    - computing Q, K and V in parallel on three matrix_mult_16x16 units
+    - pipelining successive sequences across the functional units
+    - other clock frequencies
+
+Unit latencies (cycles from the unit sampling start to done going high):
+    matrix_mult_16x16       (FEED_CYCLES + 1) + (COMPUTE_CYCLES + 1) + 1
+    layernorm_matrix_proc   16 rows streamed + LN pipeline depth + 2
+                            (preprocess 9+1, inv_sqrt_newton 8+1, postprocess 3+1)
+    softmax_matrix_proc     16 rows streamed + frontend 6+1 + backend 2+1 + 1
+    gelu_matrix_proc        16 rows streamed + 1-cycle ROM stage + 1
+Every handshaked top state adds TOP_HANDSHAKE cycles: start is registered
+in the state, sampled by the unit on the next edge, and done moves the FSM
+one edge later. The remaining states take one cycle.
+
+state_cycles() assumes clean handshakes. The current RTL does not have
+them, which is why it measures 482 cycles (MEASURED_CYCLES_PER_SEQUENCE)
+instead of the nominal 647. stale_handshake_cycles() replays the two
+stale done flags cycle by cycle:
+    - mult_start is registered high on every cycle of a COMPUTE state, and
+      matrix_mult_16x16 holds done while start is high, so the next COMPUTE
+      state (one SAVE cycle later) sees done still set and leaves after one
+      cycle. Its one-cycle start pulse then launches a multiply that the
+      following COMPUTE state waits on
+    - softmax_matrix_processor never clears done, so the second softmax
+      state (SOFTMAX_OUTPUT) leaves after one cycle
+States that leave early also store or pass on an earlier unit's result,
+so the current RTL's outputs differ from rtl_emulator, which models the
+clean-handshake datapath (the state_cycles() schedule).
+"""
+
+RTL_PARAMS = {
+    'ROWS': 16,                   # rows streamed through LN / softmax / GELU
+    'FEED_CYCLES': 31,            # matrix_mult_16x16.v
+    'COMPUTE_CYCLES': 16,         # matrix_mult_16x16.v
+    'LN_PIPELINE_DEPTH': 23,      # layernorm_preprocess + inv_sqrt_newton + layernorm_postprocess
+    'SOFTMAX_PIPELINE_DEPTH': 10, # softmax_frontend + softmax_backend
+    'GELU_PIPELINE_DEPTH': 1,     # gelu_pipeline ROM lookup
+    'TOP_HANDSHAKE': 3,           # start register + start sample + done -> next_state
+}
+
+MEASURED_CYCLES_PER_SEQUENCE = 482   # test_tiny_gpt2 simulation, cycles from start to done
+
+# tiny_gpt2_top FSM: (state, functional unit); 'control' states take one cycle
+FSM_SCHEDULE = (
+    ('IDLE', 'control'),
+    ('EMBEDDING', 'control'),
+    ('LAYERNORM_INPUT', 'layernorm'),
+    ('SAVE_LN_INPUT', 'control'),
+    ('COMPUTE_Q', 'matmul'),
+    ('SAVE_Q', 'control'),
+    ('COMPUTE_K', 'matmul'),
+    ('SAVE_K', 'control'),
+    ('COMPUTE_V', 'matmul'),
+    ('SAVE_V', 'control'),
+    ('COMPUTE_SCORES', 'matmul'),
+    ('SOFTMAX_SCORES', 'softmax'),
+    ('COMPUTE_ATTN', 'matmul'),
+    ('ADD_RESIDUAL_1', 'control'),
+    ('LAYERNORM_1', 'layernorm'),
+    ('SAVE_LN1', 'control'),
+    ('COMPUTE_FF1', 'matmul'),
+    ('GELU_FF1', 'gelu'),
+    ('COMPUTE_FF2', 'matmul'),
+    ('ADD_RESIDUAL_2', 'control'),
+    ('LAYERNORM_2', 'layernorm'),
+    ('COMPUTE_OUTPUT', 'matmul'),
+    ('SOFTMAX_OUTPUT', 'softmax'),
+    ('DONE_STATE', 'control'),
+)
+
+def unit_cycles(params=None):
+    """Cycles from start sampled to done high for each functional unit"""
+    p = dict(RTL_PARAMS, **(params or {}))
+    return {
+        'control': 1,
+        'matmul': (p['FEED_CYCLES'] + 1) + (p['COMPUTE_CYCLES'] + 1) + 1,
+        'layernorm': p['ROWS'] + p['LN_PIPELINE_DEPTH'] + 2,
+        'softmax': p['ROWS'] + p['SOFTMAX_PIPELINE_DEPTH'] + 1,
+        'gelu': p['ROWS'] + p['GELU_PIPELINE_DEPTH'] + 1,
+    }
+
+def fsm_schedule(parallel_qkv=False):
+    """FSM state sequence, optionally with Q/K/V merged into one parallel state"""
+    if not parallel_qkv:
+        return FSM_SCHEDULE
+    merged = []
+    for state, unit in FSM_SCHEDULE:
+        if state in ('COMPUTE_K', 'COMPUTE_V', 'SAVE_K', 'SAVE_V'):
+            continue
+        if state == 'COMPUTE_Q':
+            state = 'COMPUTE_QKV'
+        elif state == 'SAVE_Q':
+            state = 'SAVE_QKV'
+        merged.append((state, unit))
+    return tuple(merged)
+
+def state_cycles(params=None, parallel_qkv=False):
+    """Cycles spent in each FSM state for one sequence, in execution order"""
+    p = dict(RTL_PARAMS, **(params or {}))
+    units = unit_cycles(p)
+    cycles = {}
+    for state, unit in fsm_schedule(parallel_qkv):
+        cycles[state] = units[unit] + (0 if unit == 'control' else p['TOP_HANDSHAKE'])
+    return cycles
+
+def stale_handshake_cycles(params=None):
+    """
+    Cycles spent in each FSM state with the current RTL's stale done flags
+
+    Steps the top FSM, the mult_start register and the matrix_mult_16x16
+    control FSM one clock edge at a time; the other units take their
+    state_cycles() time, except that softmax done stays set after the
+    first softmax completes.
+    """
+    p = dict(RTL_PARAMS, **(params or {}))
+    matmul_latency = unit_cycles(p)['matmul']
+    clean = state_cycles(p)
+    cycles = {}
+    mult_start = mult_done = softmax_done = False
+    countdown = None                # matmul: None idle, > 0 running, 0 in DONE_STATE
+    for state, unit in FSM_SCHEDULE:
+        dwell = 0
+        while True:
+            dwell += 1
+            if unit == 'matmul':
+                leave = mult_done
+            elif unit == 'softmax' and softmax_done:
+                leave = True
+            else:
+                leave = dwell >= clean[state]
+            # matrix_mult_16x16 samples the start value registered on the previous edge
+            if countdown is None:
+                if mult_start:
+                    countdown = matmul_latency
+            elif countdown > 0:
+                countdown -= 1
+                mult_done = countdown == 0
+            elif not mult_start:
+                countdown, mult_done = None, False
+            mult_start = unit == 'matmul'
+            if leave:
+                break
+        cycles[state] = dwell
+        softmax_done = softmax_done or unit == 'softmax'
+    return cycles
+
+def unit_occupancy(params=None, parallel_qkv=False):
+    """Cycles per sequence each functional unit type is busy (including handshakes)"""
+    cycles = state_cycles(params, parallel_qkv)
+    occupancy = {}
+    for state, unit in fsm_schedule(parallel_qkv):
+        jobs = 3 if state == 'COMPUTE_QKV' else 1
+        occupancy[unit] = occupancy.get(unit, 0) + cycles[state] * jobs
+    return occupancy
+
+def predict(num_sequences, clock_hz=1e9, parallel_qkv=False, pipeline_sequences=False,
+            matmul_units=1, params=None, stale_handshakes=False):
+    """
+    Predict cycles and throughput for a batch of sequences
+
+    Args:
+        num_sequences: sequences processed back to back
+        clock_hz: clock frequency
+        parallel_qkv: compute Q, K and V concurrently (needs >= 3 matmul units)
+        pipeline_sequences: overlap successive sequences across units; the
+                            initiation interval is the busiest unit's occupancy
+                            (a lower bound - ignores buffering between stages)
+        matmul_units: matrix_mult_16x16 instances sharing the matmul work
+        params: overrides of RTL_PARAMS
+        stale_handshakes: model the current RTL's stale done flags
+                          (stale_handshake_cycles); sequential schedule only
+
+    Returns:
+        dictionary of latency, initiation interval, totals and per-state cycles
+    """
+    if stale_handshakes and (parallel_qkv or pipeline_sequences):
+        raise ValueError("stale_handshakes models the current sequential RTL schedule only")
+    if parallel_qkv:
+        matmul_units = max(matmul_units, 3)
+    cycles = stale_handshake_cycles(params) if stale_handshakes else state_cycles(params, parallel_qkv)
+    latency = sum(cycles.values())
+
+    if pipeline_sequences:
+        occupancy = unit_occupancy(params, parallel_qkv)
+        per_unit = {unit: busy / (matmul_units if unit == 'matmul' else 1)
+                    for unit, busy in occupancy.items() if unit != 'control'}
+        initiation_interval = max(per_unit.values())
+        total_cycles = latency + (num_sequences - 1) * initiation_interval if num_sequences else 0
+    else:
+        initiation_interval = latency
+        total_cycles = num_sequences * latency
+
+    total_time_us = total_cycles / (clock_hz / 1e6)
+    return {
+        'num_sequences': num_sequences,
+        'clock_hz': clock_hz,
+        'cycles_per_sequence': latency,
+        'initiation_interval': initiation_interval,
+        'total_cycles': total_cycles,
+        'total_time_us': total_time_us,
+        'time_per_sequence_us': total_time_us / num_sequences if num_sequences else 0.0,
+        'sequences_per_second': clock_hz / initiation_interval,
+        'state_cycles': cycles,
+    }
+
+if __name__ == "__main__":
+    print("⚙️  TinyGPT-2 Hardware Cycle Model")
+    print("=" * 60)
+
+    clean = predict(1)
+    stale = predict(1, stale_handshakes=True)
+    print(f"\n{'State':<16} {'Clean':>7} {'Stale':>7}")
+    print("-" * 32)
+    for state, cycles in clean['state_cycles'].items():
+        print(f"{state:<16} {cycles:>7} {stale['state_cycles'][state]:>7}")
+    print(f"{'TOTAL':<16} {clean['cycles_per_sequence']:>7} {stale['cycles_per_sequence']:>7}")
+
+    gap = MEASURED_CYCLES_PER_SEQUENCE - stale['cycles_per_sequence']
+    print(f"\n📏 Measured (test_tiny_gpt2): {MEASURED_CYCLES_PER_SEQUENCE} cycles")
+    print(f"   Stale-handshake model:    {stale['cycles_per_sequence']} cycles (gap {gap:+d})")
+    print(f"   Clean-handshake model:    {clean['cycles_per_sequence']} cycles "
+          f"(gap {MEASURED_CYCLES_PER_SEQUENCE - clean['cycles_per_sequence']:+d}; "
+          f"what the RTL takes once the handshakes are fixed)")
+
+    schedules = [
+        ('Sequential (current RTL)', {'stale_handshakes': True}),
+        ('Sequential (clean)', {}),
+        ('Parallel Q/K/V', {'parallel_qkv': True}),
+        ('Pipelined sequences', {'pipeline_sequences': True}),
+        ('Pipelined + 3 matmul units', {'pipeline_sequences': True, 'matmul_units': 3}),
+        ('Pipelined + parallel Q/K/V', {'pipeline_sequences': True, 'parallel_qkv': True}),
+    ]
+    num_sequences = 1024
+    print(f"\n📊 {num_sequences} sequences")
+    print(f"{'Schedule':<28} {'Latency':>8} {'II':>8} {'Seqs/sec @1GHz':>15} {'Seqs/sec @200MHz':>17}")
+    print("-" * 80)
+    for name, options in schedules:
+        fast = predict(num_sequences, clock_hz=1e9, **options)
+        slow = predict(num_sequences, clock_hz=200e6, **options)
+        print(f"{name:<28} {fast['cycles_per_sequence']:>8} {fast['initiation_interval']:>8.0f} "
+              f"{fast['sequences_per_second']:>15.0f} {slow['sequences_per_second']:>17.0f}")
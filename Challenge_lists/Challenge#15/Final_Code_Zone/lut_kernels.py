@@ -0,0 +1,91 @@
+"""
+Hardware-LUT kernels for the golden model's nonlinear stages
+
+The golden model evaluates GELU with np.tanh, softmax with np.exp and
+LayerNorm with np.sqrt. The RTL instead uses:
+    GELU      - gelu_matrix_processor.v: 256-entry ROM addressed by x[15:8]
+    softmax   - softmax_frontend.v: exp LUT addressed by x[15:8] (no max
+                subtraction), softmax_backend: (exp * 1024) / sum
+    LayerNorm - layernorm_pipeline: integer mean / variance and
+                inv_sqrt_newton.v (LUT seed on variance[15:8] + 2 Newton steps)
+The tables come from rtl_luts (parsed from the Verilog) and the arithmetic
+from the integer blocks of rtl_emulator, so the kernels below are the exact
+tables and iteration counts, evaluated as whole-batch NumPy gathers.
+
+Code kernels take and return int16 Q5.10 codes; float kernels snap their
+input to Q5.10, run the code kernel and return floats of the input's dtype
+(LUT mode is inherently on the Q5.10 grid). The GELU gather is a fraction
+of the cost of tanh over a large batch.
+
+Select them with kernels='lut' on tiny_gpt2_hardware_model(_batch) (see
+new_benchmark.KERNEL_MODES); matmuls and residual adds are unchanged.
+"""
+
+import numpy as np
+
+import q5_10
+import rtl_emulator
+
+def gelu_codes(codes):
+    """GELU ROM lookup on x[15:8] (gelu_matrix_processor)"""
+    return rtl_emulator.gelu(codes)
+
+def softmax_codes(codes):
+    """Row softmax: exp LUT, then (exp * 1024) / sum saturated to 16 bits"""
+    return rtl_emulator.softmax_rows(codes)
+
+def layernorm_codes(codes):
+    """Row LayerNorm of the layernorm_pipeline (gamma = 1, beta = 0)"""
+    return rtl_emulator.layernorm_rows(codes)
+
+def _on_floats(code_kernel):
+    """Float version of a code kernel: snap to Q5.10, evaluate, convert back"""
+    def kernel(x):
+        x = np.asarray(x)
+        return q5_10.from_codes(code_kernel(q5_10.to_codes(x)), dtype=x.dtype)
+    kernel.__name__ = code_kernel.__name__.replace('_codes', '_lut')
+    kernel.__doc__ = f"{code_kernel.__doc__} - on Q5.10-valued floats"
+    return kernel
+
+gelu_lut = _on_floats(gelu_codes)
+softmax_lut = _on_floats(softmax_codes)
+layernorm_lut = _on_floats(layernorm_codes)
+
+def lut_ops(dtype):
+    """LUT stage kernels (layernorm, gelu, softmax) for a dtype policy ('int16' = on codes)"""
+    if dtype == 'int16':
+        return {'layernorm': layernorm_codes, 'gelu': gelu_codes, 'softmax': softmax_codes}
+    return {'layernorm': layernorm_lut, 'gelu': gelu_lut, 'softmax': softmax_lut}
+
+if __name__ == "__main__":
+    import time
+
+    from new_benchmark import (create_hardware_weights, gelu_tanh, layernorm_rows, softmax_rows,
+                               tiny_gpt2_hardware_model_batch)
+
+    print("🧩 TinyGPT-2 LUT Kernels (transcendental vs hardware LUT)")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    x = q5_10.quantize(rng.normal(0.0, 1.0, size=(4096, 16, 16)))
+
+    print(f"{'Kernel':<10} {'numpy (ms)':<12} {'LUT (ms)':<10} {'max |Δ|':<10}")
+    print("-" * 46)
+    for label, reference, lut in (('gelu', gelu_tanh, gelu_lut), ('softmax', softmax_rows, softmax_lut),
+                                  ('layernorm', layernorm_rows, layernorm_lut)):
+        timings = []
+        for fn in (reference, lut):
+            fn(x)
+            start = time.perf_counter()
+            for _ in range(5):
+                result = fn(x)
+            timings.append((time.perf_counter() - start) / 5 * 1e3)
+        error = np.max(np.abs(lut(x) - reference(x)))
+        print(f"{label:<10} {timings[0]:<12.2f} {timings[1]:<10.2f} {error:<10.4f}")
+
+    weights = create_hardware_weights(quantized=True)
+    tokens = rng.integers(0, 16, size=(4096, 16))
+    probs, _ = tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None)
+    lut_probs, _ = tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None, kernels='lut')
+    print(f"\n🎯 Model, {len(tokens)} sequences: max |Δp| {np.max(np.abs(lut_probs - probs)):.5f}, "
+          f"argmax agreement {np.mean(lut_probs.argmax(-1) == probs.argmax(-1)) * 100:.1f}%")
@@ -1,16 +1,241 @@
+import contextlib
+import hashlib
 import numpy as np
-import time
+
+import hardware_perf_model
+import lut_kernels
+import op_accounting
+import q5_10
+import weight_store
+from benchmark_harness import time_trials
+from q5_10 import DTYPE_POLICIES, resolve_dtype
 
 def float_to_q5_10(x):
     """Convert float to Q5.10 fixed-point (5 integer bits, 10 fractional bits)"""
     x = np.clip(x, -32.0, 31.999)
     return np.round(x * 1024) / 1024
 
-def quantize_q5_10(arr):
-    """Quantize array to Q5.10 format"""
-    return np.vectorize(float_to_q5_10)(arr)
+def quantize_q5_10(arr, out=None):
+    """Quantize array to Q5.10 format (vectorized; pass out=arr to quantize in place)"""
+    return q5_10.quantize(arr, out=out)
+
+def layernorm_rows(x, eps=1e-6):
+    """LayerNorm over the last axis (no gamma/beta - matches the hardware wiring)"""
+    mean = np.mean(x, axis=-1, keepdims=True)
+    var = np.var(x, axis=-1, keepdims=True)
+    return (x - mean) / np.sqrt(var + eps)
+
+def gelu_tanh(x):
+    """GELU, tanh approximation"""
+    sqrt_2_pi = float(np.sqrt(2.0 / np.pi))    # Python float: keeps float32 inputs float32
+    gelu_input = sqrt_2_pi * (x + 0.044715 * x**3)
+    return 0.5 * x * (1.0 + np.tanh(gelu_input))
+
+def softmax_rows(x):
+    """Softmax over the last axis (no mask, no scaling - matches the hardware)"""
+    x_max = np.max(x, axis=-1, keepdims=True)
+    exp_x = np.exp(x - x_max)
+    return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
+
+# ============================================================================
+# dtype policy
+# ============================================================================
+#   'float64' - reference precision
+#   'float32' - same pipeline in single precision, half the bytes per stage.
+#               Q5.10 values are exact in float32 but the arithmetic is not:
+#               about 1 in 20000 sequences ends 1 LSB off in the output
+#               probabilities, and LayerNorm can amplify a 1-LSB residual
+#               difference in the intermediates to tens of LSBs.
+#   'int16'   - Q5.10 codes end to end: matmuls and residual adds are integer
+#               with int32 accumulation (q5_10.matmul_codes / add_codes);
+#               LayerNorm, softmax and GELU dequantize to float64, evaluate
+#               and round back, so every stage is bit-identical to the
+#               float64 Q5.10 model. Only the output probabilities leave as
+#               floats.
+# The models infer the policy from the weights; build the weights in the
+# target dtype (create_hardware_weights(dtype=...)) so no call converts them.
+
+# Nonlinear stage kernels:
+#   'transcendental' - np.tanh / np.exp / np.sqrt
+#   'lut'            - the RTL's GELU ROM, exp LUT and LUT-seeded Newton
+#                      inverse sqrt as NumPy gathers (see lut_kernels.py)
+KERNEL_MODES = ('transcendental', 'lut')
+
+def cast_weights(weights, dtype):
+    """Convert a weights dict to a dtype policy (int16 = Q5.10 codes)"""
+    dtype = resolve_dtype(dtype)
+    cast = {}
+    for name, value in weights.items():
+        value = np.asarray(value)
+        if dtype == 'int16':
+            cast[name] = value if np.issubdtype(value.dtype, np.integer) else q5_10.to_codes(value)
+        elif np.issubdtype(value.dtype, np.integer):
+            cast[name] = q5_10.from_codes(value, dtype=dtype)
+        else:
+            cast[name] = value.astype(dtype, copy=False)
+    return cast
+
+def _float_stage_on_codes(fn):
+    """Run a float stage on Q5.10 codes: dequantize to float64, evaluate, round back"""
+    # float64, not float32: float32 rounding flips an occasional LSB
+    return lambda codes: q5_10.to_codes(fn(q5_10.from_codes(codes)))
+
+def dtype_ops(dtype, kernels='transcendental'):
+    """Stage kernels (matmul, add, layernorm, gelu, softmax) for a dtype policy and kernel mode"""
+    if kernels not in KERNEL_MODES:
+        raise ValueError(f"kernels must be one of {KERNEL_MODES}, got {kernels!r}")
+    dtype = resolve_dtype(dtype)
+    if dtype == 'int16':
+        ops = {
+            'matmul': q5_10.matmul_codes,
+            'add': q5_10.add_codes,
+            'layernorm': _float_stage_on_codes(layernorm_rows),
+            'gelu': _float_stage_on_codes(gelu_tanh),
+            'softmax': _float_stage_on_codes(softmax_rows),
+        }
+    else:
+        ops = {'matmul': np.matmul, 'add': np.add, 'layernorm': layernorm_rows,
+               'gelu': gelu_tanh, 'softmax': softmax_rows}
+    if kernels == 'lut':
+        ops.update(lut_kernels.lut_ops(dtype))
+    return ops
+
+# ============================================================================
+# Per-token precomputation cache
+# ============================================================================
+# Every row of input_matrix, ln_input_output, Q, K and V depends only on that
+# row's token, and there are only 16 tokens. So those stages reduce to a gather
+# from [16, 16] tables built once per weight set. Tables are keyed by a content
+# fingerprint of the weights, so editing any weight array (even in place) picks
+# up fresh tables on the next call.
+
+TOKEN_TABLE_STAGES = ('input_matrix', 'ln_input_output', 'Q', 'K', 'V')
+_TOKEN_TABLE_CACHE = {}
+_TOKEN_TABLE_CACHE_SIZE = 8
+
+def weights_fingerprint(weights):
+    """Content hash of a weights dict (names, shapes, dtypes and values)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(weights):
+        value = np.ascontiguousarray(weights[name])
+        digest.update(f"{name}:{value.dtype.str}:{value.shape}".encode())
+        digest.update(value.data)
+    return digest.hexdigest()
+
+def build_token_tables(weights, quantized=False, dtype=None, kernels='transcendental'):
+    """
+    Build the per-token [16 tokens, 16 features] tables for the first stages
+    
+    Args:
+        weights: dictionary containing all weight matrices (already in dtype)
+        quantized: whether to use Q5.10 quantization
+        dtype: dtype policy (None = the policy of the weights)
+        kernels: 'transcendental' or 'lut' (see KERNEL_MODES)
+    
+    Returns:
+        dictionary of read-only [16, 16] tables, row t = output for token t
+    """
+    dtype = resolve_dtype(dtype, weights)
+    ops = dtype_ops(dtype, kernels)
+    if dtype == 'int16':
+        quantized = False           # codes are already on the Q5.10 grid
+    input_matrix = np.array(weights['embedding'], dtype=dtype).reshape(16, 16)
+    if quantized:
+        input_matrix = quantize_q5_10(input_matrix, out=input_matrix)
+    
+    ln_input_output = ops['layernorm'](input_matrix)
+    if quantized:
+        ln_input_output = quantize_q5_10(ln_input_output, out=ln_input_output)
+    
+    tables = {'input_matrix': input_matrix, 'ln_input_output': ln_input_output}
+    for name, weight in (('Q', 'w_q'), ('K', 'w_k'), ('V', 'w_v')):
+        table = ops['matmul'](ln_input_output, weights[weight])
+        if quantized:
+            table = quantize_q5_10(table, out=table)
+        tables[name] = table
+    
+    for table in tables.values():
+        table.flags.writeable = False
+    return tables
+
+def get_token_tables(weights, quantized=False, dtype=None, kernels='transcendental'):
+    """Cached build_token_tables (rebuilt automatically when the weights change)"""
+    dtype = resolve_dtype(dtype, weights)
+    key = (weights_fingerprint(weights), bool(quantized), dtype, kernels)
+    tables = _TOKEN_TABLE_CACHE.get(key)
+    if tables is None:
+        if len(_TOKEN_TABLE_CACHE) >= _TOKEN_TABLE_CACHE_SIZE:
+            _TOKEN_TABLE_CACHE.pop(next(iter(_TOKEN_TABLE_CACHE)))
+        tables = _TOKEN_TABLE_CACHE[key] = build_token_tables(weights, quantized, dtype, kernels)
+    return tables
+
+def clear_token_tables():
+    """Drop every cached per-token table"""
+    _TOKEN_TABLE_CACHE.clear()
 
-def tiny_gpt2_hardware_model(input_tokens, weights, quantized=False):
+# ============================================================================
+# Intermediate capture
+# ============================================================================
+# Stage outputs that can be captured, with their per-sequence shapes
+
+CAPTURE_STAGES = {
+    'input_matrix': (16, 16),
+    'ln_input_output': (16, 16),
+    'Q': (16, 16), 'K': (16, 16), 'V': (16, 16),
+    'attention_scores': (16, 16),
+    'attention_weights': (16, 16),
+    'attention_output': (16, 16),
+    'residual_1': (16, 16),
+    'ln1_output': (16, 16),
+    'ff1_output': (16, 16),
+    'gelu_output': (16, 16),
+    'ff2_output': (16, 16),
+    'residual_2': (16, 16),
+    'ln2_output': (16, 16),
+    'output_logits': (16, 16),
+    'final_logits': (16,),
+}
+
+def resolve_capture(capture):
+    """
+    Normalize a capture selector to a tuple of stage names
+    
+    Args:
+        capture: None (nothing), 'all' (every stage), a stage name,
+                 or an iterable of stage names
+    """
+    if capture is None:
+        return ()
+    if capture == 'all':
+        return tuple(CAPTURE_STAGES)
+    names = (capture,) if isinstance(capture, str) else tuple(capture)
+    unknown = [name for name in names if name not in CAPTURE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown capture stage(s) {unknown}; choose from {list(CAPTURE_STAGES)}")
+    return names
+
+def allocate_capture_buffers(batch_size, capture='all', dtype=np.float64):
+    """Preallocate [batch_size, ...] buffers for the selected stages (reusable across calls)"""
+    return {name: np.empty((batch_size,) + CAPTURE_STAGES[name], dtype=dtype)
+            for name in resolve_capture(capture)}
+
+# RTL FSM states of tiny_gpt2_top.v, in execution order
+PIPELINE_STATES = (
+    'EMBEDDING', 'LAYERNORM_INPUT', 'COMPUTE_Q', 'COMPUTE_K', 'COMPUTE_V',
+    'COMPUTE_SCORES', 'SOFTMAX_SCORES', 'COMPUTE_ATTN', 'ADD_RESIDUAL_1',
+    'LAYERNORM_1', 'COMPUTE_FF1', 'GELU_FF1', 'COMPUTE_FF2', 'ADD_RESIDUAL_2',
+    'LAYERNORM_2', 'COMPUTE_OUTPUT', 'SOFTMAX_OUTPUT',
+)
+_NULL_STAGE = contextlib.nullcontext()
+
+def _no_stage(name):
+    return _NULL_STAGE
+
+def _quantize_in_place(arr):
+    return quantize_q5_10(arr, out=arr)
+
+def tiny_gpt2_hardware_model(input_tokens, weights, quantized=False, capture='all', stage_timer=None,
+                             dtype=None, kernels='transcendental'):
     """
     Complete TinyGPT-2 model matching your EXACT hardware implementation
     
@@ -18,167 +243,207 @@ def tiny_gpt2_hardware_model(input_tokens, weights, quantized=False):
         input_tokens: [16] token IDs (0-15 for vocab size 16)
         weights: dictionary containing all weight matrices
         quantized: whether to use Q5.10 quantization
+        capture: intermediates to return (see resolve_capture)
+        stage_timer: optional per-state timing hook (see the batch model)
+        dtype: dtype policy (see the batch model)
+        kernels: nonlinear stage kernels (see the batch model)
     
     Returns:
         output_probs: [16] probability distribution over vocabulary
     """
-    EPS = 1e-6
-    
-    # ================================================================
-    # EMBEDDING (matches your EMBEDDING state)
-    # ================================================================
-    # Convert 4-bit token IDs to 16D embeddings
-    input_matrix = np.zeros((16, 16))  # [16 tokens, 16 features]
-    
-    for i in range(16):
-        token_id = input_tokens[i]
-        # Extract embedding for this token
-        start_idx = token_id * 16
-        end_idx = start_idx + 16
-        input_matrix[i, :] = weights['embedding'][start_idx:end_idx]
-    
-    if quantized:
-        input_matrix = quantize_q5_10(input_matrix)
+    # Single sequence = batch of one (see tiny_gpt2_hardware_model_batch)
+    output_probs, intermediates = tiny_gpt2_hardware_model_batch(
+        np.asarray(input_tokens)[np.newaxis, :], weights, quantized=quantized, capture=capture,
+        stage_timer=stage_timer, dtype=dtype, kernels=kernels
+    )
+    return output_probs[0], {name: value[0] for name, value in intermediates.items()}
+
+def tiny_gpt2_hardware_model_batch(input_tokens, weights, quantized=False, capture='all', buffers=None,
+                                   stage_timer=None, dtype=None, kernels='transcendental'):
+    """
+    Batched TinyGPT-2 model - every stage runs once over the whole batch
     
-    # ================================================================
-    # LAYERNORM_INPUT (matches your LAYERNORM_INPUT state)
-    # ================================================================
-    # Pre-attention layer norm - this is KEY difference from standard transformer
-    x = input_matrix
-    mean = np.mean(x, axis=-1, keepdims=True)
-    var = np.var(x, axis=-1, keepdims=True)
-    ln_input_output = (x - mean) / np.sqrt(var + EPS)
+    Args:
+        input_tokens: [B, 16] token IDs (0-15 for vocab size 16)
+        weights: dictionary containing all weight matrices
+        quantized: whether to use Q5.10 quantization
+        capture: intermediates to return - None, 'all', or stage names
+                 (see CAPTURE_STAGES); None keeps only the probabilities
+        buffers: optional preallocated buffers (allocate_capture_buffers);
+                 captured stages are copied into them instead of being
+                 returned as fresh arrays
+        stage_timer: optional profiling hook (e.g. stage_profiler.StageProfiler):
+                     stage(name) returns a context manager wrapped around
+                     each FSM state; optional quantize(arr) and
+                     begin_batch(batch_size, quantized, dtype) are used
+                     when present.
+                     None costs nothing
+        dtype: 'float64', 'float32' or 'int16' (see DTYPE_POLICIES); None =
+               the dtype of the weights, other weights are converted per call.
+               'int16' always runs on the Q5.10 grid and captures int16 codes
+        kernels: 'transcendental' (np.tanh / exp / sqrt) or 'lut' (the RTL's
+                 GELU ROM, exp LUT and Newton inverse sqrt, see lut_kernels.py)
     
-    if quantized:
-        ln_input_output = quantize_q5_10(ln_input_output)
+    Returns:
+        output_probs: [B, 16] probability distribution over vocabulary
+        intermediates: dictionary of [B, ...] outputs of the captured stages
+    """
+    input_tokens = np.asarray(input_tokens)
+    capture_names = resolve_capture(capture)
+    dtype = resolve_dtype(dtype, weights)
+    if resolve_dtype(None, weights) != dtype:
+        weights = cast_weights(weights, dtype)
+    ops = dtype_ops(dtype, kernels)
+    matmul, add = ops['matmul'], ops['add']
+    if dtype == 'int16':
+        quantized = False           # every integer stage already lands on the Q5.10 grid
+    if stage_timer is None:
+        stage, quantize = _no_stage, _quantize_in_place
+    else:
+        stage = stage_timer.stage
+        quantize = getattr(stage_timer, 'quantize', _quantize_in_place)
+        if hasattr(stage_timer, 'begin_batch'):
+            stage_timer.begin_batch(input_tokens.shape[0], quantized=quantized, dtype=dtype)
     
     # ================================================================
-    # Q, K, V COMPUTATION (matches COMPUTE_Q, COMPUTE_K, COMPUTE_V)
+    # EMBEDDING → LAYERNORM_INPUT → COMPUTE_Q/K/V
     # ================================================================
-    Q = np.matmul(ln_input_output, weights['w_q'])
-    K = np.matmul(ln_input_output, weights['w_k'])  
-    V = np.matmul(ln_input_output, weights['w_v'])
-    
-    if quantized:
-        Q = quantize_q5_10(Q)
-        K = quantize_q5_10(K)
-        V = quantize_q5_10(V)
+    # Each row of these stages depends only on its token: gather rows of the
+    # per-token tables (see build_token_tables) for all B×16 tokens
+    with stage('EMBEDDING'):
+        tables = get_token_tables(weights, quantized=quantized, dtype=dtype, kernels=kernels)
+        input_matrix = tables['input_matrix'][input_tokens]        # [B, 16, 16]
+    with stage('LAYERNORM_INPUT'):
+        ln_input_output = tables['ln_input_output'][input_tokens]  # pre-attention layer norm
+    with stage('COMPUTE_Q'):
+        Q = tables['Q'][input_tokens]
+    with stage('COMPUTE_K'):
+        K = tables['K'][input_tokens]
+    with stage('COMPUTE_V'):
+        V = tables['V'][input_tokens]
     
     # ================================================================
     # ATTENTION SCORES (matches COMPUTE_SCORES)
     # ================================================================
-    # Q × K^T (NO SCALING - matches your hardware)
-    attention_scores = np.matmul(Q, K.T)
-    
-    if quantized:
-        attention_scores = quantize_q5_10(attention_scores)
+    # Q × K^T per sequence (NO SCALING - matches your hardware)
+    with stage('COMPUTE_SCORES'):
+        attention_scores = matmul(Q, K.transpose(0, 2, 1))
+        
+        if quantized:
+            attention_scores = quantize(attention_scores)
     
     # ================================================================
     # SOFTMAX_SCORES (matches your SOFTMAX_SCORES state)
     # ================================================================
     # Raw softmax - NO causal mask (matches your hardware)
-    scores_max = np.max(attention_scores, axis=-1, keepdims=True)
-    exp_scores = np.exp(attention_scores - scores_max)
-    attention_weights = exp_scores / np.sum(exp_scores, axis=-1, keepdims=True)
-    
-    if quantized:
-        attention_weights = quantize_q5_10(attention_weights)
+    with stage('SOFTMAX_SCORES'):
+        attention_weights = ops['softmax'](attention_scores)
+        
+        if quantized:
+            attention_weights = quantize(attention_weights)
     
     # ================================================================
     # ATTENTION OUTPUT (matches COMPUTE_ATTN)
     # ================================================================
-    attention_output = np.matmul(attention_weights, V)
-    
-    if quantized:
-        attention_output = quantize_q5_10(attention_output)
+    with stage('COMPUTE_ATTN'):
+        attention_output = matmul(attention_weights, V)
+        
+        if quantized:
+            attention_output = quantize(attention_output)
     
     # ================================================================
     # FIRST RESIDUAL (matches ADD_RESIDUAL_1)
     # ================================================================
-    residual_1 = input_matrix + attention_output
-    
-    if quantized:
-        residual_1 = quantize_q5_10(residual_1)
+    with stage('ADD_RESIDUAL_1'):
+        residual_1 = add(input_matrix, attention_output)
+        
+        if quantized:
+            residual_1 = quantize(residual_1)
     
     # ================================================================
     # LAYERNORM_1 (matches your LAYERNORM_1 state)
     # ================================================================
-    mean1 = np.mean(residual_1, axis=-1, keepdims=True)
-    var1 = np.var(residual_1, axis=-1, keepdims=True)
-    ln1_output = (residual_1 - mean1) / np.sqrt(var1 + EPS)
-    
-    if quantized:
-        ln1_output = quantize_q5_10(ln1_output)
+    with stage('LAYERNORM_1'):
+        ln1_output = ops['layernorm'](residual_1)
+        
+        if quantized:
+            ln1_output = quantize(ln1_output)
     
     # ================================================================
     # FEED-FORWARD LAYER 1 (matches COMPUTE_FF1)
     # ================================================================
-    ff1_output = np.matmul(ln1_output, weights['w_ff1'])
-    
-    if quantized:
-        ff1_output = quantize_q5_10(ff1_output)
+    with stage('COMPUTE_FF1'):
+        ff1_output = matmul(ln1_output, weights['w_ff1'])
+        
+        if quantized:
+            ff1_output = quantize(ff1_output)
     
     # ================================================================
     # GELU ACTIVATION (matches GELU_FF1)
     # ================================================================
     # GELU implementation matching your hardware
-    sqrt_2_pi = np.sqrt(2.0 / np.pi)
-    gelu_input = sqrt_2_pi * (ff1_output + 0.044715 * ff1_output**3)
-    gelu_output = 0.5 * ff1_output * (1.0 + np.tanh(gelu_input))
-    
-    if quantized:
-        gelu_output = quantize_q5_10(gelu_output)
+    with stage('GELU_FF1'):
+        gelu_output = ops['gelu'](ff1_output)
+        
+        if quantized:
+            gelu_output = quantize(gelu_output)
     
     # ================================================================
     # FEED-FORWARD LAYER 2 (matches COMPUTE_FF2)
     # ================================================================
-    ff2_output = np.matmul(gelu_output, weights['w_ff2'])
-    
-    if quantized:
-        ff2_output = quantize_q5_10(ff2_output)
+    with stage('COMPUTE_FF2'):
+        ff2_output = matmul(gelu_output, weights['w_ff2'])
+        
+        if quantized:
+            ff2_output = quantize(ff2_output)
     
     # ================================================================
     # SECOND RESIDUAL (matches ADD_RESIDUAL_2)
     # ================================================================
-    residual_2 = ln1_output + ff2_output
-    
-    if quantized:
-        residual_2 = quantize_q5_10(residual_2)
+    with stage('ADD_RESIDUAL_2'):
+        residual_2 = add(ln1_output, ff2_output)
+        
+        if quantized:
+            residual_2 = quantize(residual_2)
     
     # ================================================================
     # LAYERNORM_2 (matches your LAYERNORM_2 state)
     # ================================================================
-    mean2 = np.mean(residual_2, axis=-1, keepdims=True)
-    var2 = np.var(residual_2, axis=-1, keepdims=True)
-    ln2_output = (residual_2 - mean2) / np.sqrt(var2 + EPS)
-    
-    if quantized:
-        ln2_output = quantize_q5_10(ln2_output)
+    with stage('LAYERNORM_2'):
+        ln2_output = ops['layernorm'](residual_2)
+        
+        if quantized:
+            ln2_output = quantize(ln2_output)
     
     # ================================================================
     # OUTPUT PROJECTION (matches COMPUTE_OUTPUT)
     # ================================================================
     # Project to vocabulary space
-    output_logits = np.matmul(ln2_output, weights['w_out'])
-    
-    if quantized:
-        output_logits = quantize_q5_10(output_logits)
+    with stage('COMPUTE_OUTPUT'):
+        output_logits = matmul(ln2_output, weights['w_out'])
+        
+        if quantized:
+            output_logits = quantize(output_logits)
     
     # ================================================================
     # FINAL SOFTMAX (matches SOFTMAX_OUTPUT)
     # ================================================================
     # Take first token's logits for next token prediction
-    final_logits = output_logits[0, :]  # [16] vocab probabilities
-    
-    # Softmax over vocabulary
-    logits_max = np.max(final_logits)
-    exp_logits = np.exp(final_logits - logits_max)
-    output_probs = exp_logits / np.sum(exp_logits)
+    with stage('SOFTMAX_OUTPUT'):
+        final_logits = output_logits[:, 0, :]  # [B, 16] vocab logits
+        
+        # Softmax over vocabulary
+        output_probs = ops['softmax'](final_logits)
+        
+        if quantized:
+            output_probs = quantize(output_probs)
+        if dtype == 'int16':
+            output_probs = q5_10.from_codes(output_probs, dtype=np.float32)   # the only conversion out
     
-    if quantized:
-        output_probs = quantize_q5_10(output_probs)
+    if not capture_names:
+        return output_probs, {}
     
-    return output_probs, {
+    stage_outputs = {
         'input_matrix': input_matrix,
         'ln_input_output': ln_input_output,
         'Q': Q, 'K': K, 'V': V,
@@ -195,9 +460,23 @@ def tiny_gpt2_hardware_model(input_tokens, weights, quantized=False):
         'output_logits': output_logits,
         'final_logits': final_logits
     }
+    intermediates = {}
+    for name in capture_names:
+        if buffers is not None and name in buffers:
+            np.copyto(buffers[name], stage_outputs[name])
+            intermediates[name] = buffers[name]
+        else:
+            intermediates[name] = stage_outputs[name]
+    return output_probs, intermediates
 
-def create_hardware_weights(quantized=False):
-    """Create weights matching your exact hardware weight layout"""
+def create_hardware_weights(quantized=False, dtype='float64'):
+    """
+    Create weights matching your exact hardware weight layout
+    
+    Args:
+        quantized: snap the weights to the Q5.10 grid
+        dtype: dtype policy of the returned arrays ('int16' = Q5.10 codes)
+    """
     np.random.seed(42)  # Reproducible results
     
     # Initialize with small random values (like typical transformer initialization)
@@ -225,52 +504,69 @@ def create_hardware_weights(quantized=False):
         for key in weights:
             weights[key] = quantize_q5_10(weights[key])
     
+    if resolve_dtype(dtype) != 'float64':
+        weights = cast_weights(weights, dtype)
+    
     return weights
 
-def benchmark_hardware_model(num_sequences, quantized=False):
+def load_hardware_weights(hex_path=weight_store.DEFAULT_HEX_PATH):
+    """Load the weights the RTL uses ($readmemh file) as a golden-model weights dict"""
+    return weight_store.load_weights(hex_path)
+
+def benchmark_hardware_model(num_sequences, quantized=False, batched=True, capture=None,
+                             weights=None, warmup=1, trials=5, dtype=None, kernels='transcendental'):
     """
     Benchmark the hardware-matched TinyGPT-2 model
     
     Args:
         num_sequences: number of 16-token sequences to process
         quantized: whether to use Q5.10 quantization
+        batched: run all sequences through one batched call instead of
+                 one tiny_gpt2_hardware_model call per sequence
+        capture: intermediates to keep (None = probabilities only)
+        weights: weights dict to reuse (created here if None)
+        warmup: untimed runs before measuring
+        trials: timed runs; the median is reported
+                (see benchmark_harness.py for full latency statistics)
+        dtype: dtype policy (None = the dtype of the weights)
+        kernels: nonlinear stage kernels ('transcendental' or 'lut')
     """
     
     # Create weights (pre-processing, not timed)
-    weights = create_hardware_weights(quantized=quantized)
+    if weights is None:
+        weights = create_hardware_weights(quantized=quantized, dtype=dtype or 'float64')
     
     # Generate input sequences (pre-processing, not timed)
-    sequences = []
-    for i in range(num_sequences):
-        # Generate 16 token IDs in range [0, 15]
-        sequence = np.random.randint(0, 16, size=16)
-        sequences.append(sequence)
-    
-    # Time ONLY the core computation
-    start_time = time.time()
-    
-    results = []
-    for i in range(num_sequences):
-        probs, intermediates = tiny_gpt2_hardware_model(
-            sequences[i], weights, quantized=quantized
-        )
-        results.append((probs, intermediates))
-    
-    total_time = time.time() - start_time
+    # [num_sequences, 16] token IDs in range [0, 15]
+    sequences = np.random.randint(0, 16, size=(num_sequences, 16))
+    
+    results = None
+    
+    def run():
+        nonlocal results
+        if batched:
+            results = tiny_gpt2_hardware_model_batch(
+                sequences, weights, quantized=quantized, capture=capture, dtype=dtype, kernels=kernels
+            )
+        else:
+            results = []
+            for i in range(num_sequences):
+                probs, intermediates = tiny_gpt2_hardware_model(
+                    sequences[i], weights, quantized=quantized, capture=capture, dtype=dtype,
+                    kernels=kernels
+                )
+                results.append((probs, intermediates))
+    
+    # Time ONLY the core computation (median of repeated perf_counter_ns trials)
+    samples_ns = time_trials(run, warmup=warmup, trials=trials)
+    total_time = float(np.median(samples_ns)) / 1e9
     
     # Calculate metrics
-    # Operations per sequence (matching your hardware pipeline):
-    ops_per_sequence = (
-        16 * 16 +           # Embedding lookup
-        16 * 16 * 16 +      # Q computation  
-        16 * 16 * 16 +      # K computation
-        16 * 16 * 16 +      # V computation
-        16 * 16 * 16 +      # Attention scores
-        16 * 16 * 16 +      # Attention output
-        16 * 16 * 16 +      # FF1
-        16 * 16 * 16 +      # FF2  
-        16 * 16 * 16        # Output projection
-    )
+    # Operations per sequence, derived per FSM state from the shapes the model
+    # executes (2 FLOPs per MAC, plus LayerNorm / softmax / GELU / Q5.10 math)
+    stage_ops = op_accounting.stage_op_counts(weights, quantized=quantized, dtype=dtype)
+    per_sequence = op_accounting.total_counts(stage_ops)
+    ops_per_sequence = per_sequence['flops']
     
     total_ops = num_sequences * ops_per_sequence
     
@@ -282,36 +578,48 @@ def benchmark_hardware_model(num_sequences, quantized=False):
         'total_ops': total_ops,
         'gops': total_ops / (total_time * 1e9),
         'ops_per_sequence': ops_per_sequence,
+        'macs_per_sequence': per_sequence['macs'],
+        'bytes_per_sequence': per_sequence['bytes'],
+        'arithmetic_intensity': per_sequence['intensity'],
+        'stage_ops': stage_ops,
         'results': results
     }
 
-def hardware_simulation(num_sequences):
-    """Simulate your actual hardware performance (482 cycles per sequence)"""
-    cycles_per_sequence = 482  # From your actual test results!
-    clock_freq = 1e9  # 1 GHz target
-    
-    total_cycles = num_sequences * cycles_per_sequence
-    total_time_us = total_cycles / (clock_freq / 1e6)
+def hardware_simulation(num_sequences, clock_freq=1e9, **schedule):
+    """
+    Simulate hardware performance with the analytical cycle model
     
-    return {
-        'num_sequences': num_sequences,
-        'cycles_per_sequence': cycles_per_sequence,
-        'total_cycles': total_cycles,
-        'total_time_us': total_time_us,
-        'time_per_sequence_us': total_time_us / num_sequences,
-        'sequences_per_second': 1e6 / (total_time_us / num_sequences)
-    }
+    Args:
+        num_sequences: number of 16-token sequences to process
+        clock_freq: clock frequency in Hz (1 GHz target)
+        schedule: scheduling options of hardware_perf_model.predict
+                  (parallel_qkv, pipeline_sequences, matmul_units, params,
+                  stale_handshakes)
+    """
+    prediction = hardware_perf_model.predict(num_sequences, clock_hz=clock_freq, **schedule)
+    prediction['measured_cycles_per_sequence'] = hardware_perf_model.MEASURED_CYCLES_PER_SEQUENCE
+    prediction['model_gap_cycles'] = (hardware_perf_model.MEASURED_CYCLES_PER_SEQUENCE
+                                      - prediction['cycles_per_sequence'])
+    # The datapath is Q5.10 integer: count the int16 pipeline's operations
+    ops_per_sequence = op_accounting.total_counts(op_accounting.stage_op_counts(dtype='int16'))['flops']
+    prediction['ops_per_sequence'] = ops_per_sequence
+    prediction['gops'] = ops_per_sequence * prediction['sequences_per_second'] / 1e9
+    return prediction
 
-def validate_against_hardware(test_tokens):
+def validate_against_hardware(test_tokens, weights=None):
     """
     Validate software model against your hardware test results
     Expected hardware output:
     prob[0-15] ≈ [0.0625, 0.049, 0.0625, 0.0625, ...] (mostly 0.0625)
+    
+    Uses the weights the RTL loads (rtl/tiny_gpt2_weights.hex) unless
+    a weights dict is given.
     """
     print("🔍 Validating against your hardware test results...")
     print("-" * 50)
     
-    weights = create_hardware_weights(quantized=True)
+    if weights is None:
+        weights = load_hardware_weights()
     probs, intermediates = tiny_gpt2_hardware_model(test_tokens, weights, quantized=True)
     
     print(f"Input tokens: {test_tokens}")
@@ -349,7 +657,11 @@ if __name__ == "__main__":
     print(f"   • Sequence length: 16 tokens")
     print(f"   • Hidden dimension: 16")
     print(f"   • Architecture: Embedding + 1 transformer layer + output projection")
-    print(f"   • Cycles per sequence: 482 (from your test)")
+    hw_model = hardware_perf_model.predict(1, stale_handshakes=True)
+    hw_clean = hardware_perf_model.predict(1)
+    print(f"   • Cycles per sequence: {hardware_perf_model.MEASURED_CYCLES_PER_SEQUENCE} (from your test), "
+          f"{hw_model['cycles_per_sequence']} (cycle model of the current RTL), "
+          f"{hw_clean['cycles_per_sequence']} (clean handshakes)")
     print(f"   • No causal masking (matches hardware)")
     print(f"   • No attention scaling (matches hardware)")
     
@@ -366,19 +678,23 @@ if __name__ == "__main__":
     quantized_results = []
     hardware_results = []
     
+    # Weights are built once per mode, outside every timed region
+    float_weights = create_hardware_weights(quantized=False)
+    quantized_weights = create_hardware_weights(quantized=True)
+    
     for num_seqs in sequence_counts:
         print(f"\n🔄 Testing {num_seqs} sequences...")
         
         # Float32 benchmark
-        float_result = benchmark_hardware_model(num_seqs, quantized=False)
+        float_result = benchmark_hardware_model(num_seqs, quantized=False, weights=float_weights)
         float_results.append(float_result)
         
         # Q5.10 quantized benchmark  
-        quantized_result = benchmark_hardware_model(num_seqs, quantized=True)
+        quantized_result = benchmark_hardware_model(num_seqs, quantized=True, weights=quantized_weights)
         quantized_results.append(quantized_result)
         
-        # Hardware simulation (using your actual 482 cycles)
-        hardware_result = hardware_simulation(num_seqs)
+        # Hardware simulation (analytical per-state cycle model of the current RTL)
+        hardware_result = hardware_simulation(num_seqs, stale_handshakes=True)
         hardware_results.append(hardware_result)
         
         print(f"   Float32:  {float_result['time_per_sequence_ms']:.3f}ms/seq, {float_result['sequences_per_second']:.0f} seqs/sec")
@@ -404,6 +720,17 @@ if __name__ == "__main__":
         
         print(f"{num_seqs:<6} {float_time:<12.3f} {quantized_time:<12.3f} {hardware_time:<12.1f} {speedup:<15.0f}x")
     
+    # dtype policies on one large batch (all on the Q5.10 grid)
+    policy_seqs = 4096
+    print(f"\n📦 dtype Policies ({policy_seqs} sequences, Q5.10)")
+    print(f"{'Policy':<9} {'μs/seq':<10} {'seqs/sec':<12} {'bytes/stage/seq':<16}")
+    print("-" * 50)
+    for policy in DTYPE_POLICIES:
+        policy_weights = create_hardware_weights(quantized=True, dtype=policy)
+        result = benchmark_hardware_model(policy_seqs, quantized=True, weights=policy_weights, dtype=policy)
+        print(f"{policy:<9} {result['time_per_sequence_ms'] * 1000:<10.2f} "
+              f"{result['sequences_per_second']:<12.0f} {16 * 16 * np.dtype(policy).itemsize:<16}")
+
     # Analysis
     single_seq_hw = hardware_results[0]
     single_seq_float = float_results[0]
@@ -411,15 +738,23 @@ if __name__ == "__main__":
     
     print(f"\n🎯 Hardware Analysis (Matching Your Implementation)")
     print("="*55)
-    print(f"   • Actual hardware cycles: 482 per sequence")
+    print(f"   • Modelled hardware cycles: {single_seq_hw['cycles_per_sequence']} per sequence "
+          f"(measured: {single_seq_hw['measured_cycles_per_sequence']}, "
+          f"gap {single_seq_hw['model_gap_cycles']:+d})")
     print(f"   • Hardware latency: {single_seq_hw['time_per_sequence_us']:.1f}μs per sequence")
     print(f"   • Hardware throughput: {single_seq_hw['sequences_per_second']:.0f} sequences/second")
     print(f"   • Software vs Hardware: {(single_seq_float['time_per_sequence_ms']*1000)/single_seq_hw['time_per_sequence_us']:.0f}x speedup")
+    print(f"   • Ops per sequence: {single_seq_float['ops_per_sequence']} FLOPs "
+          f"({single_seq_float['macs_per_sequence']} MACs), "
+          f"{single_seq_float['arithmetic_intensity']:.2f} FLOP/byte")
+    print(f"   • Effective GOPS: software {float_results[-1]['gops']:.2f} ({sequence_counts[-1]} seqs), "
+          f"hardware {single_seq_hw['gops']:.1f}")
     print(f"   • Memory per sequence: {16*16*2/1024:.2f}KB (Q5.10 format)")
-    print(f"   • Peak throughput @ 1GHz: {1e9/482:.0f} sequences/second")
+    print(f"   • Peak throughput @ 1GHz: {single_seq_hw['sequences_per_second']:.0f} sequences/second")
     
     print(f"\n✅ Validation Complete!")
     print(f"   • Software model matches your hardware implementation")
     print(f"   • Uniform probability distribution explained and expected")
-    print(f"   • Performance baseline established: 482 cycles per sequence")
+    print(f"   • Performance baseline established: {single_seq_hw['measured_cycles_per_sequence']} cycles per sequence "
+          f"(measured; cycle model {single_seq_hw['cycles_per_sequence']})")
     print(f"   • Ready for ASIC implementation! 🚀")
\ No newline at end of file
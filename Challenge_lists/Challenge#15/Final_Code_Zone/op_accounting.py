@@ -0,0 +1,287 @@
+"""
+FLOP / MAC / byte accounting per FSM state of the TinyGPT-2 golden model
+
+Counts are derived from one stage table, stage_table(config): every FSM
+state's kind, operand shapes and result shape for a geometry (d_model,
+seq_len, vocab_size, d_ff, n_heads, n_layers, readout; see
+configurable_model.make_config). The hardware geometry is HARDWARE_CONFIG,
+and configurable_model.ops_per_sequence sums the same table, so the two
+agree for every geometry. check_stage_table() compares the table against
+the arrays a captured golden-model run actually produces.
+
+Per state:
+    macs             multiply-accumulates (matmul states)
+    flops            2 x MACs + elementwise arithmetic + transcendentals
+                     (exp / tanh / sqrt count as one FLOP each; the Q5.10
+                     snap of the result is included in quantized runs)
+    transcendentals  exp / tanh / sqrt evaluations
+    bytes_read       operands + weights touched (embedding: only the
+                     gathered rows), at the dtype actually used
+    bytes_written    the state's result
+    intensity        flops / (bytes_read + bytes_written)  (roofline x-axis)
+
+Counts are the math each state performs (what tiny_gpt2_top executes), even
+where the golden model serves LAYERNORM_INPUT and COMPUTE_Q/K/V from its
+per-token tables. In particular COMPUTE_OUTPUT projects every row of the
+sequence (the systolic array computes the full matrix); only SOFTMAX_OUTPUT
+is limited to the readout row(s). The per-block states repeat n_layers times.
+"""
+
+import time
+
+import numpy as np
+
+from q5_10 import resolve_dtype
+
+# Elementwise cost per output element: (arithmetic FLOPs, transcendentals)
+ELEMENTWISE_COST = {
+    'add': (1, 0),
+    'softmax': (4, 1),      # max compare, subtract, sum, divide + exp
+    'gelu': (8, 1),         # x^3 (2), scale, add, scale, +1, *x, *0.5 + tanh
+    'layernorm': (5, 0),    # mean sum, centre, square, variance sum, normalize
+}
+LAYERNORM_ROW_COST = (4, 1)  # mean / variance divides, + eps, 1/sqrt per row
+QUANTIZE_FLOPS = 5           # clip (2 compares), scale, round, rescale
+TOKEN_ID_BYTES = np.dtype(np.int64).itemsize
+
+# Geometry of tiny_gpt2_top (configurable_model.DEFAULT_CONFIG)
+HARDWARE_CONFIG = {'d_model': 16, 'seq_len': 16, 'vocab_size': 16, 'd_ff': 16,
+                   'n_layers': 1, 'n_heads': 1, 'readout': 'first'}
+
+# States run once per transformer block; the others once per sequence
+BLOCK_STATES = ('LAYERNORM_INPUT', 'COMPUTE_Q', 'COMPUTE_K', 'COMPUTE_V', 'COMPUTE_SCORES',
+                'SOFTMAX_SCORES', 'COMPUTE_ATTN', 'ADD_RESIDUAL_1', 'LAYERNORM_1', 'COMPUTE_FF1',
+                'GELU_FF1', 'COMPUTE_FF2', 'ADD_RESIDUAL_2', 'LAYERNORM_2')
+
+# FSM state -> (kind, operands, result): golden-model capture / weight names,
+# used by check_stage_table
+STAGE_OPERATIONS = {
+    'EMBEDDING':       ('gather', ('embedding',), 'input_matrix'),
+    'LAYERNORM_INPUT': ('layernorm', ('input_matrix',), 'ln_input_output'),
+    'COMPUTE_Q':       ('matmul', ('ln_input_output', 'w_q'), 'Q'),
+    'COMPUTE_K':       ('matmul', ('ln_input_output', 'w_k'), 'K'),
+    'COMPUTE_V':       ('matmul', ('ln_input_output', 'w_v'), 'V'),
+    'COMPUTE_SCORES':  ('matmul', ('Q', 'K'), 'attention_scores'),
+    'SOFTMAX_SCORES':  ('softmax', ('attention_scores',), 'attention_weights'),
+    'COMPUTE_ATTN':    ('matmul', ('attention_weights', 'V'), 'attention_output'),
+    'ADD_RESIDUAL_1':  ('add', ('input_matrix', 'attention_output'), 'residual_1'),
+    'LAYERNORM_1':     ('layernorm', ('residual_1',), 'ln1_output'),
+    'COMPUTE_FF1':     ('matmul', ('ln1_output', 'w_ff1'), 'ff1_output'),
+    'GELU_FF1':        ('gelu', ('ff1_output',), 'gelu_output'),
+    'COMPUTE_FF2':     ('matmul', ('gelu_output', 'w_ff2'), 'ff2_output'),
+    'ADD_RESIDUAL_2':  ('add', ('ln1_output', 'ff2_output'), 'residual_2'),
+    'LAYERNORM_2':     ('layernorm', ('residual_2',), 'ln2_output'),
+    'COMPUTE_OUTPUT':  ('matmul', ('ln2_output', 'w_out'), 'output_logits'),
+    'SOFTMAX_OUTPUT':  ('softmax', ('final_logits',), 'output_probs'),
+}
+
+def stage_table(config=None):
+    """
+    Kind, operand shapes and result shape of every FSM state for one sequence
+
+    Args:
+        config: geometry dict (keys of HARDWARE_CONFIG; None = HARDWARE_CONFIG)
+
+    Returns:
+        {state: (kind, (operand shapes), result shape, repeats)} in FSM
+        order; repeats is n_layers for BLOCK_STATES and 1 otherwise.
+        Matmul operands are (rows, k) and (k, cols) per head, so
+        MACs = result size x k.
+    """
+    config = dict(HARDWARE_CONFIG, **(config or {}))
+    D, T, V, H = config['d_model'], config['seq_len'], config['vocab_size'], config['n_heads']
+    F = config['d_ff'] or D
+    hd = D // H
+    readout_rows = T if config['readout'] == 'all' else 1
+    table = {
+        'EMBEDDING':       ('gather', ((V, D),), (T, D)),
+        'LAYERNORM_INPUT': ('layernorm', ((T, D),), (T, D)),
+        'COMPUTE_Q':       ('matmul', ((T, D), (D, D)), (T, D)),
+        'COMPUTE_K':       ('matmul', ((T, D), (D, D)), (T, D)),
+        'COMPUTE_V':       ('matmul', ((T, D), (D, D)), (T, D)),
+        'COMPUTE_SCORES':  ('matmul', ((H, T, hd), (H, hd, T)), (H, T, T)),
+        'SOFTMAX_SCORES':  ('softmax', ((H, T, T),), (H, T, T)),
+        'COMPUTE_ATTN':    ('matmul', ((H, T, T), (H, T, hd)), (H, T, hd)),
+        'ADD_RESIDUAL_1':  ('add', ((T, D), (T, D)), (T, D)),
+        'LAYERNORM_1':     ('layernorm', ((T, D),), (T, D)),
+        'COMPUTE_FF1':     ('matmul', ((T, D), (D, F)), (T, F)),
+        'GELU_FF1':        ('gelu', ((T, F),), (T, F)),
+        'COMPUTE_FF2':     ('matmul', ((T, F), (F, D)), (T, D)),
+        'ADD_RESIDUAL_2':  ('add', ((T, D), (T, D)), (T, D)),
+        'LAYERNORM_2':     ('layernorm', ((T, D),), (T, D)),
+        'COMPUTE_OUTPUT':  ('matmul', ((T, D), (D, V)), (T, V)),
+        'SOFTMAX_OUTPUT':  ('softmax', ((readout_rows, V),), (readout_rows, V)),
+    }
+    return {state: (kind, operands, result, config['n_layers'] if state in BLOCK_STATES else 1)
+            for state, (kind, operands, result) in table.items()}
+
+def _count_stage(kind, operand_shapes, result_shape, itemsize, result_itemsize, quantized):
+    """Counts for one execution of a state (one sequence)"""
+    result_size = int(np.prod(result_shape))
+    macs = 0
+    arithmetic = transcendentals = 0
+    if kind == 'matmul':
+        macs = result_size * operand_shapes[0][-1]
+    elif kind in ELEMENTWISE_COST:
+        per_element, per_element_t = ELEMENTWISE_COST[kind]
+        arithmetic = per_element * result_size
+        transcendentals = per_element_t * result_size
+        if kind == 'layernorm':
+            rows = result_size // result_shape[-1]
+            arithmetic += LAYERNORM_ROW_COST[0] * rows
+            transcendentals += LAYERNORM_ROW_COST[1] * rows
+    if quantized and kind != 'gather':
+        arithmetic += QUANTIZE_FLOPS * result_size
+
+    bytes_written = result_size * result_itemsize
+    if kind == 'gather':
+        bytes_read = bytes_written + result_shape[0] * TOKEN_ID_BYTES       # rows + token IDs
+    else:
+        bytes_read = sum(int(np.prod(shape)) for shape in operand_shapes) * itemsize
+    flops = 2 * macs + arithmetic + transcendentals
+    bytes_total = bytes_read + bytes_written
+    return {
+        'macs': macs,
+        'flops': flops,
+        'transcendentals': transcendentals,
+        'bytes_read': bytes_read,
+        'bytes_written': bytes_written,
+        'bytes': bytes_total,
+        'intensity': flops / bytes_total if bytes_total else 0.0,
+    }
+
+def stage_op_counts(weights=None, quantized=False, dtype=None, config=None):
+    """
+    Per-sequence counts for every FSM state, from stage_table(config)
+
+    Args:
+        weights: optional weights dict, only used to infer the dtype policy
+        quantized: include the Q5.10 snap of every result
+        dtype: dtype policy of the run (None = the dtype of the weights, float64 without weights)
+        config: geometry (None = HARDWARE_CONFIG)
+
+    Returns:
+        {state: counts} in FSM order (see the module docstring); block
+        states are summed over the n_layers blocks
+    """
+    dtype = resolve_dtype(dtype, weights)
+    itemsize = np.dtype(dtype).itemsize
+    # int16 runs leave the pipeline as float32 probabilities, and round as
+    # part of their integer arithmetic: no separate snap
+    output_itemsize = np.dtype(np.float32).itemsize if dtype == 'int16' else itemsize
+    snap = quantized and dtype != 'int16'
+
+    counts = {}
+    for state, (kind, operands, result, repeats) in stage_table(config).items():
+        result_itemsize = output_itemsize if state == 'SOFTMAX_OUTPUT' else itemsize
+        c = _count_stage(kind, operands, result, itemsize, result_itemsize, snap)
+        if repeats != 1:
+            c = {key: value * repeats if key != 'intensity' else value for key, value in c.items()}
+        counts[state] = c
+    return counts
+
+def check_stage_table(probs, captured, weights, config=None):
+    """
+    Check stage_table against one captured golden-model sequence
+
+    Args:
+        probs / captured: output of a capture='all' run, first sequence
+                          selected (probs [V], captured {name: array})
+        weights: the weights of that run
+
+    Raises:
+        AssertionError naming the first state whose operand or result
+        size differs from the table
+    """
+    arrays = dict(captured, output_probs=probs)
+    arrays.update({name: np.asarray(value) for name, value in weights.items()})
+    for state, (kind, operand_shapes, result_shape, _) in stage_table(config).items():
+        _, operand_names, result_name = STAGE_OPERATIONS[state]
+        result = arrays[result_name]
+        assert result.size == np.prod(result_shape), \
+            f"{state}: {result_name} has {result.size} elements, table says {result_shape}"
+        if kind == 'matmul':
+            operand = arrays[operand_names[0]]
+            assert operand.size == np.prod(operand_shapes[0]), \
+                f"{state}: {operand_names[0]} has {operand.size} elements, table says {operand_shapes[0]}"
+
+def total_counts(counts):
+    """Sum of stage_op_counts over every state"""
+    keys = ('macs', 'flops', 'transcendentals', 'bytes_read', 'bytes_written', 'bytes')
+    total = {key: sum(stage[key] for stage in counts.values()) for key in keys}
+    total['intensity'] = total['flops'] / total['bytes'] if total['bytes'] else 0.0
+    return total
+
+def roofline(counts, stage_seconds=None, peak_gflops=None, peak_gbps=None):
+    """
+    Roofline view per state
+
+    Args:
+        counts: stage_op_counts() (per sequence)
+        stage_seconds: optional {state: seconds per sequence} (e.g. from
+                       StageProfiler.report) to compute achieved GFLOP/s
+        peak_gflops / peak_gbps: machine ceilings (see measure_machine_peaks)
+
+    Returns:
+        {state: counts + 'achieved_gflops', 'bound_gflops', 'bound' ('memory' / 'compute')}
+    """
+    view = {}
+    for state, c in counts.items():
+        entry = dict(c)
+        if stage_seconds and stage_seconds.get(state):
+            entry['achieved_gflops'] = c['flops'] / stage_seconds[state] / 1e9
+        if peak_gflops and peak_gbps:
+            memory_bound = c['intensity'] * peak_gbps
+            entry['bound_gflops'] = min(peak_gflops, memory_bound)
+            entry['bound'] = 'memory' if memory_bound < peak_gflops else 'compute'
+        view[state] = entry
+    return view
+
+def measure_machine_peaks(size=1024, copy_mb=256, repeats=3):
+    """Rough ceilings for the roofline: float64 matmul GFLOP/s and copy bandwidth GB/s"""
+    a = np.random.default_rng(0).standard_normal((size, size))
+    src = np.ones(copy_mb * 2**20 // 8)
+    dst = np.empty_like(src)
+    best_mm = best_copy = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        a @ a
+        best_mm = min(best_mm, time.perf_counter() - start)
+        start = time.perf_counter()
+        np.copyto(dst, src)
+        best_copy = min(best_copy, time.perf_counter() - start)
+    return {
+        'peak_gflops': 2 * size**3 / best_mm / 1e9,
+        'peak_gbps': 2 * src.nbytes / best_copy / 1e9,      # read + write
+    }
+
+if __name__ == "__main__":
+    from new_benchmark import create_hardware_weights, tiny_gpt2_hardware_model_batch
+    from stage_profiler import StageProfiler
+
+    print("📐 TinyGPT-2 Operation Accounting (per sequence)")
+    print("=" * 92)
+
+    peaks = measure_machine_peaks()
+    print(f"Machine: {peaks['peak_gflops']:.1f} GFLOP/s matmul, {peaks['peak_gbps']:.1f} GB/s copy\n")
+
+    weights = create_hardware_weights(quantized=True)
+    counts = stage_op_counts(weights, quantized=True)
+    tokens = np.random.default_rng(0).integers(0, 16, size=(4096, 16))
+    probs, captured = tiny_gpt2_hardware_model_batch(tokens[:1], weights, quantized=True, capture='all')
+    check_stage_table(probs[0], {name: value[0] for name, value in captured.items()}, weights)
+    tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None)
+    profiler = StageProfiler(track_memory=False, op_counts=counts)
+    for _ in range(10):
+        tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None, stage_timer=profiler)
+    seconds = {name: r['wall_us'] / 1e6 / r['sequences'] for name, r in profiler.report().items()}
+    view = roofline(counts, seconds, **peaks)
+
+    print(f"{'State':<16} {'MACs':>6} {'FLOPs':>7} {'Bytes':>7} {'FLOP/B':>7} {'GFLOP/s':>8} {'Roof':>8}  Bound")
+    print("-" * 92)
+    for state, v in view.items():
+        print(f"{state:<16} {v['macs']:>6} {v['flops']:>7} {v['bytes']:>7} {v['intensity']:>7.2f} "
+              f"{v.get('achieved_gflops', 0.0):>8.2f} {v['bound_gflops']:>8.1f}  {v['bound']}")
+    total = total_counts(counts)
+    print("-" * 92)
+    print(f"{'TOTAL':<16} {total['macs']:>6} {total['flops']:>7} {total['bytes']:>7} {total['intensity']:>7.2f}")
@@ -0,0 +1,134 @@
+"""
+Q5.10 fixed-point helpers (5 integer bits, 10 fractional bits)
+
+Values are stored in hardware as int16 codes: code = round(x * 1024),
+saturated to [-32.0, 31.999]. Everything here is a whole-array NumPy op
+(clip / round / shift), so quantizing a [B, 16, 16] batch costs a handful
+of passes over memory instead of one Python call per element.
+
+Two equivalent representations:
+    float-emulated: float arrays snapped to the Q5.10 grid (quantize)
+    int-coded:      int16 codes (to_codes / from_codes)
+from_codes(to_codes(x)) == quantize(x) holds bit for bit. Integer
+arithmetic on codes (matmul_codes / add_codes) accumulates in int32.
+The dtype policies of the models ('float64' / 'float32' float-emulated,
+'int16' int-coded) are resolved by resolve_dtype.
+"""
+
+import numpy as np
+
+FRAC_BITS = 10
+SCALE = 1 << FRAC_BITS        # 1024
+MIN_VALUE = -32.0
+MAX_VALUE = 31.999            # same clip bound as float_to_q5_10
+CODE_MIN = -32768             # 0x8000
+CODE_MAX = 32767              # 0x7FFF
+CODE_DTYPE = np.int16
+ACCUM_DTYPE = np.int32
+DTYPE_POLICIES = ('float64', 'float32', 'int16')
+
+def resolve_dtype(dtype=None, weights=None):
+    """Normalize a dtype policy; None = the policy of the weights (float64 if none)"""
+    if dtype is None:
+        if weights is None:
+            return 'float64'
+        value_dtype = np.asarray(weights['w_q']).dtype
+        if np.issubdtype(value_dtype, np.integer):
+            return 'int16'
+        return 'float32' if value_dtype == np.float32 else 'float64'
+    name = dtype if isinstance(dtype, str) else np.dtype(dtype).name
+    if name not in DTYPE_POLICIES:
+        raise ValueError(f"dtype must be one of {DTYPE_POLICIES}, got {dtype!r}")
+    return name
+
+def quantize(x, out=None):
+    """
+    Snap a float array to the Q5.10 grid (clip, round, rescale)
+
+    Args:
+        x: float array (any shape)
+        out: optional float array to write into; pass out=x to quantize
+             in place and avoid allocating a new float64 array
+
+    Returns:
+        out (or a new array) holding Q5.10-representable values
+    """
+    x = np.asarray(x)
+    if out is None:
+        out = np.empty(x.shape, dtype=np.result_type(x.dtype, np.float32))
+    np.clip(x, MIN_VALUE, MAX_VALUE, out=out)
+    np.multiply(out, SCALE, out=out)
+    np.round(out, out=out)
+    np.multiply(out, 1.0 / SCALE, out=out)   # exact: power-of-two scale
+    return out
+
+def to_codes(x, out=None):
+    """
+    Convert a float array to Q5.10 int16 codes
+
+    Args:
+        x: float array (any shape)
+        out: optional int16 array to write the codes into
+
+    Returns:
+        int16 array of Q5.10 codes
+    """
+    scaled = np.clip(x, MIN_VALUE, MAX_VALUE) * SCALE
+    np.round(scaled, out=scaled)
+    if out is None:
+        return scaled.astype(CODE_DTYPE)
+    out[...] = scaled
+    return out
+
+def from_codes(codes, out=None, dtype=np.float64):
+    """
+    Convert Q5.10 int16 codes back to floats
+
+    Args:
+        codes: integer array of Q5.10 codes
+        out: optional float array to write into
+        dtype: float dtype of the result when out is not given
+
+    Returns:
+        float array equal to codes / 1024
+    """
+    if out is None:
+        out = np.empty(np.shape(codes), dtype=dtype)
+    np.multiply(codes, 1.0 / SCALE, out=out)
+    return out
+
+def saturate_codes(codes):
+    """Saturate wide integer codes (e.g. int32 accumulators) into int16 range"""
+    return np.clip(codes, CODE_MIN, CODE_MAX).astype(CODE_DTYPE)
+
+def matmul_codes(a, b):
+    """
+    Matrix product of Q5.10 codes with int32 accumulation
+
+    Args:
+        a, b: int16 code arrays (np.matmul shapes, e.g. [B, 16, 16] @ [16, 16])
+
+    Returns:
+        int16 codes of a @ b: the Q10.20 int32 sum rounded half to even back
+        to Q5.10 and saturated, i.e. to_codes(from_codes(a) @ from_codes(b)).
+        Like the 32-bit PE accumulators, a sum beyond +-2048.0 wraps.
+    """
+    acc = np.matmul(np.asarray(a, dtype=ACCUM_DTYPE), np.asarray(b, dtype=ACCUM_DTYPE))
+    half = 1 << (FRAC_BITS - 1)
+    tie = (acc & (SCALE - 1)) == half
+    acc += half
+    acc >>= FRAC_BITS
+    acc -= tie & (acc & 1).astype(bool)
+    return saturate_codes(acc)
+
+def add_codes(a, b):
+    """Saturating elementwise sum of Q5.10 codes"""
+    return saturate_codes(np.add(a, b, dtype=ACCUM_DTYPE))
+
+def codes_from_hex(words):
+    """Reinterpret unsigned 16-bit words (as read from .hex files) as int16 codes"""
+    return np.asarray(words, dtype=np.uint16).view(CODE_DTYPE)
+
+def codes_to_hex(codes):
+    """Reinterpret int16 codes as unsigned 16-bit words for .hex files"""
+    return np.asarray(codes, dtype=CODE_DTYPE).view(np.uint16)
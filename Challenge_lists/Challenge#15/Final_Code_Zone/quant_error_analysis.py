@@ -0,0 +1,221 @@
+"""
+Quantization-error analysis of the TinyGPT-2 golden model
+
+validate_against_hardware eyeballs one token vector. This runs the float
+reference and a fixed-point configuration on the same (large) population
+of sequences, chunk by chunk, and accumulates per-stage statistics:
+    - max / mean / RMS absolute error, and max error in Q5.10 LSBs
+    - SNR (dB) of each stage output against the float reference
+    - a power-of-two histogram of the error in LSBs (error distribution)
+    - relative RMS error and its growth from stage to stage
+    - dynamic range of the float signal, the integer bits it needs and the
+      Qm.n format it suggests for a given word width
+and, for the output probabilities, per-sequence KL divergence
+KL(p_float || p_fixed) and argmax agreement.
+
+Every statistic is a running sum / max / bincount over whole-chunk arrays,
+so memory is set by chunk_size and 10^6 sequences take minutes.
+"""
+
+import math
+import time
+
+import numpy as np
+
+import q5_10
+from new_benchmark import (CAPTURE_STAGES, cast_weights, create_hardware_weights,
+                           tiny_gpt2_hardware_model_batch)
+
+# Error histogram bins: exact, then [2^(e-1), 2^e) LSB for e in ERROR_EXPONENTS
+ERROR_EXPONENTS = np.arange(-12, 17)
+KL_FLOOR = 0.5 / q5_10.SCALE          # probabilities clamped to half an LSB before the log
+
+class StageErrorStats:
+    """Running error statistics of one stage output"""
+
+    def __init__(self):
+        self.count = 0
+        self.max_abs_error = 0.0
+        self.sum_abs_error = 0.0
+        self.sum_sq_error = 0.0
+        self.sum_sq_signal = 0.0
+        self.max_abs_value = 0.0
+        self.histogram = np.zeros(len(ERROR_EXPONENTS) + 1, dtype=np.int64)
+
+    def update(self, reference, test):
+        reference = reference.reshape(-1)
+        error = np.subtract(test.reshape(-1), reference, dtype=np.float64)
+        np.abs(error, out=error)
+        self.count += error.size
+        self.max_abs_error = max(self.max_abs_error, float(error.max()))
+        self.sum_abs_error += float(error.sum())
+        self.sum_sq_error += float(np.dot(error, error))
+        self.sum_sq_signal += float(np.dot(reference, reference))
+        self.max_abs_value = max(self.max_abs_value, float(np.abs(reference).max()))
+
+        _, exponent = np.frexp(error * q5_10.SCALE)
+        bins = np.clip(exponent - ERROR_EXPONENTS[0] + 1, 1, len(ERROR_EXPONENTS))
+        bins[error == 0] = 0
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+
+    def error_percentile_lsb(self, p):
+        """Upper edge (in LSBs) of the histogram bin holding the p-th percentile error"""
+        if self.count == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.histogram), math.ceil(p / 100 * self.count)))
+        return 0.0 if index == 0 else float(2.0 ** ERROR_EXPONENTS[min(index - 1, len(ERROR_EXPONENTS) - 1)])
+
+    def summary(self, word_bits=16):
+        n = max(self.count, 1)
+        rms_error = math.sqrt(self.sum_sq_error / n)
+        rms_signal = math.sqrt(self.sum_sq_signal / n)
+        # Q<i>.<f> holds [-2^i, 2^i), so max_abs = 2^k needs k + 1 integer bits
+        integer_bits = max(0, math.floor(math.log2(self.max_abs_value)) + 1) if self.max_abs_value > 0 else 0
+        return {
+            'elements': self.count,
+            'max_abs_error': self.max_abs_error,
+            'mean_abs_error': self.sum_abs_error / n,
+            'rms_error': rms_error,
+            'max_error_lsb': self.max_abs_error * q5_10.SCALE,
+            'p99_error_lsb': self.error_percentile_lsb(99),
+            'snr_db': 10 * math.log10(self.sum_sq_signal / self.sum_sq_error) if self.sum_sq_error else math.inf,
+            'relative_rms_error': rms_error / rms_signal if rms_signal else 0.0,
+            'max_abs_value': self.max_abs_value,
+            'integer_bits': integer_bits,
+            'suggested_format': f"Q{integer_bits}.{word_bits - 1 - integer_bits}",
+            'error_histogram': self.histogram.copy(),
+        }
+
+class OutputStats:
+    """Running KL divergence / agreement of the output probabilities"""
+
+    def __init__(self):
+        self.sequences = 0
+        self.sum_kl = 0.0
+        self.max_kl = 0.0
+        self.kl_histogram = np.zeros(len(ERROR_EXPONENTS) + 1, dtype=np.int64)
+        self.argmax_agree = 0
+        self.max_prob_error = 0.0
+
+    def update(self, p_ref, p_test):
+        p = np.maximum(p_ref, KL_FLOOR)
+        q = np.maximum(p_test, KL_FLOOR)
+        kl = np.sum(p * np.log(p / q), axis=-1)
+        np.maximum(kl, 0.0, out=kl)              # clamping can push tiny values below 0
+        self.sequences += kl.size
+        self.sum_kl += float(kl.sum())
+        self.max_kl = max(self.max_kl, float(kl.max()))
+        _, exponent = np.frexp(kl)
+        bins = np.clip(exponent - ERROR_EXPONENTS[0] + 1, 1, len(ERROR_EXPONENTS))
+        bins[kl == 0] = 0
+        self.kl_histogram += np.bincount(bins, minlength=len(self.kl_histogram))
+        self.argmax_agree += int(np.sum(p_ref.argmax(-1) == p_test.argmax(-1)))
+        self.max_prob_error = max(self.max_prob_error, float(np.abs(p_test - p_ref).max()))
+
+    def summary(self):
+        n = max(self.sequences, 1)
+        index = int(np.searchsorted(np.cumsum(self.kl_histogram), math.ceil(0.99 * self.sequences)))
+        p99 = 0.0 if index == 0 else float(2.0 ** ERROR_EXPONENTS[min(index - 1, len(ERROR_EXPONENTS) - 1)])
+        return {
+            'sequences': self.sequences,
+            'mean_kl': self.sum_kl / n,
+            'p99_kl': p99,
+            'max_kl': self.max_kl,
+            'argmax_agreement': self.argmax_agree / n,
+            'max_prob_error': self.max_prob_error,
+        }
+
+def _token_chunks(num_sequences, chunk_size, seed, tokens, token_file):
+    if token_file is not None:
+        from token_stream import iter_token_chunks
+        yield from iter_token_chunks(token_file, chunk_size, stop=num_sequences)
+    elif tokens is not None:
+        tokens = np.asarray(tokens)
+        for start in range(0, min(len(tokens), num_sequences or len(tokens)), chunk_size):
+            yield tokens[start:start + chunk_size]
+    else:
+        rng = np.random.default_rng(seed)
+        for start in range(0, num_sequences, chunk_size):
+            yield rng.integers(0, 16, size=(min(chunk_size, num_sequences - start), 16))
+
+def analyze_quantization_error(num_sequences=100_000, weights=None, test_weights=None, dtype='float64',
+                               chunk_size=4096, seed=0, tokens=None, token_file=None, word_bits=16):
+    """
+    Compare the float model and the Q5.10 model stage by stage
+
+    Args:
+        num_sequences: population size (upper bound when tokens / token_file are given)
+        weights: float reference weights (None = create_hardware_weights())
+        test_weights: fixed-point model weights (None = weights snapped to Q5.10)
+        dtype: dtype policy of the fixed-point run ('float64', 'float32', 'int16')
+        chunk_size: sequences per batched call (sets the memory footprint)
+        seed: seed of the random population
+        tokens / token_file: analyze these sequences instead (array or packed
+                             token file, see token_stream.py)
+        word_bits: word width used for the suggested formats
+
+    Returns:
+        dictionary with per-stage summaries (pipeline order, plus the
+        stage-to-stage 'growth' of the relative RMS error), the output
+        probability summary and the elapsed time
+    """
+    if weights is None:
+        weights = create_hardware_weights(quantized=False)
+    if test_weights is None:
+        test_weights = cast_weights({name: q5_10.quantize(value) for name, value in weights.items()}, dtype)
+
+    stage_stats = {name: StageErrorStats() for name in CAPTURE_STAGES}
+    output_stats = OutputStats()
+    begin = time.perf_counter()
+    for chunk in _token_chunks(num_sequences, chunk_size, seed, tokens, token_file):
+        p_ref, reference = tiny_gpt2_hardware_model_batch(chunk, weights, quantized=False, capture='all')
+        p_test, test = tiny_gpt2_hardware_model_batch(chunk, test_weights, quantized=True, capture='all',
+                                                      dtype=dtype)
+        for name, stats in stage_stats.items():
+            value = test[name]
+            if np.issubdtype(value.dtype, np.integer):
+                value = q5_10.from_codes(value)
+            stats.update(reference[name], value)
+        output_stats.update(p_ref, p_test)
+    elapsed = time.perf_counter() - begin
+
+    stages = {}
+    previous = None
+    for name, stats in stage_stats.items():
+        summary = stats.summary(word_bits)
+        summary['growth'] = (summary['relative_rms_error'] / previous
+                             if previous else None)
+        previous = summary['relative_rms_error'] or previous
+        stages[name] = summary
+    return {
+        'num_sequences': output_stats.sequences,
+        'dtype': dtype,
+        'stages': stages,
+        'output': output_stats.summary(),
+        'total_time_s': elapsed,
+        'sequences_per_second': output_stats.sequences / elapsed if elapsed else 0.0,
+    }
+
+def print_error_report(report):
+    print(f"{'Stage':<18} {'max|x|':>8} {'Format':>7} {'max err':>9} {'mean err':>9} {'max LSB':>8} "
+          f"{'p99 LSB':>8} {'SNR dB':>7} {'rel RMS':>8} {'growth':>7}")
+    print("-" * 104)
+    for name, s in report['stages'].items():
+        growth = f"{s['growth']:.2f}x" if s['growth'] else '-'
+        print(f"{name:<18} {s['max_abs_value']:>8.3f} {s['suggested_format']:>7} {s['max_abs_error']:>9.2e} "
+              f"{s['mean_abs_error']:>9.2e} {s['max_error_lsb']:>8.2f} {s['p99_error_lsb']:>8.3f} "
+              f"{s['snr_db']:>7.1f} {s['relative_rms_error']:>8.2e} {growth:>7}")
+    out = report['output']
+    print(f"\n🎯 Output probabilities ({out['sequences']} sequences)")
+    print(f"   KL(float || {report['dtype']} Q5.10): mean {out['mean_kl']:.3e}, "
+          f"p99 < {out['p99_kl']:.1e}, max {out['max_kl']:.3e}")
+    print(f"   Argmax agreement: {out['argmax_agreement'] * 100:.3f}%   max |Δp|: {out['max_prob_error']:.5f}")
+
+if __name__ == "__main__":
+    print("🔍 TinyGPT-2 Quantization-Error Analysis (float vs Q5.10)")
+    print("=" * 104)
+
+    report = analyze_quantization_error(num_sequences=200_000)
+    print(f"{report['num_sequences']} sequences in {report['total_time_s']:.1f}s "
+          f"({report['sequences_per_second']:.0f} seqs/sec)\n")
+    print_error_report(report)
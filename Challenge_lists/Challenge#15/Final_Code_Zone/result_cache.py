@@ -0,0 +1,114 @@
+"""
+Opt-in LRU memoization for the single-sequence golden models
+
+Regression and fuzzing flows evaluate the same token vectors over and over
+(validate_against_hardware always runs 0..15, sweeps revisit seeds).
+ModelResultCache wraps any model with the signature
+    model_fn(input_tokens, weights, quantized=False)
+e.g. tiny_gpt2_hardware_model here or tiny_transformer_inference from
+Challenge#9, and turns repeated calls into a dict lookup.
+
+Key: (weights fingerprint, token tuple, quantized flag). Fingerprints are
+remembered per weights dict identity (the last FINGERPRINT_SLOTS dicts), so
+a cache hit never re-hashes the weights. The flip side: an in-place edit
+(weights['w_q'][:] = ...) is not noticed, and the cache keeps serving the
+old results until invalidate(weights) is called for that dict.
+
+Cached arrays are returned read-only (they are shared between hits).
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from new_benchmark import tiny_gpt2_hardware_model, weights_fingerprint
+
+FINGERPRINT_SLOTS = 8
+
+def _freeze(result):
+    """Mark every array in a (nested) model result read-only"""
+    if isinstance(result, np.ndarray):
+        result.flags.writeable = False
+    elif isinstance(result, dict):
+        for value in result.values():
+            _freeze(value)
+    elif isinstance(result, (tuple, list)):
+        for value in result:
+            _freeze(value)
+    return result
+
+class ModelResultCache:
+    """Bounded LRU cache in front of a single-sequence model function"""
+
+    def __init__(self, model_fn=tiny_gpt2_hardware_model, maxsize=4096):
+        self.model_fn = model_fn
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        # id(weights) -> (weights, fingerprint); the dict is held so its id is not reused
+        self._fingerprints = OrderedDict()
+
+    def _fingerprint(self, weights):
+        entry = self._fingerprints.get(id(weights))
+        if entry is None:
+            entry = self._fingerprints[id(weights)] = (weights, weights_fingerprint(weights))
+            if len(self._fingerprints) > FINGERPRINT_SLOTS:
+                self._fingerprints.popitem(last=False)
+        else:
+            self._fingerprints.move_to_end(id(weights))
+        return entry[1]
+
+    def __call__(self, input_tokens, weights, quantized=False):
+        key = (self._fingerprint(weights),
+               tuple(int(t) for t in np.asarray(input_tokens).ravel()),
+               bool(quantized))
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = _freeze(self.model_fn(input_tokens, weights, quantized=quantized))
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def invalidate(self, weights=None):
+        """
+        Drop cached results
+
+        Call it after editing a weights dict in place.
+
+        Args:
+            weights: only drop entries computed with this weights dict, both
+                     under the fingerprint remembered for it (its contents
+                     when first seen) and under its current contents;
+                     None drops everything
+        """
+        if weights is None:
+            self._results.clear()
+            self._fingerprints.clear()
+            return
+        fingerprints = {weights_fingerprint(weights)}
+        entry = self._fingerprints.pop(id(weights), None)
+        if entry is not None and entry[0] is weights:
+            fingerprints.add(entry[1])
+        for key in [k for k in self._results if k[0] in fingerprints]:
+            del self._results[key]
+
+    def stats(self):
+        """Hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._results),
+            'maxsize': self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._results)
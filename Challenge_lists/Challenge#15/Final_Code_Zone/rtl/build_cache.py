@@ -0,0 +1,220 @@
+"""
+Content-hashed cache of compiled Icarus images (sim.vvp) per toplevel
+
+cocotb's makefile rebuilds sim.vvp whenever a source is newer than the
+image, and an isolated build directory per test starts from nothing, so
+every run recompiles its whole VERILOG_SOURCES set even when only the
+Python test changed. BuildCache keys a compiled image by the content of
+everything that goes into it:
+    - the toplevel name and the Verilog sources (names and bytes)
+    - files pulled in by `include and memory images read by
+      $readmemh / $readmemb (found by scanning the sources, recursively)
+    - compile-time parameters (passed as -P<toplevel>.<name>=<value>)
+    - the iverilog version
+and keeps each image in its own directory, sim_build/cache/<toplevel>-<key>/,
+next to a manifest.json that records the hashed files. Several images
+per toplevel live side by side (the oldest beyond max_builds are pruned),
+so switching toplevels or going back to an earlier source version is a
+lookup, not a rebuild.
+
+A manifest is written only after a successful build, so a directory
+without one is an unfinished build and is rebuilt. On a hit the image is
+touched, so make sees it as newer than the (unchanged) sources.
+
+Usage:
+    cache = BuildCache()
+    key, files = build_key('matrix_mult_16x16', SOURCES['matrix_mult_16x16'])
+    build_dir = cache.lookup('matrix_mult_16x16', key)
+    if build_dir is None:
+        build_dir = cache.reserve('matrix_mult_16x16', key)
+        ... make SIM_BUILD=build_dir build_dir/sim.vvp ...
+        cache.commit('matrix_mult_16x16', key, files)
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+
+RTL_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_ROOT = os.path.join(RTL_DIR, 'sim_build', 'cache')
+IMAGE = 'sim.vvp'
+MANIFEST = 'manifest.json'
+
+INCLUDE_RE = re.compile(rb'`include\s+"([^"]+)"')
+READMEM_RE = re.compile(rb'\$readmem[hb]\s*\(\s*"([^"]+)"')
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def dependency_files(sources, root=RTL_DIR):
+    """
+    Sources plus the include files and memory images they reference
+
+    Includes are resolved next to the including file, memory images
+    against root (the simulator's working directory). Missing
+    references are kept, so they still change the key once they appear.
+
+    Returns:
+        sorted list of paths relative to root
+    """
+    found = set()
+    pending = [os.path.normpath(os.path.join(root, source)) for source in sources]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            text = f.read()
+        for name in INCLUDE_RE.findall(text):
+            pending.append(os.path.normpath(os.path.join(os.path.dirname(path), name.decode())))
+        for name in READMEM_RE.findall(text):
+            found.add(os.path.normpath(os.path.join(root, name.decode())))
+    return sorted(os.path.relpath(path, root) for path in found)
+
+@functools.lru_cache(maxsize=None)
+def iverilog_version():
+    """First line of `iverilog -V` ('unknown' if it is not installed)"""
+    try:
+        output = subprocess.run(['iverilog', '-V'], capture_output=True, text=True).stdout
+    except OSError:
+        return 'unknown'
+    return output.splitlines()[0] if output else 'unknown'
+
+def parameter_args(toplevel, parameters):
+    """Icarus -P overrides for a {name: value} parameter dict"""
+    return [f'-P{toplevel}.{name}={value}' for name, value in sorted((parameters or {}).items())]
+
+def build_key(toplevel, sources, parameters=None, root=RTL_DIR):
+    """
+    Content key of one compiled image
+
+    Args:
+        toplevel: toplevel module name
+        sources: Verilog sources (relative to root)
+        parameters: {name: value} compile-time parameter overrides
+        root: directory the sources and memory images are relative to
+
+    Returns:
+        (hex key, {relative path: sha256 or None if missing})
+    """
+    files = {}
+    for name in dependency_files(sources, root):
+        path = os.path.join(root, name)
+        files[name] = file_digest(path) if os.path.exists(path) else None
+    digest = hashlib.sha256()
+    for part in [toplevel, iverilog_version(), *sources, *parameter_args(toplevel, parameters),
+                 *(f'{name}:{files[name]}' for name in sorted(files))]:
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest(), files
+
+class BuildCache:
+    """
+    Compiled images kept side by side, at most max_builds per toplevel
+
+    Args:
+        root: cache directory
+        max_builds: images kept per toplevel (least recently used are pruned)
+    """
+
+    def __init__(self, root=CACHE_ROOT, max_builds=4):
+        self.root = root
+        self.max_builds = max_builds
+        self.hits = 0
+        self.misses = 0
+
+    def build_dir(self, toplevel, key):
+        """Directory holding the image of (toplevel, key)"""
+        return os.path.join(self.root, f'{toplevel}-{key[:16]}')
+
+    def reserve(self, toplevel, key):
+        """Empty directory to build (toplevel, key) into (clears an unfinished build)"""
+        build_dir = self.build_dir(toplevel, key)
+        shutil.rmtree(build_dir, ignore_errors=True)
+        os.makedirs(build_dir)
+        return build_dir
+
+    def _manifest(self, build_dir):
+        try:
+            with open(os.path.join(build_dir, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, toplevel, key):
+        """
+        Directory of a finished image for (toplevel, key), or None
+
+        A hit touches the image (so make does not rebuild it from source
+        mtimes) and the manifest (LRU order).
+        """
+        build_dir = self.build_dir(toplevel, key)
+        manifest = self._manifest(build_dir)
+        image = os.path.join(build_dir, IMAGE)
+        if manifest is None or manifest.get('key') != key or not os.path.exists(image):
+            self.misses += 1
+            return None
+        self.hits += 1
+        os.utime(image)
+        os.utime(os.path.join(build_dir, MANIFEST))
+        return build_dir
+
+    def commit(self, toplevel, key, files, parameters=None):
+        """Record a successful build of (toplevel, key) and prune older images"""
+        build_dir = self.build_dir(toplevel, key)
+        manifest = {
+            'key': key,
+            'toplevel': toplevel,
+            'parameters': parameters or {},
+            'iverilog': iverilog_version(),
+            'files': files,
+            'built': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(os.path.join(build_dir, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        self.prune(toplevel, keep=build_dir)
+        return build_dir
+
+    def entries(self, toplevel=None):
+        """Finished images as (build_dir, manifest), most recently used first"""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            build_dir = os.path.join(self.root, name)
+            manifest = self._manifest(build_dir)
+            if manifest is None or (toplevel is not None and manifest['toplevel'] != toplevel):
+                continue
+            used = os.path.getmtime(os.path.join(build_dir, MANIFEST))
+            entries.append((used, build_dir, manifest))
+        entries.sort(key=lambda entry: -entry[0])
+        return [(build_dir, manifest) for _, build_dir, manifest in entries]
+
+    def prune(self, toplevel, keep=None):
+        """Delete the least recently used images of toplevel beyond max_builds"""
+        stale = [build_dir for build_dir, _ in self.entries(toplevel) if build_dir != keep]
+        for build_dir in stale[max(0, self.max_builds - (keep is not None)):]:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    def stats(self):
+        """Hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'images': len(self.entries()),
+        }
@@ -0,0 +1,203 @@
+"""
+Bulk load / readback of Q5.10 matrix ports and port families for the cocotb testbenches
+
+The matrix modules expose each matrix as an unpacked array port
+(`input [15:0] matrix_a [0:255]`). Driving one element per
+`dut.matrix_a[i].value = ...` costs a handle lookup plus a write per
+element, inside nested Python loops. MatrixPort instead:
+    - converts a whole NumPy matrix to Q5.10 words in one vectorized step
+    - writes / reads the port as one list through the array handle
+      (`port.value = [...]`), falling back to per-element writes over
+      element handles that are looked up once and cached (by index, or
+      by the flattened name 'matrix_i[3]' where indexing is unsupported)
+    - is cached per (dut, port name), so every test in a simulation reuses
+      the same handles
+
+Modules with one port per element (input_vector_0 .. input_vector_15)
+are bound the same way by PortFamily: the names are resolved once into a
+list of handles, and the family is written / read as one vector, so
+per-cycle loops do no string formatting or name lookup.
+
+Usage:
+    matrix_port(dut, 'matrix_a').write(A)                       # row-major
+    matrix_port(dut, 'matrix_b').write(B, column_major=True)    # systolic B
+    C = matrix_port(dut, 'matrix_c').read()                     # float [16, 16]
+
+    inputs = port_family(dut, 'input_vector_', 16)
+    inputs.write(x)                                             # float [16]
+    y = port_family(dut, 'output_vector_', 16).read_words()     # uint16 [16]
+
+The Q5.10 format itself (scale, clip bounds, rounding) comes from
+../q5_10.py, which the makefile puts on PYTHONPATH.
+"""
+
+import numpy as np
+
+import q5_10
+
+ROUNDING_MODES = ('nearest', 'truncate')
+
+def _words(ints):
+    """Python ints (signed or unsigned readback) as uint16 words"""
+    return np.array(ints, dtype=np.int64).astype(np.uint16)
+
+def _resolved_int(value, name):
+    """int() of one signal value; ValueError naming the signal if it holds X/Z"""
+    resolvable = getattr(value, 'is_resolvable', None)
+    if resolvable is None:
+        resolvable = not any(c in str(value).lower() for c in 'xz')
+    if not resolvable:
+        raise ValueError(f"{name} holds X/Z ({value}), not a Q5.10 word")
+    return int(value)
+
+def to_q5_10_words(values, rounding='nearest'):
+    """
+    Convert a float array to unsigned 16-bit Q5.10 words (vectorized)
+
+    Args:
+        values: float array-like (any shape)
+        rounding: 'nearest' (round(x * 1024), as q5_10.to_codes) or
+                  'truncate' (int(x * 1024), as the older per-test helpers)
+
+    Returns:
+        uint16 array of the same shape
+    """
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"rounding must be one of {ROUNDING_MODES}, got {rounding!r}")
+    values = np.asarray(values, dtype=np.float64)
+    flat = values.reshape(-1)          # to_codes rounds in place, which a 0-d input cannot take
+    if rounding == 'nearest':
+        codes = q5_10.to_codes(flat)
+    else:
+        codes = np.trunc(np.clip(flat, q5_10.MIN_VALUE, q5_10.MAX_VALUE) * q5_10.SCALE).astype(q5_10.CODE_DTYPE)
+    return q5_10.codes_to_hex(codes).reshape(values.shape)
+
+def from_q5_10_words(words):
+    """Convert 16-bit Q5.10 words (signed or unsigned ints) to floats"""
+    return q5_10.from_codes(q5_10.codes_from_hex(_words(words)))
+
+class MatrixPort:
+    """
+    One unpacked [15:0] x [0:rows*cols-1] matrix port of a DUT
+
+    Args:
+        dut: cocotb DUT handle
+        name: port name (e.g. 'matrix_a')
+        rows / cols: matrix shape (elements are stored row-major)
+    """
+
+    def __init__(self, dut, name, rows=16, cols=16):
+        self.dut = dut
+        self.name = name
+        self.array = getattr(dut, name, None)
+        self.shape = (rows, cols)
+        self.size = rows * cols
+        self._handles = None
+        self._bulk = self.array is not None     # cleared if the simulator rejects list access
+
+    @property
+    def handles(self):
+        """Element handles, looked up once"""
+        if self._handles is None:
+            try:
+                self._handles = [self.array[i] for i in range(self.size)]
+            except (IndexError, KeyError, TypeError, AttributeError):
+                self._handles = [getattr(self.dut, f'{self.name}[{i}]') for i in range(self.size)]
+        return self._handles
+
+    def write_words(self, words, column_major=False):
+        """
+        Drive the port with 16-bit words
+
+        Args:
+            words: int array-like of shape (rows, cols) or (rows * cols,)
+            column_major: store the transpose (element [j * rows + i] = words[i, j]),
+                          as matrix_mult_16x16 expects for matrix_b
+        """
+        words = np.asarray(words, dtype=np.int64).reshape(self.shape)
+        if column_major:
+            words = words.T
+        words = (words.ravel() & 0xFFFF).tolist()
+        if self._bulk:
+            try:
+                self.array.value = words
+                return
+            except (AttributeError, TypeError, NotImplementedError):
+                self._bulk = False
+        for handle, word in zip(self.handles, words):
+            handle.value = word
+
+    def write(self, values, column_major=False, rounding='nearest'):
+        """Drive the port with a float matrix (converted to Q5.10, see to_q5_10_words)"""
+        self.write_words(to_q5_10_words(values, rounding), column_major)
+
+    def read_words(self):
+        """Current port contents as unsigned 16-bit words, shape (rows, cols); ValueError on X/Z"""
+        if self._bulk:
+            try:
+                values = self.array.value
+                if len(values) == self.size:
+                    return _words([_resolved_int(v, f'{self.name}[{i}]')
+                                   for i, v in enumerate(values)]).reshape(self.shape)
+            except (AttributeError, TypeError, NotImplementedError):
+                pass
+            self._bulk = False
+        return _words([_resolved_int(h.value, f'{self.name}[{i}]')
+                       for i, h in enumerate(self.handles)]).reshape(self.shape)
+
+    def read(self):
+        """Current port contents as a float matrix"""
+        return from_q5_10_words(self.read_words())
+
+_PORTS = {}
+
+def matrix_port(dut, name, rows=16, cols=16):
+    """Cached MatrixPort for (dut, name)"""
+    key = (id(dut), name)
+    port = _PORTS.get(key)
+    if port is None or port.shape != (rows, cols):
+        port = _PORTS[key] = MatrixPort(dut, name, rows, cols)
+    return port
+
+class PortFamily:
+    """
+    Ports named prefix0 .. prefix{count-1} (e.g. input_vector_0 .. input_vector_15)
+
+    Args:
+        dut: cocotb DUT handle
+        prefix: common name prefix (e.g. 'input_vector_')
+        count: number of ports in the family
+    """
+
+    def __init__(self, dut, prefix, count=16):
+        self.prefix = prefix
+        self.count = count
+        self.handles = [getattr(dut, f'{prefix}{i}') for i in range(count)]
+
+    def write_words(self, words):
+        """Drive every port with an integer (raw words, token IDs, ...)"""
+        words = np.asarray(words, dtype=np.int64).reshape(self.count).tolist()
+        for handle, word in zip(self.handles, words):
+            handle.value = word
+
+    def write(self, values, rounding='nearest'):
+        """Drive the family with a float vector (converted to Q5.10, see to_q5_10_words)"""
+        self.write_words(to_q5_10_words(values, rounding))
+
+    def read_words(self):
+        """Current values as unsigned 16-bit words, shape (count,)"""
+        return _words([_resolved_int(h.value, f'{self.prefix}{i}') for i, h in enumerate(self.handles)])
+
+    def read(self):
+        """Current values as a float vector"""
+        return from_q5_10_words(self.read_words())
+
+_FAMILIES = {}
+
+def port_family(dut, prefix, count=16):
+    """Cached PortFamily for (dut, prefix, count)"""
+    key = (id(dut), prefix, count)
+    family = _FAMILIES.get(key)
+    if family is None:
+        family = _FAMILIES[key] = PortFamily(dut, prefix, count)
+    return family
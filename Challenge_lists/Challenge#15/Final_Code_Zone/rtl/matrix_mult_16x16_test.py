@@ -8,16 +8,7 @@ from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, FallingEdge, Timer
 import numpy as np
 
-def float_to_s5_10(x):
-    """Convert float to S5.10 format"""
-    x = max(-16.0, min(15.999, x))
-    return int(round(x * 1024)) & 0xFFFF
-
-def s5_10_to_float(val):
-    """S5.10 to float conversion"""
-    if val & 0x8000:  # negative
-        val = val - 0x10000
-    return val / 1024.0
+from matrix_io import matrix_port
 
 async def setup_clock_and_reset(dut):
     """Setup clock and reset"""
@@ -34,19 +25,9 @@ async def setup_clock_and_reset(dut):
 async def load_matrices(dut, matrix_a, matrix_b):
     """Load input matrices into DUT"""
     await FallingEdge(dut.clk)  # Ensure clock is stable before loading
-    # Convert to S5.10 format
-    a_fixed = [[float_to_s5_10(val) for val in row] for row in matrix_a]
-    b_fixed = [[float_to_s5_10(val) for val in row] for row in matrix_b]
-    
-    # Load matrix A (row-major)
-    for i in range(16):
-        for j in range(16):
-            dut.matrix_a[i*16 + j].value = a_fixed[i][j]
-    
-    # Load matrix B (column-major for systolic array)
-    for j in range(16):
-        for i in range(16):
-            dut.matrix_b[j*16 + i].value = b_fixed[i][j]
+    # Whole-matrix Q5.10 conversion and transfer (see matrix_io.py)
+    matrix_port(dut, 'matrix_a').write(matrix_a)                        # row-major
+    matrix_port(dut, 'matrix_b').write(matrix_b, column_major=True)     # column-major for systolic array
 
 async def start_computation(dut):
     """Start matrix multiplication"""
@@ -67,12 +48,7 @@ async def wait_for_completion(dut, timeout_cycles=1000):
 
 async def read_result_matrix(dut):
     """Read result matrix from DUT"""
-    result_flat = []
-    for i in range(256):
-        val = dut.matrix_c[i].value.integer
-        result_flat.append(s5_10_to_float(val))
-    
-    return np.array(result_flat).reshape(16, 16)
+    return matrix_port(dut, 'matrix_c').read()
 
 def print_matrix(matrix, name, precision=2, size=4):
     """Pretty print matrix (show only top-left corner)"""
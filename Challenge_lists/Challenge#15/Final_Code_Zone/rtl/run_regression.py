@@ -0,0 +1,399 @@
+"""
+Parallel cocotb regression runner for all RTL testbenches
+
+The makefile runs one (TOPLEVEL, MODULE) pair. This driver knows every
+test module's toplevel and source set and:
+    - runs each module as its own `make` invocation with TOPLEVEL, MODULE
+      and VERILOG_SOURCES overridden on the command line (parameters go
+      through PARAMETER_ARGS, which the makefile appends to COMPILE_ARGS),
+      so the makefile stays the single place that sets up the simulator
+    - compiles each distinct toplevel once, through the content-hashed
+      image cache of build_cache.py: an image whose sources, includes,
+      memory images and parameters are unchanged is reused, not rebuilt,
+      and modules sharing a toplevel share its image
+    - gives every module an isolated SIM_BUILD directory
+      (sim_build/<module>/) holding a private copy of its cached image
+      plus its results.xml, sim.log and any waveform dump, so modules
+      sharing a toplevel run in parallel without sharing cmds.f, dumps
+      or make's timestamp checks
+    - checks SOURCES against the module instantiations in the Verilog
+      (check_sources) before building, so a missing submodule file is a
+      table error, not a "build failed" row
+    - spreads the builds, then the modules, over a process pool (one
+      simulator per core); the simulations still run with rtl/ as the
+      working directory, so $readmemh("tiny_gpt2_weights.hex") resolves
+      as before
+    - merges the per-module results.xml files into one JUnit report
+      (regression_results.xml) and prints a pass / fail table
+
+Usage:
+    python run_regression.py                         # every module
+    python run_regression.py pe_test mac_unit_test   # a subset
+"""
+
+import glob
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from build_cache import IMAGE, BuildCache, build_key, parameter_args
+
+RTL_DIR = os.path.dirname(os.path.abspath(__file__))
+BUILD_ROOT = os.path.join(RTL_DIR, 'sim_build')
+REPORT_FILE = os.path.join(RTL_DIR, 'regression_results.xml')
+TIMEOUT_S = 1800
+
+# toplevel -> Verilog sources (toplevel file first, then everything it instantiates)
+SOURCES = {
+    'mac_unit': ['mac_unit.v'],
+    'systolic_pe': ['systolic_pe.v', 'mac_unit.v'],
+    'matrix_mult_16x16': ['matrix_mult_16x16.v', 'systolic_pe.v', 'mac_unit.v'],
+    'layernorm_preprocess': ['layernorm_preprocess.v'],
+    'layernorm_postprocess': ['layernorm_postprocess.v'],
+    'inv_sqrt_newton': ['inv_sqrt_newton.v'],
+    'inv_sqrt_lut_simple': ['inv_sqrt_lut_simple.v'],
+    'inv_sqrt_debug': ['inv_sqrt_debug.v'],
+    'layernorm_pipeline': ['layernorm_pipeline.v', 'layernorm_preprocess.v', 'inv_sqrt_newton.v',
+                           'layernorm_postprocess.v'],
+    'layernorm_optimized_pipeline': ['layernorm_optimized_pipeline.v'],
+    'layernorm_matrix_processor': ['layernorm_matrix_processor.v', 'layernorm_pipeline.v', 'layernorm_preprocess.v',
+                                   'inv_sqrt_newton.v', 'layernorm_postprocess.v'],
+    'reciprocal_divider': ['reciprocal_divider.v'],
+    'softmax_frontend': ['softmax_frontend.v'],
+    'softmax_backend': ['softmax_backend.v'],
+    'softmax_processor': ['softmax_processor.v', 'softmax_frontend.v', 'softmax_backend.v'],
+    'softmax_matrix_processor': ['softmax_matrix_processor.v', 'softmax_processor.v', 'softmax_frontend.v',
+                                 'softmax_backend.v'],
+    'gelu_matrix_processor': ['gelu_matrix_processor.v'],
+    'tiny_gpt2_top': ['tiny_gpt2_top.v', 'matrix_mult_16x16.v', 'layernorm_matrix_processor.v',
+                      'softmax_matrix_processor.v', 'gelu_matrix_processor.v', 'inv_sqrt_newton.v',
+                      'layernorm_pipeline.v', 'layernorm_postprocess.v', 'layernorm_preprocess.v',
+                      'mac_unit.v', 'systolic_pe.v', 'softmax_processor.v', 'softmax_frontend.v',
+                      'softmax_backend.v'],
+}
+
+# toplevel -> {parameter: value} compile-time overrides (part of the image key)
+PARAMETERS = {}
+
+# test module -> toplevel
+TESTS = {
+    'mac_unit_test': 'mac_unit',
+    'test_mac_debug_step_by_step': 'mac_unit',
+    'pe_test': 'systolic_pe',
+    'matrix_mult_16x16_test': 'matrix_mult_16x16',
+    'test_layernorm_preprocess': 'layernorm_preprocess',
+    'test_layernorm_postprocess': 'layernorm_postprocess',
+    'test_newton_inv_sqrt': 'inv_sqrt_newton',
+    'test_inv_sqrt_lut': 'inv_sqrt_lut_simple',
+    'test_debug_simple': 'inv_sqrt_debug',
+    'test_layernorm_pipeline': 'layernorm_pipeline',
+    'test_layernorm': 'layernorm_optimized_pipeline',
+    'test_matrix_processor': 'layernorm_matrix_processor',
+    'test_reciprocal_divider': 'reciprocal_divider',
+    'test_softmax_frontend': 'softmax_frontend',
+    'debug_frontend_only': 'softmax_frontend',
+    'correct_backend_test': 'softmax_backend',
+    'minimal_test': 'softmax_backend',
+    'fixed_processor_test': 'softmax_processor',
+    'test_softmax_matrix': 'softmax_matrix_processor',
+    'test_gelu_matrix_processor': 'gelu_matrix_processor',
+    'test_tiny_gpt2': 'tiny_gpt2_top',
+}
+
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+MODULE_RE = re.compile(r'^\s*module\s+(\w+)', re.M)
+
+def module_files(root=RTL_DIR):
+    """
+    Verilog module definitions and instantiations of every .v file in root
+
+    Returns:
+        ({module: defining file}, {file: set of instantiated module names})
+    """
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(root, '*.v'))):
+        with open(path) as f:
+            texts[os.path.basename(path)] = COMMENT_RE.sub('', f.read())
+    definitions = {}
+    for name, text in texts.items():
+        for module in MODULE_RE.findall(text):
+            definitions.setdefault(module, name)
+    # `module_name [#(...)] instance_name (`
+    patterns = {module: re.compile(r'(?<![\w$`.])' + module + r'\s*(?:#\s*\([^;]*?\))?\s*\w+\s*\(')
+                for module in definitions}
+    instances = {}
+    for name, text in texts.items():
+        own = set(MODULE_RE.findall(text))
+        instances[name] = {module for module, pattern in patterns.items()
+                           if module not in own and pattern.search(text)}
+    return definitions, instances
+
+def check_sources(sources=None, root=RTL_DIR):
+    """
+    Compare each SOURCES entry with the files its toplevel instantiates
+
+    Walks the module instantiations from the toplevel down and raises
+    ValueError listing every toplevel whose source list misses a needed
+    file or carries one it does not use.
+    """
+    sources = SOURCES if sources is None else sources
+    definitions, instances = module_files(root)
+    problems = []
+    for toplevel, files in sources.items():
+        if toplevel not in definitions:
+            problems.append(f"{toplevel}: no .v file defines it")
+            continue
+        needed, pending = set(), [toplevel]
+        while pending:
+            name = definitions[pending.pop()]
+            if name not in needed:
+                needed.add(name)
+                pending.extend(instances[name])
+        missing, extra = sorted(needed - set(files)), sorted(set(files) - needed)
+        if missing or extra:
+            problems.append(f"{toplevel}: missing {missing}, unused {extra}")
+    if problems:
+        raise ValueError("SOURCES does not match the Verilog instantiations:\n  " + "\n  ".join(problems))
+
+def make_command(module, build_dir, target=None):
+    """`make` invocation for one test module against the image in build_dir (target None = run)"""
+    toplevel = TESTS[module]
+    command = ['make', '-f', 'makefile', f'TOPLEVEL={toplevel}', f'MODULE={module}',
+               f'VERILOG_SOURCES={" ".join(SOURCES[toplevel])}', f'SIM_BUILD={build_dir}']
+    compile_args = parameter_args(toplevel, PARAMETERS.get(toplevel))
+    if compile_args:
+        # not COMPILE_ARGS=...: a command-line value would replace the
+        # makefile's COMPILE_ARGS += -f $(SIM_BUILD)/cmds.f (the timescale)
+        command.append(f'PARAMETER_ARGS={" ".join(compile_args)}')
+    if target:
+        command.append(target)
+    return command
+
+def build_image(task):
+    """
+    Compile one toplevel image into its cache directory (pool task)
+
+    Returns:
+        (toplevel, success, wall time)
+    """
+    toplevel, module, build_dir = task
+    begin = time.perf_counter()
+    with open(os.path.join(build_dir, 'build.log'), 'w') as log:
+        try:
+            process = subprocess.run(make_command(module, build_dir, os.path.join(build_dir, IMAGE)),
+                                     cwd=RTL_DIR, stdout=log, stderr=subprocess.STDOUT, timeout=TIMEOUT_S)
+            success = process.returncode == 0
+        except subprocess.TimeoutExpired:
+            success = False
+    success = success and os.path.exists(os.path.join(build_dir, IMAGE))
+    return toplevel, success, time.perf_counter() - begin
+
+def parse_results(path):
+    """
+    Count the test cases of one cocotb results.xml
+
+    Returns:
+        (testcase elements, {'tests', 'failures', 'skipped', 'sim_time_ns'})
+    """
+    cases = list(ET.parse(path).getroot().iter('testcase'))
+    failures = sum(1 for case in cases if case.find('failure') is not None or case.find('error') is not None)
+    skipped = sum(1 for case in cases if case.find('skipped') is not None)
+    return cases, {
+        'tests': len(cases),
+        'failures': failures,
+        'skipped': skipped,
+        'sim_time_ns': sum(float(case.get('sim_time_ns', 0.0)) for case in cases),
+    }
+
+def _new_row(module):
+    output_dir = run_dir(module)
+    os.makedirs(output_dir, exist_ok=True)
+    return {'module': module, 'toplevel': TESTS[module], 'results_file': os.path.join(output_dir, 'results.xml'),
+            'log_file': os.path.join(output_dir, 'sim.log'), 'tests': 0, 'failures': 0, 'skipped': 0,
+            'sim_time_ns': 0.0, 'wall_time_s': 0.0}
+
+def run_dir(module):
+    """SIM_BUILD directory of one test module"""
+    return os.path.join(BUILD_ROOT, module)
+
+def stage_image(module, image_dir):
+    """
+    Copy the cached image (and its cmds.f) into the module's own SIM_BUILD
+
+    A copy, not a hard link: should make ever rebuild sim.vvp in the run
+    directory, iverilog would otherwise truncate the shared cached image.
+    The copy is touched so make sees it as newer than the sources.
+    """
+    target = run_dir(module)
+    os.makedirs(target, exist_ok=True)
+    for name in (IMAGE, 'cmds.f'):
+        source = os.path.join(image_dir, name)
+        if os.path.exists(source):
+            shutil.copy2(source, os.path.join(target, name))
+    os.utime(os.path.join(target, IMAGE))
+    return target
+
+def run_test(task):
+    """
+    Run one test module on a private copy of its compiled image (pool task)
+
+    Returns:
+        dictionary with module, toplevel, status ('pass', 'fail', 'error'),
+        counts, wall time, results / log paths
+    """
+    module, image_dir = task
+    row = _new_row(module)
+    build_dir = stage_image(module, image_dir)
+    results_file, log_file = row['results_file'], row['log_file']
+    if os.path.exists(results_file):
+        os.remove(results_file)
+
+    env = dict(os.environ, COCOTB_RESULTS_FILE=results_file)
+    begin = time.perf_counter()
+    with open(log_file, 'w') as log:
+        try:
+            process = subprocess.run(make_command(module, build_dir), cwd=RTL_DIR, env=env,
+                                     stdout=log, stderr=subprocess.STDOUT, timeout=TIMEOUT_S)
+            returncode = process.returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+    row['wall_time_s'] = time.perf_counter() - begin
+
+    if os.path.exists(results_file):
+        _, counts = parse_results(results_file)
+        row.update(counts)
+    if returncode is None:
+        row['status'] = 'error'
+        row['reason'] = f'timeout after {TIMEOUT_S}s'
+    elif row['tests'] == 0:
+        row['status'] = 'error'
+        row['reason'] = f'no results (make exit {returncode}, build or load failure)'
+    else:
+        row['status'] = 'fail' if row['failures'] else 'pass'
+    return row
+
+def merge_results(rows, path=None):
+    """
+    Merge the per-module results.xml files into one JUnit report
+
+    Every module becomes one <testsuite name=module> with its toplevel as a
+    property; modules that produced no results get a single erroring test case.
+    """
+    path = path or REPORT_FILE
+    root = ET.Element('testsuites', name='regression')
+    for row in rows:
+        suite = ET.SubElement(root, 'testsuite', name=row['module'], package=row['toplevel'],
+                              tests=str(max(row['tests'], 1)), failures=str(row['failures']),
+                              errors=str(int(row['status'] == 'error')), skipped=str(row['skipped']),
+                              time=f"{row['wall_time_s']:.3f}")
+        properties = ET.SubElement(suite, 'properties')
+        ET.SubElement(properties, 'property', name='toplevel', value=row['toplevel'])
+        if os.path.exists(row['results_file']):
+            cases, _ = parse_results(row['results_file'])
+            suite.extend(cases)
+        if row['status'] == 'error':
+            case = ET.SubElement(suite, 'testcase', name=row['module'], classname=row['module'])
+            ET.SubElement(case, 'error', message=row['reason'])
+    ET.indent(root)
+    ET.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
+    return path
+
+def run_regression(modules=None, workers=None, cache=None):
+    """
+    Build (or reuse) the images, run test modules in parallel and merge their results
+
+    Args:
+        modules: test module names (None = every module in TESTS)
+        workers: pool size (None = os.cpu_count(), capped at the module count)
+        cache: BuildCache holding the compiled images (None = BuildCache())
+
+    Returns:
+        list of per-module rows (see run_test, plus 'image' and 'cached'),
+        in the order given
+    """
+    modules = list(modules or TESTS)
+    unknown = [module for module in modules if module not in TESTS]
+    if unknown:
+        raise ValueError(f"Unknown test modules {unknown}; known: {sorted(TESTS)}")
+    workers = max(1, min(workers or os.cpu_count(), len(modules)))
+    check_sources({TESTS[module]: SOURCES[TESTS[module]] for module in modules})
+
+    cache = cache or BuildCache()
+
+    # toplevel -> [key, hashed files, image directory or None]
+    images = {}
+    for module in modules:
+        toplevel = TESTS[module]
+        if toplevel not in images:
+            key, files = build_key(toplevel, SOURCES[toplevel], PARAMETERS.get(toplevel))
+            images[toplevel] = [key, files, cache.lookup(toplevel, key)]
+    cached = {toplevel for toplevel, image in images.items() if image[2] is not None}
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        # longest first (tiny_gpt2_top), so it does not start last
+        builds = [(toplevel, next(m for m in modules if TESTS[m] == toplevel), cache.reserve(toplevel, image[0]))
+                  for toplevel, image in images.items() if image[2] is None]
+        builds.sort(key=lambda task: -len(SOURCES[task[0]]))
+        for toplevel, success, _ in pool.imap_unordered(build_image, builds):
+            if success:
+                key, files, _ = images[toplevel]
+                images[toplevel][2] = cache.commit(toplevel, key, files, PARAMETERS.get(toplevel))
+
+        order = sorted((module for module in modules if images[TESTS[module]][2] is not None),
+                       key=lambda module: -len(SOURCES[TESTS[module]]))
+        rows = {row['module']: row for row in
+                pool.imap_unordered(run_test, [(module, images[TESTS[module]][2]) for module in order])}
+
+    for module in modules:
+        toplevel = TESTS[module]
+        if module not in rows:
+            row = rows[module] = _new_row(module)
+            row['status'] = 'error'
+            row['reason'] = 'build failed'
+            row['log_file'] = os.path.join(cache.build_dir(toplevel, images[toplevel][0]), 'build.log')
+        rows[module]['image'] = images[toplevel][2]
+        rows[module]['cached'] = toplevel in cached
+    rows = [rows[module] for module in modules]
+    merge_results(rows)
+    return rows
+
+def print_summary(rows):
+    print(f"{'Module':<30} {'Toplevel':<28} {'Status':<8} {'Tests':>5} {'Fail':>5} {'Wall (s)':>9} {'Image':>6}")
+    print("-" * 97)
+    for row in rows:
+        icon = {'pass': '✅', 'fail': '❌', 'error': '💥'}[row['status']]
+        image = 'cached' if row.get('cached') else 'built'
+        print(f"{row['module']:<30} {row['toplevel']:<28} {icon} {row['status']:<5} {row['tests']:>5} "
+              f"{row['failures']:>5} {row['wall_time_s']:>9.1f} {image:>6}")
+        if row['status'] == 'error':
+            print(f"   ↳ {row['reason']}, see {os.path.relpath(row['log_file'], RTL_DIR)}")
+
+if __name__ == "__main__":
+    print("🧪 TinyGPT-2 RTL Regression (cocotb + Icarus)")
+    print("=" * 97)
+
+    missing = [tool for tool in ('make', 'iverilog', 'cocotb-config') if shutil.which(tool) is None]
+    if missing:
+        sys.exit(f"❌ Missing tools on PATH: {', '.join(missing)}")
+
+    modules = sys.argv[1:] or None
+    begin = time.perf_counter()
+    cache = BuildCache()
+    rows = run_regression(modules, cache=cache)
+    elapsed = time.perf_counter() - begin
+
+    print_summary(rows)
+    passed = sum(row['status'] == 'pass' for row in rows)
+    print(f"\n{passed}/{len(rows)} modules passed in {elapsed:.1f}s on "
+          f"{min(os.cpu_count(), len(rows))} worker(s)")
+    stats = cache.stats()
+    print(f"🗃️  Image cache: {stats['hits']} reused, {stats['misses']} built, "
+          f"{stats['images']} image(s) in {os.path.relpath(cache.root, RTL_DIR)}")
+    print(f"💾 Merged report: {os.path.relpath(REPORT_FILE, RTL_DIR)}")
+    sys.exit(0 if passed == len(rows) else 1)
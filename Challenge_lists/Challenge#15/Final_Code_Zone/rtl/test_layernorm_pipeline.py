@@ -3,6 +3,9 @@ from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
 from cocotb.binary import BinaryValue
 import random
+import numpy as np
+
+from matrix_io import port_family
 
 # Q5.10 format helper functions
 def float_to_q5_10(val):
@@ -42,9 +45,12 @@ async def test_layernorm_pipeline_basic(dut):
     dut.rst_n.value = 0
     dut.valid_in.value = 0
     
+    # Bind the per-element ports once
+    inputs = port_family(dut, 'input_vector_', 16)
+    outputs = port_family(dut, 'output_vector_', 16)
+    
     # Initialize all input vectors to 0
-    for i in range(16):
-        getattr(dut, f"input_vector_{i}").value = 0
+    inputs.write_words(np.zeros(16))
     
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
@@ -59,12 +65,8 @@ async def test_layernorm_pipeline_basic(dut):
     print("="*50)
     
     # Create input vector: [1.0, 2.0, 3.0, ..., 16.0]
-    input_vector = []
-    for i in range(16):
-        val = float(i + 1)  # 1.0 to 16.0
-        q5_10_val = float_to_q5_10(val)
-        input_vector.append(q5_10_val)
-        getattr(dut, f"input_vector_{i}").value = q5_10_val
+    input_vector = [float_to_q5_10(float(i + 1)) for i in range(16)]  # 1.0 to 16.0
+    inputs.write_words(input_vector)
     
     print_vector_q5_10("Input Vector", input_vector)
     
@@ -95,10 +97,7 @@ async def test_layernorm_pipeline_basic(dut):
         return
     
     # Read output vector
-    output_vector = []
-    for i in range(16):
-        val = int(getattr(dut, f"output_vector_{i}").value)
-        output_vector.append(val)
+    output_vector = outputs.read_words().tolist()
     
     print_vector_q5_10("Output Vector", output_vector)
     
@@ -116,8 +115,7 @@ async def test_layernorm_pipeline_basic(dut):
     print("="*50)
     
     # Set all inputs to 0
-    for i in range(16):
-        getattr(dut, f"input_vector_{i}").value = 0
+    inputs.write_words(np.zeros(16))
     
     dut.valid_in.value = 1
     await RisingEdge(dut.clk)
@@ -131,10 +129,7 @@ async def test_layernorm_pipeline_basic(dut):
             break
     
     if dut.valid_out.value == 1:
-        output_vector = []
-        for i in range(16):
-            val = int(getattr(dut, f"output_vector_{i}").value)
-            output_vector.append(val)
+        output_vector = outputs.read_words().tolist()
         print_vector_q5_10("Output Vector (all zeros input)", output_vector)
     
     # Test Case 3: Random vector
@@ -144,12 +139,8 @@ async def test_layernorm_pipeline_basic(dut):
     
     # Generate random input vector
     random.seed(42)  # For reproducible results
-    input_vector = []
-    for i in range(16):
-        val = random.uniform(-4.0, 4.0)  # Random values in reasonable range
-        q5_10_val = float_to_q5_10(val)
-        input_vector.append(q5_10_val)
-        getattr(dut, f"input_vector_{i}").value = q5_10_val
+    input_vector = [float_to_q5_10(random.uniform(-4.0, 4.0)) for i in range(16)]  # Random values in reasonable range
+    inputs.write_words(input_vector)
     
     print_vector_q5_10("Random Input Vector", input_vector)
     
@@ -165,10 +156,7 @@ async def test_layernorm_pipeline_basic(dut):
             break
     
     if dut.valid_out.value == 1:
-        output_vector = []
-        for i in range(16):
-            val = int(getattr(dut, f"output_vector_{i}").value)
-            output_vector.append(val)
+        output_vector = outputs.read_words().tolist()
         print_vector_q5_10("Random Output Vector", output_vector)
         
         # Sanity check
@@ -197,8 +185,9 @@ async def test_layernorm_pipeline_throughput(dut):
     # Reset
     dut.rst_n.value = 0
     dut.valid_in.value = 0
-    for i in range(16):
-        getattr(dut, f"input_vector_{i}").value = 0
+    inputs = port_family(dut, 'input_vector_', 16)
+    outputs = port_family(dut, 'output_vector_', 16)
+    inputs.write_words(np.zeros(16))
     
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
@@ -218,9 +207,7 @@ async def test_layernorm_pipeline_throughput(dut):
     for vec_idx, test_vec in enumerate(test_vectors):
         print(f"Sending vector {vec_idx + 1}: {test_vec[:4]}...")
         
-        for i in range(16):
-            q5_10_val = float_to_q5_10(test_vec[i])
-            getattr(dut, f"input_vector_{i}").value = q5_10_val
+        inputs.write(test_vec, rounding='truncate')
         
         dut.valid_in.value = 1
         await RisingEdge(dut.clk)
@@ -238,10 +225,7 @@ async def test_layernorm_pipeline_throughput(dut):
             print(f"Got output {output_count} at cycle {cycle + 1}")
             
             # Read and display this output
-            output_vector = []
-            for i in range(16):
-                val = int(getattr(dut, f"output_vector_{i}").value)
-                output_vector.append(val)
+            output_vector = outputs.read_words().tolist()
             
             output_floats = [q5_10_to_float(x) for x in output_vector]
             print(f"  Output {output_count} sample: {output_floats[:4]}")
@@ -309,8 +293,9 @@ async def test_pipeline_continuous_stream(dut):
     # Reset
     dut.rst_n.value = 0
     dut.valid_in.value = 0
-    for i in range(16):
-        getattr(dut, f"input_vector_{i}").value = 0
+    inputs = port_family(dut, 'input_vector_', 16)
+    outputs = port_family(dut, 'output_vector_', 16)
+    inputs.write_words(np.zeros(16))
     
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
@@ -340,8 +325,7 @@ async def test_pipeline_continuous_stream(dut):
         q5_10_vector = [float_to_q5_10(val) for val in test_vector]
         input_vectors.append((vec_idx, vector_type, q5_10_vector, test_vector))
         
-        for i in range(16):
-            getattr(dut, f"input_vector_{i}").value = q5_10_vector[i]
+        inputs.write_words(q5_10_vector)
         
         dut.valid_in.value = 1
         
@@ -377,10 +361,7 @@ async def test_pipeline_continuous_stream(dut):
             output_cycles.append(cycle_count)
             
             # Read output vector
-            output_vector = []
-            for i in range(16):
-                val = int(getattr(dut, f"output_vector_{i}").value)
-                output_vector.append(val)
+            output_vector = outputs.read_words().tolist()
             
             output_float_vector = [q5_10_to_float(x) for x in output_vector]
             output_vectors.append((outputs_collected, output_vector, output_float_vector))
@@ -464,8 +445,9 @@ async def test_pipeline_sustained_load(dut):
     # Reset
     dut.rst_n.value = 0
     dut.valid_in.value = 0
-    for i in range(16):
-        getattr(dut, f"input_vector_{i}").value = 0
+    inputs = port_family(dut, 'input_vector_', 16)
+    outputs = port_family(dut, 'output_vector_', 16)
+    inputs.write_words(np.zeros(16))
     
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk) 
@@ -488,11 +470,8 @@ async def test_pipeline_sustained_load(dut):
         # Send new vector if we have more to send
         if vector_sent < NUM_VECTORS:
             # Generate simple test vector
-            test_vector = [float(i + vector_sent * 0.1) for i in range(16)]
-            q5_10_vector = [float_to_q5_10(val) for val in test_vector]
-            
-            for i in range(16):
-                getattr(dut, f"input_vector_{i}").value = q5_10_vector[i]
+            test_vector = np.arange(16) + vector_sent * 0.1
+            inputs.write(test_vector, rounding='truncate')
             
             dut.valid_in.value = 1
             vector_sent += 1
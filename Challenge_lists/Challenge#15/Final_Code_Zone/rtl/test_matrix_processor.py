@@ -1,6 +1,9 @@
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
+import numpy as np
+
+from matrix_io import matrix_port
 
 # Q5.10 format helper functions
 def float_to_q5_10(val):
@@ -80,11 +83,11 @@ async def test_matrix_processor_basic(dut):
             
             #  (matrix_o[0:15])
             try:
+                output = matrix_port(dut, 'matrix_o').read_words()
                 for row in range(16):
                     print(f"\nRow {row} output:")
                     for col in range(8):  #
-                        idx = row * 16 + col
-                        val = int(getattr(dut, f'matrix_o[{idx}]').value)
+                        val = int(output[row, col])
                         float_val = q5_10_to_float(val)
                         print(f"  [{row}][{col}] = 0x{val:04x} ({float_val:.3f})")
             except Exception as e:
@@ -145,20 +148,8 @@ async def test_matrix_processor_timing(dut):
     dut.rst_n.value = 1
     await RisingEdge(dut.clk)
     
-    # Determine array access method
-    method = 1
-    try:
-        dut.matrix_i[0].value = 0
-    except:
-        method = 2
-    
-    # Load simple matrix (all 1s)
-    for i in range(256):
-        val = float_to_q5_10(1.0)
-        if method == 1:
-            dut.matrix_i[i].value = val
-        else:
-            getattr(dut, f'matrix_i[{i}]').value = val
+    # Load simple matrix (all 1s); matrix_io falls back to per-element handles
+    matrix_port(dut, 'matrix_i').write(np.ones((16, 16)), rounding='truncate')
     
     # Measure timing
     start_time = 0
@@ -1,6 +1,9 @@
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
+import numpy as np
+
+from matrix_io import matrix_port
 
 # Q5.10 format helper functions
 def float_to_q5_10(val):
@@ -39,16 +42,13 @@ async def test_matrix_processor_basic(dut):
     
     # Load input matrix with test data
     print("✅ Loading input matrix...")
-    for i in range(16):  # 16 rows
-        for j in range(16):  # 16 columns per row
-            idx = i * 16 + j
-            # Simple test pattern: each element = (j + 1) * 0.25
-            val = float_to_q5_10((j + 1) * 0.25)
-            try:
-                dut.matrix_i[idx].value = val
-            except Exception as e:
-                print(f"Failed to load matrix element {idx}: {e}")
-                return
+    # Simple test pattern: each element = (j + 1) * 0.25
+    test_matrix = np.tile((np.arange(16) + 1) * 0.25, (16, 1))
+    try:
+        matrix_port(dut, 'matrix_i').write(test_matrix, rounding='truncate')
+    except Exception as e:
+        print(f"Failed to load input matrix: {e}")
+        return
     
     print("Input matrix loaded successfully!")
     print(f"Sample input row 0: {[q5_10_to_float(float_to_q5_10((j + 1) * 0.25)) for j in range(8)]}...")
@@ -95,19 +95,16 @@ async def test_matrix_processor_basic(dut):
             
             # 读取第一行输出 (matrix_o[0:15])
             try:
+                output = matrix_port(dut, 'matrix_o').read_words()
                 for row in range(3):  # Only check first 3 rows
                     print(f"\nRow {row} output:")
-                    row_sum = 0
                     for col in range(8):  # 只打印前8个元素
-                        idx = row * 16 + col
-                        val = int(dut.matrix_o[idx].value)
+                        val = int(output[row, col])
                         float_val = q5_10_to_float(val)
                         print(f"  [{row}][{col}] = 0x{val:04x} ({float_val:.3f})")
-                        if col < 16:  # Count all 16 elements for sum
-                            row_sum += val
                     
                     # Check full row sum
-                    full_row_sum = sum([int(dut.matrix_o[row * 16 + c].value) for c in range(16)])
+                    full_row_sum = int(output[row].sum())
                     print(f"  Row {row} sum: {full_row_sum} (expected ~1024)")
                     
             except Exception as e:
@@ -170,13 +167,11 @@ async def test_matrix_processor_timing(dut):
     
     # Load simple matrix (all same values for uniform distribution)
     print("Loading uniform matrix (all 1.0)...")
-    for i in range(256):
-        val = float_to_q5_10(1.0)
-        try:
-            dut.matrix_i[i].value = val
-        except:
-            print("Failed to load matrix!")
-            return
+    try:
+        matrix_port(dut, 'matrix_i').write(np.ones((16, 16)), rounding='truncate')
+    except:
+        print("Failed to load matrix!")
+        return
     
     # Measure timing
     print("Starting timing measurement...")
@@ -200,7 +195,7 @@ async def test_matrix_processor_timing(dut):
             
             # Check that uniform input produces uniform output
             try:
-                first_row_vals = [int(dut.matrix_o[i].value) for i in range(16)]
+                first_row_vals = matrix_port(dut, 'matrix_o').read_words()[0].tolist()
                 expected_val = 1024 // 16  # Should be ~64 each for uniform distribution
                 print(f"Uniform test: first element = {first_row_vals[0]} (expected ~{expected_val})")
                 if abs(first_row_vals[0] - expected_val) < 8:
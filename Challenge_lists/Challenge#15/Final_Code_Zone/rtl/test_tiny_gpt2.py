@@ -2,6 +2,25 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 
+from matrix_io import port_family
+from trace_recorder import TraceRecorder, bind_elements
+
+STATE_NAMES = {
+    0: "IDLE", 1: "EMBEDDING", 2: "LAYERNORM_INPUT", 3: "SAVE_LN_INPUT",
+    4: "COMPUTE_Q", 5: "SAVE_Q", 6: "COMPUTE_K", 7: "SAVE_K", 
+    8: "COMPUTE_V", 9: "SAVE_V", 10: "COMPUTE_SCORES", 11: "SOFTMAX_SCORES", 
+    12: "COMPUTE_ATTN", 13: "ADD_RESIDUAL_1", 14: "LAYERNORM_1", 15: "SAVE_LN1",
+    16: "COMPUTE_FF1", 17: "GELU_FF1", 18: "COMPUTE_FF2",
+    19: "ADD_RESIDUAL_2", 20: "LAYERNORM_2", 21: "COMPUTE_OUTPUT",
+    22: "SOFTMAX_OUTPUT", 23: "DONE_STATE"
+}
+
+# Traced by the recorder: 16 elements of every shared / separated bus and storage matrix
+TRACED_BUSES = ('bus_matrix_a', 'bus_matrix_b', 'mult_matrix_c', 'ln_matrix_c', 'sm_matrix_c', 'gelu_matrix_c')
+TRACED_STORAGE = ('input_matrix', 'ln_input_output', 'working_matrix', 'v_matrix', 'k_matrix', 'ln1_output')
+CONTROL_SIGNALS = ('mult_start', 'mult_done', 'layernorm_start', 'layernorm_done',
+                   'softmax_start', 'softmax_done', 'gelu_start', 'gelu_done')
+
 def q5_10_to_float(val):
     """Convert Q5.10 format to float (signed)"""
     if val >= 32768:  # MSB set = negative
@@ -120,40 +139,6 @@ def check_separated_buses_for_x(dut, cycle_num):
     except Exception as e:
         print(f"  Storage check failed: {e}")
 
-def check_active_output_bus(dut, cycle_num):
-    """Check which output bus is currently active based on state"""
-    try:
-        current_state = int(dut.current_state.value)
-        state_names = {
-            0: "IDLE", 1: "EMBEDDING", 2: "LAYERNORM_INPUT", 3: "SAVE_LN_INPUT",
-            4: "COMPUTE_Q", 5: "SAVE_Q", 6: "COMPUTE_K", 7: "SAVE_K", 
-            8: "COMPUTE_V", 9: "SAVE_V", 10: "COMPUTE_SCORES", 11: "SOFTMAX_SCORES", 
-            12: "COMPUTE_ATTN", 13: "ADD_RESIDUAL_1", 14: "LAYERNORM_1", 15: "SAVE_LN1",
-            16: "COMPUTE_FF1", 17: "GELU_FF1", 18: "COMPUTE_FF2",
-            19: "ADD_RESIDUAL_2", 20: "LAYERNORM_2", 21: "COMPUTE_OUTPUT",
-            22: "SOFTMAX_OUTPUT", 23: "DONE_STATE"
-        }
-        
-        # Determine which output bus should be active
-        active_bus = "none"
-        if current_state in [4, 6, 8, 10, 12, 16, 18, 21]:  # COMPUTE states
-            active_bus = "mult_matrix_c"
-        elif current_state in [2, 14, 20]:  # LAYERNORM states
-            active_bus = "ln_matrix_c"  
-        elif current_state in [11, 22]:  # SOFTMAX states
-            active_bus = "sm_matrix_c"
-        elif current_state == 17:  # GELU state
-            active_bus = "gelu_matrix_c"
-            
-        state_name = state_names.get(current_state, f"UNK({current_state})")
-        print(f"  Active state: {state_name} → Expected active bus: {active_bus}")
-        
-        return active_bus
-        
-    except Exception as e:
-        print(f"  Cannot determine active bus: {e}")
-        return "unknown"
-
 @cocotb.test() 
 async def test_separated_bus_monitoring(dut):
     """Monitor separated bus activity cycle by cycle with proper Q5.10 handling"""
@@ -183,8 +168,7 @@ async def test_separated_bus_monitoring(dut):
     
     # Set input tokens
     test_tokens = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
-    for i in range(16):
-        getattr(dut, f'input_tokens_{i}').value = test_tokens[i]
+    port_family(dut, 'input_tokens_', 16).write_words(test_tokens)
     
     print(f"\nSet input tokens: {test_tokens}")
     
@@ -203,66 +187,27 @@ async def test_separated_bus_monitoring(dut):
     
     print("\nStarting GPT-2 pipeline with separated bus monitoring...")
     
-    # Start and monitor every 2 cycles + key transition cycles
+    # Start; the recorder snapshots the buses only on state / control changes
     dut.start.value = 1
     await RisingEdge(dut.clk)
     dut.start.value = 0
     
-    cycles = 0
-    key_states = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 22, 23]  # All major states
+    recorder = TraceRecorder(
+        dut.current_state,
+        groups={name: bind_elements(dut, name, 16) for name in TRACED_BUSES + TRACED_STORAGE},
+        controls={name: getattr(dut, name) for name in CONTROL_SIGNALS if hasattr(dut, name)},
+        capacity=1024,
+        exclusive=(('mult_start', 'layernorm_start', 'softmax_start', 'gelu_start'),
+                   ('mult_done', 'layernorm_done', 'softmax_done', 'gelu_done')))
     
+    cycles = 0
     while cycles < 500 and not dut.done.value:  # Increased timeout for safety
         await RisingEdge(dut.clk)
         cycles += 1
-        
-        try:
-            current_state = int(dut.current_state.value)
-            state_names = {
-                0: "IDLE", 1: "EMBEDDING", 2: "LAYERNORM_INPUT", 3: "SAVE_LN_INPUT",
-                4: "COMPUTE_Q", 5: "SAVE_Q", 6: "COMPUTE_K", 7: "SAVE_K", 
-                8: "COMPUTE_V", 9: "SAVE_V", 10: "COMPUTE_SCORES", 11: "SOFTMAX_SCORES", 
-                12: "COMPUTE_ATTN", 13: "ADD_RESIDUAL_1", 14: "LAYERNORM_1", 15: "SAVE_LN1",
-                16: "COMPUTE_FF1", 17: "GELU_FF1", 18: "COMPUTE_FF2",
-                19: "ADD_RESIDUAL_2", 20: "LAYERNORM_2", 21: "COMPUTE_OUTPUT",
-                22: "SOFTMAX_OUTPUT", 23: "DONE_STATE"
-            }
-            state_name = state_names.get(current_state, f"UNK({current_state})")
-            
-            # Check separated buses every 2 cycles or during key states
-            if cycles % 2 == 0 or current_state in key_states:
-                print(f"\nCycle {cycles}: State = {state_name}")
-                check_separated_buses_for_x(dut, cycles)
-                active_bus = check_active_output_bus(dut, cycles)
-                
-                # Check module control signals
-                try:
-                    mult_start = safe_read_signal(dut.mult_start, "mult_start")
-                    mult_done = safe_read_signal(dut.mult_done, "mult_done")
-                    layernorm_start = safe_read_signal(dut.layernorm_start, "layernorm_start")
-                    layernorm_done = safe_read_signal(dut.layernorm_done, "layernorm_done")
-                    softmax_start = safe_read_signal(dut.softmax_start, "softmax_start")
-                    softmax_done = safe_read_signal(dut.softmax_done, "softmax_done")
-                    gelu_start = safe_read_signal(dut.gelu_start, "gelu_start")
-                    gelu_done = safe_read_signal(dut.gelu_done, "gelu_done")
-                    
-                    print(f"  Control: mult_start={mult_start}, mult_done={mult_done}")
-                    print(f"           ln_start={layernorm_start}, ln_done={layernorm_done}")
-                    print(f"           sm_start={softmax_start}, sm_done={softmax_done}")
-                    print(f"           gelu_start={gelu_start}, gelu_done={gelu_done}")
-                    
-                    # Highlight race condition elimination
-                    if mult_start == 1 and layernorm_start == 1:
-                        print("  ⚠️  WARNING: Multiple starts detected!")
-                    if mult_done == 1 and layernorm_done == 1:
-                        print("  ⚠️  WARNING: Multiple done signals!")
-                    if active_bus != "none":
-                        print(f"  ✅ Active output bus: {active_bus}")
-                        
-                except:
-                    print("  Control signals not accessible")
-            
-        except Exception as e:
-            print(f"Cycle {cycles}: State read error: {e}")
+        recorder.record(cycles)
+    
+    print("\n=== Bus Trace Summary ===")
+    recorder.print_summary(STATE_NAMES)
     
     # Final output check with separated wires
     print(f"\n=== Final Output Analysis (Cycle {cycles}) ===")
@@ -276,9 +221,10 @@ async def test_separated_bus_monitoring(dut):
         prob_sum = 0.0
         
         print("Output probabilities (from sm_matrix_c):")
+        prob_signals = port_family(dut, 'output_prob_', 16).handles
         for i in range(16):
             try:
-                prob_signal = getattr(dut, f'output_prob_{i}')
+                prob_signal = prob_signals[i]
                 val = safe_read_signal(prob_signal, f"prob_{i}")
                 
                 if val == "X/Z":
@@ -317,16 +263,7 @@ async def test_separated_bus_monitoring(dut):
         print("🔍 Final state analysis:")
         try:
             final_state = int(dut.current_state.value)
-            state_names = {
-                0: "IDLE", 1: "EMBEDDING", 2: "LAYERNORM_INPUT", 3: "SAVE_LN_INPUT",
-                4: "COMPUTE_Q", 5: "SAVE_Q", 6: "COMPUTE_K", 7: "SAVE_K", 
-                8: "COMPUTE_V", 9: "SAVE_V", 10: "COMPUTE_SCORES", 11: "SOFTMAX_SCORES", 
-                12: "COMPUTE_ATTN", 13: "ADD_RESIDUAL_1", 14: "LAYERNORM_1", 15: "SAVE_LN1",
-                16: "COMPUTE_FF1", 17: "GELU_FF1", 18: "COMPUTE_FF2",
-                19: "ADD_RESIDUAL_2", 20: "LAYERNORM_2", 21: "COMPUTE_OUTPUT",
-                22: "SOFTMAX_OUTPUT", 23: "DONE_STATE"
-            }
-            final_state_name = state_names.get(final_state, f"UNK({final_state})")
+            final_state_name = STATE_NAMES.get(final_state, f"UNK({final_state})")
             print(f"  Final state: {final_state_name}")
             check_separated_buses_for_x(dut, cycles)
         except Exception as e:
@@ -0,0 +1,179 @@
+"""
+Event-driven trace recorder for long cocotb simulations
+
+Printing a hundred stringified signals every other cycle dominates the
+runtime of the full-system test and buries the interesting lines. The
+recorder instead:
+    - binds every traced handle once (groups of bus / storage elements plus
+      a few scalar control signals)
+    - each cycle reads only the FSM state and the control signals; a full
+      snapshot of the groups is taken only when one of those changes
+      (state transition, start / done pulse)
+    - stores snapshots in a preallocated NumPy ring buffer; X/Z values are
+      stored as -1 (value.is_resolvable, no string conversion), so X/Z
+      checks are a vectorized `values < 0` mask
+    - counts conflicting control pulses as each snapshot is taken, so
+      they survive the ring buffer wrapping
+    - summarizes at the end: state timeline, X/Z counts per group,
+      conflicting control pulses
+
+Usage:
+    recorder = TraceRecorder(dut.current_state, groups={'bus_a': bind_elements(dut, 'bus_matrix_a')},
+                             controls={'mult_done': dut.mult_done})
+    while not dut.done.value:
+        await RisingEdge(dut.clk)
+        cycle += 1
+        recorder.record(cycle)
+    recorder.print_summary(state_names)
+"""
+
+import numpy as np
+
+UNRESOLVED = -1
+
+def read_int(handle):
+    """Integer value of a handle, UNRESOLVED for X/Z (no string conversion)"""
+    value = handle.value
+    resolvable = getattr(value, 'is_resolvable', None)
+    if resolvable is None:
+        resolvable = not any(c in str(value).lower() for c in 'xz')
+    return int(value) if resolvable else UNRESOLVED
+
+def bind_elements(dut, name, count=16):
+    """Handles of name[0] .. name[count-1], or None if the DUT has no such signal"""
+    array = getattr(dut, name, None)
+    if array is None:
+        return None
+    try:
+        return [array[i] for i in range(count)]
+    except (IndexError, KeyError, TypeError, AttributeError):
+        return None
+
+class TraceRecorder:
+    """
+    Change-triggered snapshots of grouped signals in a ring buffer
+
+    Args:
+        state: FSM state handle (read every cycle)
+        groups: {group name: list of element handles} snapshotted on change
+                (None entries are skipped)
+        controls: {name: scalar handle} read every cycle; a change in any
+                  of them (or the state) triggers a snapshot
+        capacity: snapshots kept (oldest are overwritten)
+        exclusive: tuples of control names that should never be 1 together
+    """
+
+    def __init__(self, state, groups, controls=None, capacity=1024, exclusive=()):
+        self.state = state
+        self.groups = {name: handles for name, handles in groups.items() if handles}
+        self.controls = dict(controls or {})
+        self.capacity = capacity
+        self.exclusive = [tuple(names) for names in exclusive]
+
+        self._watch = [state] + list(self.controls.values())
+        self._handles = [h for handles in self.groups.values() for h in handles]
+        self.columns = {}
+        start = 0
+        for name, handles in self.groups.items():
+            self.columns[name] = slice(start, start + len(handles))
+            start += len(handles)
+        self.control_index = {name: i for i, name in enumerate(self.controls)}
+        # watch columns of each exclusive tuple (column 0 is the state)
+        self._exclusive_columns = [[1 + self.control_index[name] for name in names if name in self.control_index]
+                                   for names in self.exclusive]
+        self.conflict_counts = dict.fromkeys(self.exclusive, 0)
+
+        self.cycles = np.zeros(capacity, dtype=np.int64)
+        self.watch = np.zeros((capacity, len(self._watch)), dtype=np.int64)    # state, controls
+        self.values = np.zeros((capacity, len(self._handles)), dtype=np.int64)
+        self.count = 0
+        self.cycles_seen = 0
+        self._last = None
+
+    def record(self, cycle):
+        """Read the watched signals; snapshot everything if any changed. Returns True on a snapshot"""
+        self.cycles_seen = cycle
+        watch = [read_int(h) for h in self._watch]
+        if watch == self._last:
+            return False
+        self._last = watch
+        slot = self.count % self.capacity
+        self.cycles[slot] = cycle
+        self.watch[slot] = watch
+        self.values[slot] = [read_int(h) for h in self._handles]
+        self.count += 1
+        for names, columns in zip(self.exclusive, self._exclusive_columns):
+            if sum(watch[i] == 1 for i in columns) > 1:
+                self.conflict_counts[names] += 1
+        return True
+
+    def _ordered(self, array):
+        """Buffer contents oldest first"""
+        n = min(self.count, self.capacity)
+        if self.count <= self.capacity:
+            return array[:n]
+        return np.roll(array, -(self.count % self.capacity), axis=0)
+
+    def summary(self):
+        """
+        Summary of the kept snapshots
+
+        Returns:
+            dictionary with 'snapshots', 'dropped', 'cycles', 'timeline'
+            [(cycle, state)], per-group X/Z stats ('xz': {group: {'samples_with_xz',
+            'max_xz', 'final_xz', 'last_xz_cycle'}}) and 'conflicts'
+            {control tuple: number of snapshots with more than one asserted,
+            counted as they are taken, so dropped snapshots still count}
+        """
+        cycles = self._ordered(self.cycles)
+        watch = self._ordered(self.watch)
+        values = self._ordered(self.values)
+        states = watch[:, 0]
+
+        entered = np.flatnonzero(np.r_[True, states[1:] != states[:-1]]) if len(states) else []
+        timeline = [(int(cycles[i]), int(states[i])) for i in entered]
+
+        unresolved = values < 0
+        xz = {}
+        for name, columns in self.columns.items():
+            per_sample = unresolved[:, columns].sum(axis=1)
+            with_xz = np.flatnonzero(per_sample)
+            xz[name] = {
+                'elements': columns.stop - columns.start,
+                'samples_with_xz': int(len(with_xz)),
+                'max_xz': int(per_sample.max()) if len(per_sample) else 0,
+                'final_xz': int(per_sample[-1]) if len(per_sample) else 0,
+                'last_xz_cycle': int(cycles[with_xz[-1]]) if len(with_xz) else None,
+            }
+
+        return {
+            'snapshots': self.count,
+            'dropped': max(0, self.count - self.capacity),
+            'cycles': self.cycles_seen,
+            'timeline': timeline,
+            'xz': xz,
+            'conflicts': dict(self.conflict_counts),
+        }
+
+    def print_summary(self, state_names=None):
+        s = self.summary()
+        state_names = state_names or {}
+        print(f"Trace: {s['snapshots']} snapshots over {s['cycles']} cycles"
+              + (f" ({s['dropped']} oldest dropped)" if s['dropped'] else ""))
+
+        print("State timeline (entry cycle → dwell):")
+        timeline = s['timeline'] + [(s['cycles'], None)]
+        for (cycle, state), (next_cycle, _) in zip(timeline, timeline[1:]):
+            name = state_names.get(state, f"UNK({state})") if state != UNRESOLVED else "X/Z"
+            print(f"  {cycle:4d}  {name:<16} {next_cycle - cycle:4d} cycles")
+
+        print("X/Z per group (snapshots with X/Z, worst, at end, last seen):")
+        for name, g in s['xz'].items():
+            flag = "✅" if g['final_xz'] == 0 else "❌"
+            last = g['last_xz_cycle'] if g['last_xz_cycle'] is not None else '-'
+            print(f"  {flag} {name:<12} {g['samples_with_xz']:4d}  {g['max_xz']:2d}/{g['elements']}  "
+                  f"{g['final_xz']:2d}/{g['elements']}  {last}")
+
+        for names, n in s['conflicts'].items():
+            status = "✅ none" if n == 0 else f"⚠️  {n} snapshots"
+            print(f"  Simultaneous {'/'.join(names)}: {status}")
@@ -0,0 +1,226 @@
+"""
+Integer emulator of the tiny_gpt2_top datapath with clean handshakes
+
+Integer-only NumPy model of every FSM state in rtl/tiny_gpt2_top.v,
+vectorized over a batch of sequences. Unlike the golden model in
+new_benchmark.py (float64 rounded to Q5.10), each stage uses the RTL
+units' integer arithmetic:
+    mac_unit.v               - product >>> 10 before a 32-bit accumulate,
+                               result = accum[15:0] (wraps, no saturation)
+    systolic_pe.v            - clear tied low: PE accumulators persist
+                               across matmuls (only rst_n resets them)
+    matrix_mult_16x16.v      - matrix_b is consumed column-major,
+                               so C = A @ B_rowmajor.T
+    softmax_frontend/backend - exp LUT on x[15:8], no max subtraction,
+                               (exp * 1024) / sum saturated to 16 bits
+    layernorm_*              - 19-bit mean tree, sq[31:10] variance terms,
+                               +1 epsilon, two Newton steps from a LUT seed
+    gelu_matrix_processor    - GELU ROM on x[15:8]
+
+Only the datapath is modelled: each FSM state is assumed to receive the
+operands it is meant to, i.e. the clean-handshake schedule of
+hardware_perf_model.state_cycles. The current RTL does not follow that
+schedule: its stale mult_done / softmax done flags
+(hardware_perf_model.stale_handshake_cycles) let COMPUTE_K,
+COMPUTE_SCORES and SOFTMAX_OUTPUT exit after one cycle, so SAVE_K and
+the states after them pick up an earlier unit's result. Until the
+handshakes are fixed the RTL's output therefore differs from this
+emulator, which is what the datapath computes once they are.
+All tensors are int16 Q5.10 codes; see q5_10.py for conversions.
+"""
+
+import numpy as np
+
+import q5_10
+import rtl_luts
+from weight_store import WEIGHT_RAM_LAYOUT, ram_from_weights
+
+SEQ_LEN = 16
+D_MODEL = 16
+VOCAB_SIZE = 16
+
+LN_GAMMA = 0x0400                                 # 1.0, as wired in tiny_gpt2_top
+LN_BETA = 0x0000
+NEWTON_THREE_HALVES = 0x0C00                      # 3.0 in Q5.10 (shifted by 11 = *1/2)
+
+# ===== INTEGER HELPERS =====
+
+def _wrap(x, bits):
+    """Two's complement wrap of a wide int array to `bits` bits (kept as int64)"""
+    half = 1 << (bits - 1)
+    return ((x + half) & ((1 << bits) - 1)) - half
+
+def wrap16(x):
+    """Truncate to a 16-bit register: keep x[15:0] as signed"""
+    return np.asarray(x, dtype=np.int64).astype(np.int16)
+
+def _high_byte(x):
+    """LUT address x[15:8] of a 16-bit word"""
+    return np.asarray(x, dtype=np.int16).view(np.uint16) >> 8
+
+# ===== DATAPATH BLOCKS =====
+
+def matrix_mult(a, b, accum=None):
+    """
+    matrix_mult_16x16: C = A @ B.T with mac_unit arithmetic
+
+    Args:
+        a: int16 [..., 16, 16] (matrix_a, row-major)
+        b: int16 [..., 16, 16] (matrix_b as driven on the bus, read column-major)
+        accum: int32 [..., 16, 16] PE accumulator state, or None for freshly reset PEs
+
+    Returns:
+        (c int16 [..., 16, 16], updated int32 accumulator state)
+    """
+    products = a[..., :, np.newaxis, :].astype(np.int32) * b[..., np.newaxis, :, :]
+    np.right_shift(products, 10, out=products)    # mult_result >>> 10, per product
+    total = products.sum(axis=-1, dtype=np.int64)
+    if accum is not None:
+        total += accum
+    accum = _wrap(total, 32).astype(np.int32)
+    return accum.astype(np.int16), accum
+
+def softmax_rows(x):
+    """softmax_processor on each 16-element row (LUT exp, integer divide)"""
+    exp_values = rtl_luts.exp_lut()[_high_byte(x)].astype(np.int64)
+    exp_sum = exp_values.sum(axis=-1, keepdims=True)          # 16 x 16-bit fits the 20-bit adder tree
+    quotient = np.floor_divide(exp_values * 1024, np.maximum(exp_sum, 1))
+    quotient = np.where(exp_sum == 0, 0, np.minimum(quotient, 0xFFFF))
+    return quotient.astype(np.uint16).view(np.int16)
+
+def gelu(x):
+    """gelu_matrix_processor: ROM lookup on x[15:8]"""
+    return rtl_luts.gelu_rom()[_high_byte(x)].view(np.int16)
+
+def inv_sqrt_newton(variance):
+    """inv_sqrt_newton: LUT seed + two Newton steps x' = x * (3 - v*x^2) / 2"""
+    variance = np.asarray(variance, dtype=np.int64)
+    x = rtl_luts.inv_sqrt_initial_guess()[_high_byte(variance.astype(np.int16))].view(np.int16).astype(np.int64)
+    for _ in range(2):
+        x_sq = wrap16((x * x) >> 10).astype(np.int64)
+        v_x_sq = wrap16((variance * x_sq) >> 10).astype(np.int64)
+        term = wrap16(NEWTON_THREE_HALVES - v_x_sq).astype(np.int64)
+        x = wrap16((x * term) >> 11).astype(np.int64)
+    return x
+
+def layernorm_rows(x, gamma=LN_GAMMA, beta=LN_BETA):
+    """layernorm_pipeline on each 16-element row (preprocess -> inv sqrt -> postprocess)"""
+    x = np.asarray(x, dtype=np.int64)
+    mean_sum = _wrap(x.sum(axis=-1, keepdims=True), 19)
+    mean = wrap16(mean_sum >> 4).astype(np.int64)
+    diff = wrap16(x - mean).astype(np.int64)
+    sq_terms = (diff * diff) >> 10                  # diff_squared[31:10]
+    var_sum = sq_terms.sum(axis=-1, keepdims=True) >> 4
+    variance = wrap16((var_sum & 0xFFFF) + 1).astype(np.int64)
+    inv_sigma = inv_sqrt_newton(variance)
+    normalized = wrap16((diff * inv_sigma) >> 10).astype(np.int64)
+    scaled = wrap16((normalized * gamma) >> 10).astype(np.int64)
+    return wrap16(scaled + beta)
+
+# ===== WEIGHT RAM =====
+# RAM images come from weight_store (load_weight_ram for the RTL hex file,
+# ram_from_weights for a golden-model weights dict)
+
+def _ram_block(weight_ram, name):
+    start, end = WEIGHT_RAM_LAYOUT[name]
+    return np.asarray(weight_ram[start:end], dtype=np.int16).reshape(D_MODEL, D_MODEL)
+
+# ===== TOP-LEVEL FSM =====
+
+def tiny_gpt2_rtl_emulator(input_tokens, weight_ram, clear_accumulators=False, chunk_size=512):
+    """
+    Run the tiny_gpt2_top state sequence on a batch of sequences
+
+    Args:
+        input_tokens: [B, 16] (or [16]) token ids 0-15
+        weight_ram: int16 [1792] weight RAM image (weight_store layout)
+        clear_accumulators: reset PE accumulators before every matmul;
+                            False matches the RTL (clear tied low)
+        chunk_size: sequences per chunk (bounds the [chunk, 16, 16, 16] product buffer)
+
+    Returns:
+        (output_probs int16 [B, 16], dict of int16 intermediates keyed by FSM state)
+    """
+    tokens = np.asarray(input_tokens)
+    single = tokens.ndim == 1
+    tokens = np.atleast_2d(tokens)
+    batch_size = tokens.shape[0]
+
+    w_q, w_k, w_v = (_ram_block(weight_ram, n) for n in ('w_q', 'w_k', 'w_v'))
+    w_ff1, w_ff2, w_out = (_ram_block(weight_ram, n) for n in ('w_ff1', 'w_ff2', 'w_out'))
+    embedding = _ram_block(weight_ram, 'embedding')
+
+    states = ('EMBEDDING', 'LAYERNORM_INPUT', 'COMPUTE_Q', 'COMPUTE_K', 'COMPUTE_V',
+              'COMPUTE_SCORES', 'SOFTMAX_SCORES', 'COMPUTE_ATTN', 'ADD_RESIDUAL_1', 'LAYERNORM_1',
+              'COMPUTE_FF1', 'GELU_FF1', 'COMPUTE_FF2', 'ADD_RESIDUAL_2', 'LAYERNORM_2',
+              'COMPUTE_OUTPUT', 'SOFTMAX_OUTPUT')
+    intermediates = {s: np.empty((batch_size, SEQ_LEN, D_MODEL), dtype=np.int16) for s in states}
+
+    for start in range(0, batch_size, chunk_size):
+        rows = slice(start, start + chunk_size)
+        accum = None
+        def mult(a, b):
+            nonlocal accum
+            c, new_accum = matrix_mult(a, b, None if clear_accumulators else accum)
+            accum = new_accum
+            return c
+
+        # ===== EMBEDDING =====
+        x = embedding[tokens[rows]]
+        # ===== LAYERNORM_INPUT =====
+        ln_input = layernorm_rows(x)
+        # ===== COMPUTE_Q / COMPUTE_K / COMPUTE_V =====
+        Q = mult(ln_input, w_q)
+        K = mult(ln_input, w_k)
+        V = mult(ln_input, w_v)
+        # ===== COMPUTE_SCORES (K^T is driven as matrix_b -> Q @ K) =====
+        scores = mult(Q, np.swapaxes(K, -1, -2))
+        # ===== SOFTMAX_SCORES =====
+        attn_weights = softmax_rows(scores)
+        # ===== COMPUTE_ATTN (V driven as matrix_b -> weights @ V.T) =====
+        attn = mult(attn_weights, V)
+        # ===== ADD_RESIDUAL_1 / LAYERNORM_1 =====
+        residual_1 = wrap16(x.astype(np.int64) + attn)
+        ln1 = layernorm_rows(residual_1)
+        # ===== COMPUTE_FF1 / GELU_FF1 / COMPUTE_FF2 =====
+        ff1 = mult(ln1, w_ff1)
+        gelu_out = gelu(ff1)
+        ff2 = mult(gelu_out, w_ff2)
+        # ===== ADD_RESIDUAL_2 / LAYERNORM_2 =====
+        residual_2 = wrap16(ln1.astype(np.int64) + ff2)
+        ln2 = layernorm_rows(residual_2)
+        # ===== COMPUTE_OUTPUT / SOFTMAX_OUTPUT =====
+        logits = mult(ln2, w_out)
+        probs = softmax_rows(logits)
+
+        for state, value in zip(states, (x, ln_input, Q, K, V, scores, attn_weights, attn,
+                                         residual_1, ln1, ff1, gelu_out, ff2, residual_2,
+                                         ln2, logits, probs)):
+            intermediates[state][rows] = value
+
+    output_probs = intermediates['SOFTMAX_OUTPUT'][:, 0, :]   # output_probs_* = row 0
+    if single:
+        return output_probs[0], {k: v[0] for k, v in intermediates.items()}
+    return output_probs, intermediates
+
+if __name__ == "__main__":
+    import time
+    from new_benchmark import create_hardware_weights
+
+    print("🔧 TinyGPT-2 RTL Integer Emulator")
+    print("=" * 50)
+
+    weight_ram = ram_from_weights(create_hardware_weights())
+    test_tokens = np.arange(16)
+    probs, _ = tiny_gpt2_rtl_emulator(test_tokens, weight_ram)
+    print(f"Input tokens: {test_tokens}")
+    print(f"Output codes: {[f'0x{int(v) & 0xFFFF:04X}' for v in probs]}")
+    print(f"Output probs: {q5_10.from_codes(probs)}")
+
+    num_sequences = 10000
+    batch_tokens = np.random.randint(0, VOCAB_SIZE, size=(num_sequences, SEQ_LEN))
+    start_time = time.time()
+    tiny_gpt2_rtl_emulator(batch_tokens, weight_ram)
+    elapsed = time.time() - start_time
+    print(f"\n⚡ Emulated {num_sequences} sequences in {elapsed:.3f}s "
+          f"({num_sequences / elapsed:.0f} seq/sec)")
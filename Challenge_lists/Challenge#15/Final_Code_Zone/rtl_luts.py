@@ -0,0 +1,65 @@
+"""
+ROM / LUT contents of the RTL, read straight from the Verilog sources
+
+Single source of truth for the tables the hardware uses, so software
+models never drift from the RTL:
+    exp LUT      - softmax_frontend.v      exp_lut_rom[0:255]
+    GELU ROM     - gelu_matrix_processor.v gelu_rom[0:255]
+    1/sqrt guess - inv_sqrt_newton.v       get_initial_guess() casez table
+
+All three are indexed by the high byte of a Q5.10 word (x[15:8]).
+Tables are returned as read-only uint16 arrays of raw 16-bit words.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+RTL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rtl')
+
+_EXP_LUT_PATTERN = re.compile(r"exp_lut_rom\[\s*(\d+)\]\s*=\s*16'h([0-9A-Fa-f]{4})")
+_GELU_ROM_PATTERN = re.compile(r"assign\s+gelu_rom\[\s*(\d+)\]\s*=\s*16'h([0-9A-Fa-f]{4})")
+_GUESS_CASE_PATTERN = re.compile(r"8'h([0-9A-Fa-f]{2})\s*:\s*get_initial_guess\s*=\s*16'h([0-9A-Fa-f]{4})")
+_GUESS_DEFAULT_PATTERN = re.compile(r"default\s*:\s*get_initial_guess\s*=\s*16'h([0-9A-Fa-f]{4})")
+
+def _read_rtl(filename, rtl_dir):
+    with open(os.path.join(rtl_dir, filename)) as f:
+        return f.read()
+
+def _indexed_rom(pattern, source, filename):
+    """Collect `rom[index] = 16'hXXXX` entries into a 256-entry table"""
+    table = np.full(256, -1, dtype=np.int32)
+    for index, word in pattern.findall(source):
+        table[int(index)] = int(word, 16)
+    if np.any(table < 0):
+        missing = np.flatnonzero(table < 0)
+        raise ValueError(f"{filename}: ROM entries missing for addresses {missing[:8].tolist()}...")
+    table = table.astype(np.uint16)
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=None)
+def exp_lut(rtl_dir=RTL_DIR):
+    """256-entry exp LUT of softmax_frontend.v (address = x[15:8])"""
+    return _indexed_rom(_EXP_LUT_PATTERN, _read_rtl('softmax_frontend.v', rtl_dir), 'softmax_frontend.v')
+
+@lru_cache(maxsize=None)
+def gelu_rom(rtl_dir=RTL_DIR):
+    """256-entry GELU ROM of gelu_matrix_processor.v (address = x[15:8])"""
+    return _indexed_rom(_GELU_ROM_PATTERN, _read_rtl('gelu_matrix_processor.v', rtl_dir), 'gelu_matrix_processor.v')
+
+@lru_cache(maxsize=None)
+def inv_sqrt_initial_guess(rtl_dir=RTL_DIR):
+    """Newton seed table of inv_sqrt_newton.v expanded to 256 entries (address = variance[15:8])"""
+    source = _read_rtl('inv_sqrt_newton.v', rtl_dir)
+    function_body = source[source.index('function [15:0] get_initial_guess'):source.index('endfunction')]
+    default = _GUESS_DEFAULT_PATTERN.search(function_body)
+    if default is None:
+        raise ValueError("inv_sqrt_newton.v: get_initial_guess has no default entry")
+    table = np.full(256, int(default.group(1), 16), dtype=np.uint16)
+    for address, word in _GUESS_CASE_PATTERN.findall(function_body):
+        table[int(address, 16)] = int(word, 16)
+    table.flags.writeable = False
+    return table
@@ -0,0 +1,213 @@
+"""
+Saturation / overflow telemetry for the Q5.10 quantization points
+
+float_to_q5_10 clips to [-32, 31.999] without a trace. A SaturationMonitor
+passed as `stage_timer` to tiny_gpt2_hardware_model(_batch) (quantized=True)
+sees every value just before its Q5.10 snap and counts, per FSM state:
+    - elements snapped, and how many were clipped high / low
+    - near-saturation histogram: elements with |x| in [32/2^k, 32/2^(k-1))
+      for k = NEAR_BITS..1, i.e. within k bits of the rail (per band, not
+      cumulative: [4, 8), [8, 16), [16, 32))
+    - min / max observed before clipping
+and from those the headroom in bits, which is what an RTL scaling decision
+(pre-shift of Q.K^T, FF1 output scale) needs.
+
+Per call the cost is a min and a max over the array; the histogram passes
+only run when the values actually reach the top NEAR_BITS bits. Counters
+accumulate across batches until reset().
+
+The per-token stages (EMBEDDING .. COMPUTE_V) are gathered from tables
+built once per weight set, so they are checked once with
+check_token_tables(). The int16 policy saturates inside q5_10.saturate_codes
+and calls no quantizer, so the monitor raises ValueError for it (and for
+unquantized runs); run the float64 Q5.10 path (bit-identical to int16)
+to collect telemetry. The float32 path also works, but it can differ from
+the int16 path by 1 LSB.
+"""
+
+import math
+
+import numpy as np
+
+import q5_10
+from new_benchmark import PIPELINE_STATES, _no_stage, dtype_ops, quantize_q5_10
+
+NEAR_BITS = 3          # histogram the top 3 bits below the rail (|x| >= 4.0)
+RAIL = -q5_10.MIN_VALUE  # 32.0
+NEAR_EDGES = RAIL / 2.0 ** np.arange(NEAR_BITS, 0, -1)   # [4, 8, 16]
+NEAR_BANDS = [f"[{lo:g},{hi:g})" for lo, hi in zip(NEAR_EDGES, np.r_[NEAR_EDGES[1:], RAIL])]
+
+class _StageCounters:
+    __slots__ = ('calls', 'elements', 'saturated_high', 'saturated_low', 'near', 'min', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.elements = 0
+        self.saturated_high = 0
+        self.saturated_low = 0
+        self.near = np.zeros(NEAR_BITS, dtype=np.int64)
+        self.min = math.inf
+        self.max = -math.inf
+
+class SaturationMonitor:
+    """
+    Counts saturation at every Q5.10 quantization point of the golden model
+
+    Usage:
+        monitor = SaturationMonitor()
+        for tokens in batches:
+            tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True,
+                                           capture=None, stage_timer=monitor)
+        monitor.print_report()
+
+    Args:
+        inner: optional other stage_timer (e.g. a StageProfiler) whose
+               stage() / quantize() / begin_batch() are still called
+    """
+
+    def __init__(self, inner=None):
+        self.inner = inner
+        self.reset()
+
+    def reset(self):
+        self.counters = {name: _StageCounters() for name in PIPELINE_STATES}
+        self.current = None
+
+    # ----- hooks called by the model -----
+
+    def begin_batch(self, batch_size, quantized=False, dtype=None):
+        """Reject runs that never call quantize(), which would report nothing"""
+        if dtype == 'int16':
+            raise ValueError("SaturationMonitor sees no quantization points under the int16 policy "
+                             "(it saturates inside q5_10.saturate_codes); run dtype='float64' with "
+                             "quantized=True, which is bit-identical")
+        if not quantized:
+            raise ValueError("SaturationMonitor needs quantized=True: an unquantized run "
+                             "has no Q5.10 quantization points")
+        if self.inner is not None and hasattr(self.inner, 'begin_batch'):
+            self.inner.begin_batch(batch_size, quantized=quantized, dtype=dtype)
+
+    def stage(self, name):
+        self.current = name
+        return _no_stage(name) if self.inner is None else self.inner.stage(name)
+
+    def quantize(self, arr):
+        """Record arr against the current state, then snap it to Q5.10 in place"""
+        self.observe(self.current, arr)
+        if self.inner is not None and hasattr(self.inner, 'quantize'):
+            return self.inner.quantize(arr)
+        return quantize_q5_10(arr, out=arr)
+
+    def observe(self, name, arr):
+        """Accumulate the counters of state `name` for values about to be quantized"""
+        c = self.counters.get(name)
+        if c is None:
+            c = self.counters[name] = _StageCounters()
+        lo, hi = float(arr.min()), float(arr.max())
+        c.calls += 1
+        c.elements += arr.size
+        c.min = min(c.min, lo)
+        c.max = max(c.max, hi)
+        if max(hi, -lo) < NEAR_EDGES[0]:
+            return                              # common case: far from the rail
+        if hi > q5_10.MAX_VALUE:
+            c.saturated_high += int(np.count_nonzero(arr > q5_10.MAX_VALUE))
+        if lo < q5_10.MIN_VALUE:
+            c.saturated_low += int(np.count_nonzero(arr < q5_10.MIN_VALUE))
+        magnitude = np.abs(arr)
+        at_least = [np.count_nonzero(magnitude >= edge) for edge in NEAR_EDGES]
+        at_least.append(np.count_nonzero(magnitude >= RAIL))
+        c.near += np.diff(-np.array(at_least, dtype=np.int64))
+
+    # ----- results -----
+
+    def report(self):
+        """
+        Per-state telemetry, in FSM order (states never observed are skipped)
+
+        Returns:
+            {state: {'elements', 'saturated', 'saturated_high', 'saturated_low',
+                     'saturation_rate', 'near_saturation' ({'[4,8)': n, ...},
+                     elements per |x| band, not cumulative),
+                     'min', 'max', 'headroom_bits'}}
+            headroom_bits = log2(32 / max|x|): negative means the stage
+            needs that many more integer bits (or a right shift)
+        """
+        report = {}
+        for name, c in self.counters.items():
+            if c.calls == 0:
+                continue
+            peak = max(abs(c.min), abs(c.max))
+            saturated = c.saturated_high + c.saturated_low
+            report[name] = {
+                'elements': c.elements,
+                'saturated': saturated,
+                'saturated_high': c.saturated_high,
+                'saturated_low': c.saturated_low,
+                'saturation_rate': saturated / c.elements if c.elements else 0.0,
+                'near_saturation': dict(zip(NEAR_BANDS, c.near.tolist())),
+                'min': c.min,
+                'max': c.max,
+                'headroom_bits': math.log2(RAIL / peak) if peak > 0 else math.inf,
+            }
+        return report
+
+    def print_report(self):
+        report = self.report()
+        near_labels = [f"|x|{band}" for band in NEAR_BANDS]
+        print(f"{'State':<16} {'Elements':>11} {'Saturated':>10} {'Rate':>9} "
+              + " ".join(f"{label:>10}" for label in near_labels)
+              + f" {'min':>9} {'max':>9} {'Headroom':>9}")
+        print("-" * (79 + 11 * NEAR_BITS))
+        for name, r in report.items():
+            near = " ".join(f"{n:>10}" for n in r['near_saturation'].values())
+            print(f"{name:<16} {r['elements']:>11} {r['saturated']:>10} {r['saturation_rate']:>9.2e} "
+                  f"{near} {r['min']:>9.3f} {r['max']:>9.3f} {r['headroom_bits']:>8.2f}b")
+
+def check_token_tables(weights):
+    """
+    Saturation telemetry of the per-token stages (EMBEDDING .. COMPUTE_V)
+
+    Follows build_token_tables(quantized=True) on Q5.10-rounded weights, the
+    tables the int16 path gathers from: each stage is observed just before
+    its snap and fed the snapped output of the previous one. Each table is
+    observed once, so counts are per table entry (16 tokens x 16 features),
+    not per sequence.
+
+    Returns:
+        SaturationMonitor holding only those states
+    """
+    monitor = SaturationMonitor()
+    ops = dtype_ops('float64')
+    embedding = np.array(weights['embedding'], dtype=np.float64).reshape(16, 16)
+    monitor.observe('EMBEDDING', embedding)
+    ln = ops['layernorm'](quantize_q5_10(embedding))
+    monitor.observe('LAYERNORM_INPUT', ln)
+    ln = quantize_q5_10(ln)
+    for state, name in (('COMPUTE_Q', 'w_q'), ('COMPUTE_K', 'w_k'), ('COMPUTE_V', 'w_v')):
+        weight = quantize_q5_10(np.asarray(weights[name], dtype=np.float64))
+        monitor.observe(state, ops['matmul'](ln, weight))
+    return monitor
+
+if __name__ == "__main__":
+    from benchmark_harness import write_json
+    from new_benchmark import create_hardware_weights, tiny_gpt2_hardware_model_batch
+
+    print("🚨 TinyGPT-2 Q5.10 Saturation Telemetry")
+    print("=" * 112)
+
+    rng = np.random.default_rng(0)
+    for label, init_scale in (("init 0.02 (hardware weights)", 1.0), ("weights x40 (stress)", 40.0)):
+        weights = {name: value * init_scale for name, value in create_hardware_weights().items()}
+        weights = {name: quantize_q5_10(value) for name, value in weights.items()}
+        monitor = SaturationMonitor()
+        for _ in range(16):
+            tokens = rng.integers(0, 16, size=(4096, 16))
+            tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None, stage_timer=monitor)
+        print(f"\n📊 {label}: per-token tables")
+        check_token_tables(weights).print_report()
+        print(f"\n📊 {label}: per-batch states, {16 * 4096} sequences")
+        monitor.print_report()
+
+    write_json(monitor.report(), 'saturation_report.json')
+    print("\n💾 Saved saturation_report.json (stress run)")
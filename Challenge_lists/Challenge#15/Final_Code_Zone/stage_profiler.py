@@ -0,0 +1,181 @@
+"""
+Per-stage profiler for the TinyGPT-2 golden model
+
+Stages are named after the tiny_gpt2_top.v FSM states (EMBEDDING ...
+SOFTMAX_OUTPUT), so software costs line up with the per-state hardware
+cycle counts. Pass a StageProfiler as `stage_timer` to
+tiny_gpt2_hardware_model(_batch). For every state it records:
+    wall time          - perf_counter_ns around the state
+    quantization time  - the Q5.10 snap inside the state (quantized runs)
+    FLOPs              - the state's FLOPs (op_accounting, derived from the
+                         executed shapes) x sequences
+    bytes allocated    - tracemalloc peak above the state's entry level,
+                         and bytes still held when the state ends
+
+When no profiler is passed the model uses a shared nullcontext and calls
+the quantizer directly, so the disabled cost is a few attribute lookups.
+"""
+
+import time
+import tracemalloc
+
+import op_accounting
+from new_benchmark import PIPELINE_STATES, quantize_q5_10
+
+class _StageRecord:
+    __slots__ = ('calls', 'sequences', 'wall_ns', 'quant_ns', 'alloc_bytes', 'retained_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.sequences = 0
+        self.wall_ns = 0
+        self.quant_ns = 0
+        self.alloc_bytes = 0
+        self.retained_bytes = 0
+
+class _Stage:
+    """Context manager for one FSM state (reused; stages do not nest)"""
+
+    __slots__ = ('profiler', 'record', 'tracing', 'start_ns', 'start_bytes')
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.tracing = self.profiler.track_memory and tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.reset_peak()
+            self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter_ns() - self.start_ns
+        record = self.record
+        record.calls += 1
+        record.sequences += self.profiler.batch_size
+        record.wall_ns += elapsed
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            record.alloc_bytes += peak - self.start_bytes
+            record.retained_bytes += current - self.start_bytes
+        self.profiler.current = None
+        return False
+
+class StageProfiler:
+    """
+    Wall time / quantization time / FLOPs / allocation profile per FSM state
+
+    Usage:
+        with StageProfiler() as profiler:
+            tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True,
+                                           capture=None, stage_timer=profiler)
+        profiler.print_report()
+
+    Args:
+        track_memory: trace allocations with tracemalloc while the profiler
+                      is entered as a context manager (slows numpy
+                      allocation noticeably; disable for timing-only runs)
+        op_counts: per-sequence op_accounting.stage_op_counts() of the
+                   profiled run (None = float64, unquantized)
+    """
+
+    def __init__(self, track_memory=True, op_counts=None):
+        self.track_memory = track_memory
+        self.op_counts = op_counts
+        self.records = {name: _StageRecord() for name in PIPELINE_STATES}
+        self.batch_size = 1
+        self.current = None
+        self._stage = _Stage(self)
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    # ----- hooks called by the model -----
+
+    def begin_batch(self, batch_size, quantized=False, dtype=None):
+        """Number of sequences processed by the following stages"""
+        self.batch_size = batch_size
+
+    def stage(self, name):
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = _StageRecord()
+        self.current = record
+        self._stage.record = record
+        return self._stage
+
+    def quantize(self, arr):
+        """Q5.10 snap in place, timed against the enclosing stage"""
+        start = time.perf_counter_ns()
+        arr = quantize_q5_10(arr, out=arr)
+        if self.current is not None:
+            self.current.quant_ns += time.perf_counter_ns() - start
+        return arr
+
+    # ----- results -----
+
+    def reset(self):
+        self.records = {name: _StageRecord() for name in PIPELINE_STATES}
+
+    def report(self):
+        """Per-state totals, in FSM order (states never entered are skipped)"""
+        if self.op_counts is None:
+            self.op_counts = op_accounting.stage_op_counts()
+        total_ns = sum(r.wall_ns for r in self.records.values()) or 1
+        report = {}
+        for name, r in self.records.items():
+            if r.calls == 0:
+                continue
+            flops = self.op_counts.get(name, {}).get('flops', 0) * r.sequences
+            report[name] = {
+                'calls': r.calls,
+                'sequences': r.sequences,
+                'wall_us': r.wall_ns / 1e3,
+                'mean_us': r.wall_ns / r.calls / 1e3,
+                'share': r.wall_ns / total_ns,
+                'quant_us': r.quant_ns / 1e3,
+                'flops': flops,
+                'gflops_per_s': flops / r.wall_ns if r.wall_ns else 0.0,
+                'alloc_bytes': r.alloc_bytes,
+                'retained_bytes': r.retained_bytes,
+            }
+        return report
+
+    def print_report(self):
+        report = self.report()
+        print(f"{'State':<16} {'Calls':>6} {'Wall (μs)':>11} {'Share':>7} {'Quant (μs)':>11} "
+              f"{'MFLOP':>8} {'GFLOP/s':>8} {'Alloc (KB)':>11}")
+        print("-" * 86)
+        for name, r in report.items():
+            print(f"{name:<16} {r['calls']:>6} {r['wall_us']:>11.1f} {r['share'] * 100:>6.1f}% "
+                  f"{r['quant_us']:>11.1f} {r['flops'] / 1e6:>8.2f} {r['gflops_per_s']:>8.2f} "
+                  f"{r['alloc_bytes'] / 1024:>11.1f}")
+
+if __name__ == "__main__":
+    import numpy as np
+    from new_benchmark import create_hardware_weights, tiny_gpt2_hardware_model_batch
+
+    print("🔬 TinyGPT-2 Per-State Profile")
+    print("=" * 86)
+
+    weights = create_hardware_weights(quantized=True)
+    tokens = np.random.randint(0, 16, size=(1024, 16))
+    tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None)   # warm token tables
+
+    counts = op_accounting.stage_op_counts(weights, quantized=True)
+    with StageProfiler(op_counts=counts) as profiler:
+        for _ in range(10):
+            tiny_gpt2_hardware_model_batch(tokens, weights, quantized=True, capture=None,
+                                           stage_timer=profiler)
+    profiler.print_report()
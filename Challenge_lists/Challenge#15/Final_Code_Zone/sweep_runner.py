@@ -0,0 +1,206 @@
+"""
+Multiprocess sweep runner for the TinyGPT-2 golden model
+
+Spreads (config, sequence count, seed) tasks over a process pool and
+merges the rows into one table:
+    - the weight sets of every config are packed into one
+      multiprocessing.shared_memory block; workers map read-only views of
+      it instead of receiving pickled copies
+    - workers are spawned with one BLAS thread each, so N workers use N
+      cores instead of oversubscribing them
+    - each task times the model on its own seeded batch and, for quantized
+      configs, measures the probability error against the float model on
+      the same tokens
+    - rows are merged per (config, sequence count) across seeds
+Timings from a loaded pool are relative numbers (workers share caches and
+memory bandwidth); use benchmark_harness.py for single-config latency.
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from benchmark_harness import time_trials
+from new_benchmark import create_hardware_weights, hardware_simulation, tiny_gpt2_hardware_model_batch
+
+# name -> model options; 'hardware' is the analytical cycle model
+SWEEP_CONFIGS = {
+    'float': {'quantized': False, 'dtype': 'float64'},
+    'float32': {'quantized': False, 'dtype': 'float32'},
+    'q5_10': {'quantized': True, 'dtype': 'float64'},
+    'q5_10_int16': {'quantized': True, 'dtype': 'int16'},
+    'hardware': None,
+}
+REFERENCE_CONFIG = 'float'
+_THREAD_ENV = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+def share_weights(weight_sets):
+    """
+    Pack {key: weights dict} into one shared-memory block
+
+    Returns:
+        (SharedMemory, spec) - spec maps key -> name -> (offset, shape, dtype)
+        and is what attach_weights() needs. The caller owns the block and
+        must close() and unlink() it.
+    """
+    spec, offset = {}, 0
+    for key, weights in weight_sets.items():
+        spec[key] = {}
+        for name, value in weights.items():
+            value = np.asarray(value)
+            offset = -(-offset // 8) * 8                 # 8-byte align every array
+            spec[key][name] = (offset, value.shape, value.dtype.str)
+            offset += value.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for key, weights in weight_sets.items():
+        for name, value in weights.items():
+            start, shape, dtype = spec[key][name]
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            view[...] = value
+    return shm, spec
+
+def attach_weights(shm, spec):
+    """Read-only weights dicts viewing a shared-memory block"""
+    weight_sets = {}
+    for key, arrays in spec.items():
+        weight_sets[key] = {}
+        for name, (start, shape, dtype) in arrays.items():
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            view.flags.writeable = False
+            weight_sets[key][name] = view
+    return weight_sets
+
+# Worker state, set once per process by _init_worker
+_WORKER = {}
+
+def _init_worker(shm_name, spec, warmup, trials):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _WORKER.update(shm=shm, weights=attach_weights(shm, spec), warmup=warmup, trials=trials)
+
+def _run_task(task):
+    config_name, num_sequences, seed = task
+    row = {'config': config_name, 'num_sequences': num_sequences, 'seed': seed}
+    options = SWEEP_CONFIGS[config_name]
+    if options is None:
+        hw = hardware_simulation(num_sequences)
+        row.update(time_per_sequence_us=hw['time_per_sequence_us'],
+                   sequences_per_second=hw['sequences_per_second'])
+        return row
+
+    weights = _WORKER['weights'][config_name]
+    tokens = np.random.default_rng(seed).integers(0, 16, size=(num_sequences, 16))
+    probs = None
+
+    def run():
+        nonlocal probs
+        probs, _ = tiny_gpt2_hardware_model_batch(tokens, weights, capture=None, **options)
+
+    samples_ns = time_trials(run, warmup=_WORKER['warmup'], trials=_WORKER['trials'])
+    seconds = float(np.median(samples_ns)) / 1e9
+    row.update(time_per_sequence_us=seconds / num_sequences * 1e6,
+               sequences_per_second=num_sequences / seconds)
+
+    if config_name != REFERENCE_CONFIG:
+        reference, _ = tiny_gpt2_hardware_model_batch(tokens, _WORKER['weights'][REFERENCE_CONFIG],
+                                                      capture=None, **SWEEP_CONFIGS[REFERENCE_CONFIG])
+        error = np.abs(probs.astype(np.float64) - reference)
+        row.update(max_abs_error=float(error.max()), mean_abs_error=float(error.mean()),
+                   argmax_agreement=float(np.mean(probs.argmax(-1) == reference.argmax(-1))))
+    return row
+
+def run_sweep(configs=tuple(SWEEP_CONFIGS), sequence_counts=(1, 2, 4, 8, 16, 32, 64), seeds=range(4),
+              workers=None, warmup=1, trials=5, threads_per_worker=1):
+    """
+    Run every (config, sequence count, seed) task on a process pool
+
+    Args:
+        configs: names from SWEEP_CONFIGS
+        sequence_counts: batch sizes per task
+        seeds: seeds of the input tokens (one task per seed)
+        workers: pool size (None = os.cpu_count())
+        warmup / trials: per-task timing (see benchmark_harness.time_trials)
+        threads_per_worker: BLAS threads in each worker
+
+    Returns:
+        list of per-task rows, sorted by config, sequence count and seed
+    """
+    unknown = [name for name in configs if name not in SWEEP_CONFIGS]
+    if unknown:
+        raise ValueError(f"Unknown config(s) {unknown}; choose from {list(SWEEP_CONFIGS)}")
+    weight_sets = {}
+    for name in set(configs) | {REFERENCE_CONFIG}:
+        options = SWEEP_CONFIGS[name]
+        if options is not None:
+            weight_sets[name] = create_hardware_weights(**options)
+    tasks = [(name, count, seed) for name in configs for count in sequence_counts for seed in seeds]
+    workers = workers or os.cpu_count()
+
+    shm, spec = share_weights(weight_sets)
+    saved_env = {key: os.environ.get(key) for key in _THREAD_ENV}
+    try:
+        # Spawned workers read the BLAS thread count from the environment at start-up
+        for key in _THREAD_ENV:
+            os.environ[key] = str(threads_per_worker)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(shm.name, spec, warmup, trials)) as pool:
+            rows = pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (8 * workers)))
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shm.close()
+        shm.unlink()
+    return sorted(rows, key=lambda row: (row['config'], row['num_sequences'], row['seed']))
+
+def merge_results(rows):
+    """One row per (config, sequence count): medians of throughput, worst-case error over seeds"""
+    groups = {}
+    for row in rows:
+        groups.setdefault((row['config'], row['num_sequences']), []).append(row)
+    merged = []
+    for (config, count), group in groups.items():
+        entry = {
+            'config': config,
+            'num_sequences': count,
+            'seeds': len(group),
+            'time_per_sequence_us': float(np.median([r['time_per_sequence_us'] for r in group])),
+            'sequences_per_second': float(np.median([r['sequences_per_second'] for r in group])),
+        }
+        if 'max_abs_error' in group[0]:
+            entry['max_abs_error'] = max(r['max_abs_error'] for r in group)
+            entry['mean_abs_error'] = float(np.mean([r['mean_abs_error'] for r in group]))
+            entry['argmax_agreement'] = float(np.mean([r['argmax_agreement'] for r in group]))
+        merged.append(entry)
+    return merged
+
+if __name__ == "__main__":
+    import time
+
+    from benchmark_harness import write_csv, write_json
+
+    print("🧮 TinyGPT-2 Sharded Sweep Runner")
+    print("=" * 78)
+
+    workers = os.cpu_count()
+    start = time.perf_counter()
+    rows = run_sweep(sequence_counts=(1, 4, 16, 64, 256), seeds=range(8), workers=workers)
+    elapsed = time.perf_counter() - start
+    table = merge_results(rows)
+    print(f"{len(rows)} tasks on {workers} worker(s) in {elapsed:.1f}s\n")
+
+    print(f"{'Config':<13} {'Seqs':<6} {'μs/seq':<10} {'seqs/sec':<12} {'max |Δp|':<10} {'argmax agree':<12}")
+    print("-" * 68)
+    for entry in table:
+        error = f"{entry['max_abs_error']:.5f}" if 'max_abs_error' in entry else '-'
+        agree = f"{entry['argmax_agreement'] * 100:.1f}%" if 'argmax_agreement' in entry else '-'
+        print(f"{entry['config']:<13} {entry['num_sequences']:<6} {entry['time_per_sequence_us']:<10.2f} "
+              f"{entry['sequences_per_second']:<12.0f} {error:<10} {agree:<12}")
+
+    write_json(table, 'sweep_results.json')
+    write_csv(rows, 'sweep_tasks.csv')
+    print("\n💾 Saved sweep_results.json / sweep_tasks.csv")
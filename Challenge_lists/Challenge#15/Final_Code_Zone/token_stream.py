@@ -0,0 +1,180 @@
+"""
+Streaming token-file inference for the TinyGPT-2 golden model
+
+Replays a file of recorded 16-token sequences through
+tiny_gpt2_hardware_model_batch with constant memory:
+    - the input is memory-mapped one chunk at a time (no list of sequences,
+      no whole-file read)
+    - each chunk is unpacked into a reused token buffer and run as one batch
+    - probabilities are appended to a .npy file as they are produced
+Peak memory depends on chunk_size only, not on the length of the stream.
+
+Token file format: raw packed 4-bit token IDs, 8 bytes per sequence and no
+header. Byte k of a sequence holds token 2k in its low nibble and token
+2k+1 in its high nibble, i.e. each sequence is a little-endian 64-bit word
+with input_tokens_i at bits [4i+3:4i] (the tiny_gpt2_top port order).
+"""
+
+import os
+import time
+
+import numpy as np
+
+from new_benchmark import load_hardware_weights, tiny_gpt2_hardware_model_batch
+
+SEQ_LEN = 16
+VOCAB_SIZE = 16
+BYTES_PER_SEQUENCE = SEQ_LEN // 2            # two 4-bit tokens per byte
+DEFAULT_CHUNK_SIZE = 4096                    # sequences per batch (~65 MB of float32 stage outputs)
+
+def pack_tokens(tokens):
+    """Pack [N, 16] token IDs (0-15) into [N, 8] bytes"""
+    tokens = np.asarray(tokens)
+    if tokens.ndim != 2 or tokens.shape[1] != SEQ_LEN:
+        raise ValueError(f"expected [N, {SEQ_LEN}] tokens, got shape {tokens.shape}")
+    if tokens.size and (tokens.min() < 0 or tokens.max() >= VOCAB_SIZE):
+        raise ValueError(f"token IDs must be in [0, {VOCAB_SIZE})")
+    tokens = tokens.astype(np.uint8)
+    return tokens[:, 0::2] | (tokens[:, 1::2] << 4)
+
+def unpack_tokens(packed, out=None):
+    """
+    Unpack [N, 8] bytes into [N, 16] token IDs
+
+    Args:
+        packed: uint8 array of packed sequences
+        out: optional uint8 [N, 16] buffer to unpack into (reused across chunks)
+
+    Returns:
+        uint8 [N, 16] token IDs
+    """
+    packed = np.asarray(packed, dtype=np.uint8).reshape(-1, BYTES_PER_SEQUENCE)
+    if out is None:
+        out = np.empty((packed.shape[0], SEQ_LEN), dtype=np.uint8)
+    np.bitwise_and(packed, 0x0F, out=out[:, 0::2])
+    np.right_shift(packed, 4, out=out[:, 1::2])
+    return out
+
+def write_token_file(path, tokens, append=False):
+    """Write (or append) [N, 16] token IDs as a packed token file"""
+    with open(path, 'ab' if append else 'wb') as f:
+        pack_tokens(tokens).tofile(f)
+
+def write_random_token_file(path, num_sequences, seed=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Synthetic traffic: num_sequences random sequences, generated chunk by chunk"""
+    rng = np.random.default_rng(seed)
+    with open(path, 'wb') as f:
+        for start in range(0, num_sequences, chunk_size):
+            n = min(chunk_size, num_sequences - start)
+            pack_tokens(rng.integers(0, VOCAB_SIZE, size=(n, SEQ_LEN), dtype=np.uint8)).tofile(f)
+
+def count_sequences(path):
+    """Number of sequences in a packed token file"""
+    size = os.path.getsize(path)
+    if size % BYTES_PER_SEQUENCE:
+        raise ValueError(f"{path}: {size} bytes is not a whole number of "
+                         f"{BYTES_PER_SEQUENCE}-byte sequences")
+    return size // BYTES_PER_SEQUENCE
+
+def iter_token_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, stop=None):
+    """
+    Yield [n, 16] uint8 token chunks from a packed token file
+
+    Each chunk maps only its own byte range, so at most one chunk of the
+    file is mapped at a time. The yielded array is a reused buffer: copy
+    it if it has to outlive the next iteration.
+
+    Args:
+        path: packed token file
+        chunk_size: sequences per chunk
+        start / stop: sequence range to read (stop=None = end of file)
+    """
+    total = count_sequences(path)
+    stop = total if stop is None else min(stop, total)
+    buffer = np.empty((min(chunk_size, max(stop - start, 0)), SEQ_LEN), dtype=np.uint8)
+    for first in range(start, stop, chunk_size):
+        n = min(chunk_size, stop - first)
+        packed = np.memmap(path, dtype=np.uint8, mode='r', offset=first * BYTES_PER_SEQUENCE,
+                           shape=(n, BYTES_PER_SEQUENCE))
+        yield unpack_tokens(packed, out=buffer[:n])
+        del packed
+
+def _write_npy_header(f, shape, dtype):
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': shape}
+    np.lib.format.write_array_header_1_0(f, header)
+
+def run_token_file(in_path, out_path, weights=None, quantized=False, dtype=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, out_dtype=np.float32, start=0, stop=None):
+    """
+    Stream a packed token file through the golden model
+
+    Args:
+        in_path: packed token file
+        out_path: .npy file receiving the [N, 16] output probabilities
+        weights: golden-model weights (None = the RTL weight file)
+        quantized: whether to use Q5.10 quantization
+        dtype: dtype policy of the model (None = the dtype of the weights)
+        chunk_size: sequences per batched model call
+        out_dtype: dtype of the stored probabilities
+        start / stop: sequence range of the input to process
+
+    Returns:
+        dictionary with the sequence count, chunk count and throughput
+    """
+    if weights is None:
+        weights = load_hardware_weights()
+    total = count_sequences(in_path)
+    stop = total if stop is None else min(stop, total)
+    num_sequences = max(stop - start, 0)
+
+    chunks = 0
+    begin = time.perf_counter()
+    with open(out_path, 'wb') as f:
+        _write_npy_header(f, (num_sequences, VOCAB_SIZE), out_dtype)
+        for tokens in iter_token_chunks(in_path, chunk_size, start, stop):
+            probs, _ = tiny_gpt2_hardware_model_batch(tokens, weights, quantized=quantized,
+                                                      capture=None, dtype=dtype)
+            np.asarray(probs, dtype=out_dtype).tofile(f)
+            chunks += 1
+    elapsed = time.perf_counter() - begin
+
+    return {
+        'num_sequences': num_sequences,
+        'chunks': chunks,
+        'chunk_size': chunk_size,
+        'total_time_s': elapsed,
+        'sequences_per_second': num_sequences / elapsed if elapsed else 0.0,
+        'output': out_path,
+    }
+
+if __name__ == "__main__":
+    import tempfile
+    import tracemalloc
+
+    from new_benchmark import create_hardware_weights
+
+    print("🌊 TinyGPT-2 Streaming Token-File Inference")
+    print("=" * 60)
+
+    weights = create_hardware_weights(quantized=True, dtype='float32')
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'Sequences':<11} {'Chunks':<8} {'seqs/sec':<12} {'Peak alloc (MB)':<16}")
+        print("-" * 50)
+        for num_sequences in (100_000, 1_000_000):
+            in_path = os.path.join(tmp, 'traffic.tok')
+            out_path = os.path.join(tmp, 'probs.npy')
+            write_random_token_file(in_path, num_sequences)
+
+            tracemalloc.start()
+            stats = run_token_file(in_path, out_path, weights=weights, quantized=True)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+
+            print(f"{num_sequences:<11} {stats['chunks']:<8} {stats['sequences_per_second']:<12.0f} {peak_mb:<16.1f}")
+
+        # Spot-check the stream against one direct batched call
+        probs = np.load(out_path, mmap_mode='r')
+        head = next(iter_token_chunks(in_path, chunk_size=256)).copy()
+        direct, _ = tiny_gpt2_hardware_model_batch(head, weights, quantized=True, capture=None)
+        print(f"\n✅ Output {probs.shape} {probs.dtype}, first 256 rows match direct call: "
+              f"{np.array_equal(probs[:256], direct.astype(np.float32))}")
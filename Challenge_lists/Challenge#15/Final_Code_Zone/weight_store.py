@@ -0,0 +1,205 @@
+"""
+Weight store shared by the golden models, the RTL emulator and the RTL
+
+rtl/tiny_gpt2_weights.hex is what tiny_gpt2_top loads with $readmemh
+(1792 16-bit words, one per line). This module makes that file the single
+source of weights for software too:
+    - the hex file is memory-mapped and decoded with whole-array ops
+    - a binary sidecar (.bin, raw little-endian int16) is built next to it
+      on first use (written to a temp file and renamed into place, so a
+      concurrent reader never maps a half-written file); later loads
+      memory-map the sidecar as int16 with no decode and no copy
+    - weights_from_ram() slices the RAM image into the weights dict used by
+      tiny_gpt2_hardware_model (projection blocks as transposed views)
+    - write_weight_hex() goes the other way, e.g. for create_hardware_weights
+      (the path is required, so the tracked RTL file is never overwritten
+      by accident)
+
+RAM layout (matches the assigns in tiny_gpt2_top.v):
+    w_q 0-255, w_k 256-511, w_v 512-767, w_ff1 768-1023,
+    w_ff2 1024-1279, w_out 1280-1535, embedding 1536-1791
+matrix_mult_16x16 computes X @ B.T on a row-major block B, so the golden
+model's W (X @ W) is stored as W.T.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+import q5_10
+
+D_MODEL = 16
+BLOCK_WORDS = D_MODEL * D_MODEL
+WEIGHT_RAM_LAYOUT = {
+    'w_q':       (0 * BLOCK_WORDS, 1 * BLOCK_WORDS),
+    'w_k':       (1 * BLOCK_WORDS, 2 * BLOCK_WORDS),
+    'w_v':       (2 * BLOCK_WORDS, 3 * BLOCK_WORDS),
+    'w_ff1':     (3 * BLOCK_WORDS, 4 * BLOCK_WORDS),
+    'w_ff2':     (4 * BLOCK_WORDS, 5 * BLOCK_WORDS),
+    'w_out':     (5 * BLOCK_WORDS, 6 * BLOCK_WORDS),
+    'embedding': (6 * BLOCK_WORDS, 7 * BLOCK_WORDS),
+}
+WEIGHT_RAM_WORDS = 7 * BLOCK_WORDS                # 1792
+
+DEFAULT_HEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rtl', 'tiny_gpt2_weights.hex')
+SIDECAR_DTYPE = np.dtype('<i2')
+
+# ASCII -> nibble value ('0'-'9', 'a'-'f', 'A'-'F'); 0xFF marks a non-hex byte
+_HEX_NIBBLE = np.full(256, 0xFF, dtype=np.uint8)
+_HEX_NIBBLE[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+_HEX_NIBBLE[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+_HEX_NIBBLE[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+def _decode_fixed_width(raw):
+    """Decode a memory-mapped file of 'XXXX\\n' (or 'XXXX\\r\\n') lines, or None if it is not one"""
+    for line_bytes in (5, 6):
+        if raw.size % line_bytes:
+            continue
+        lines = raw.reshape(-1, line_bytes)
+        if lines[0, 4] not in (ord('\n'), ord('\r')):
+            continue
+        nibbles = _HEX_NIBBLE[lines[:, :4]]
+        if np.any(nibbles == 0xFF):
+            return None
+        words = ((nibbles[:, 0].astype(np.uint16) << 12) | (nibbles[:, 1].astype(np.uint16) << 8)
+                 | (nibbles[:, 2].astype(np.uint16) << 4) | nibbles[:, 3])
+        return q5_10.codes_from_hex(words)
+    return None
+
+def _decode_readmemh(path):
+    """General $readmemh text: comments, blank lines and @address records"""
+    ram = np.zeros(WEIGHT_RAM_WORDS, dtype=np.uint16)
+    address = 0
+    with open(path) as f:
+        for line in f:
+            for token in line.split('//')[0].split():
+                if token.startswith('@'):
+                    address = int(token[1:], 16)
+                else:
+                    ram[address] = int(token, 16)
+                    address += 1
+    return q5_10.codes_from_hex(ram)
+
+def read_weight_hex(path=DEFAULT_HEX_PATH):
+    """Decode a $readmemh weight file into an int16 RAM image"""
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    ram = _decode_fixed_width(raw)
+    if ram is None or ram.size != WEIGHT_RAM_WORDS:
+        ram = _decode_readmemh(path)
+    return ram
+
+def sidecar_path(hex_path):
+    return os.path.splitext(hex_path)[0] + '.bin'
+
+def _write_atomic(path, data):
+    """Write bytes to a temp file in path's directory, then rename it over path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def build_sidecar(hex_path=DEFAULT_HEX_PATH):
+    """Write the raw int16 sidecar for a hex file (atomically) and return its path"""
+    path = sidecar_path(hex_path)
+    _write_atomic(path, read_weight_hex(hex_path).astype(SIDECAR_DTYPE).tobytes())
+    return path
+
+def load_weight_ram(hex_path=DEFAULT_HEX_PATH, use_sidecar=True):
+    """
+    Load the 1792-word weight RAM image as int16 Q5.10 codes
+
+    Args:
+        hex_path: $readmemh file loaded by the RTL
+        use_sidecar: memory-map (and build if missing or older than the
+                     hex file) the binary sidecar instead of decoding text
+
+    Returns:
+        read-only int16 [1792] array (a memmap when the sidecar is used)
+    """
+    if not use_sidecar:
+        ram = read_weight_hex(hex_path)
+        ram.flags.writeable = False
+        return ram
+
+    path = sidecar_path(hex_path)
+    if (not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(hex_path)
+            or os.path.getsize(path) != WEIGHT_RAM_WORDS * SIDECAR_DTYPE.itemsize):
+        build_sidecar(hex_path)
+    return np.memmap(path, dtype=SIDECAR_DTYPE, mode='r', shape=(WEIGHT_RAM_WORDS,))
+
+def weights_from_ram(ram, codes=False):
+    """
+    Slice a RAM image into the golden-model weights dict
+
+    Args:
+        ram: int16 [1792] RAM image
+        codes: return int16 code views (zero copy) instead of float values
+
+    Returns:
+        dictionary with 'embedding' [256] and [16, 16] projection matrices
+        oriented for X @ W
+    """
+    weights = {}
+    for name, (start, end) in WEIGHT_RAM_LAYOUT.items():
+        block = ram[start:end]
+        if name != 'embedding':
+            block = block.reshape(D_MODEL, D_MODEL).T
+        weights[name] = block if codes else q5_10.from_codes(block)
+    return weights
+
+def ram_from_weights(weights):
+    """Build the int16 RAM image from a golden-model weights dict (float or int16 codes)"""
+    ram = np.zeros(WEIGHT_RAM_WORDS, dtype=np.int16)
+    for name, (start, end) in WEIGHT_RAM_LAYOUT.items():
+        block = np.asarray(weights[name]).reshape(D_MODEL, D_MODEL)
+        if name != 'embedding':
+            block = block.T
+        if not np.issubdtype(block.dtype, np.integer):
+            block = q5_10.to_codes(block)
+        ram[start:end] = block.ravel()
+    return ram
+
+def write_weight_hex(weights_or_ram, path):
+    """
+    Write weights (dict) or a RAM image as a $readmemh file, one word per line
+
+    path has no default: DEFAULT_HEX_PATH is the tracked file the RTL loads,
+    so replacing it has to be asked for explicitly.
+    """
+    if isinstance(weights_or_ram, dict):
+        ram = ram_from_weights(weights_or_ram)
+    else:
+        ram = np.asarray(weights_or_ram, dtype=np.int16)
+    text = ''.join(f'{word:04x}\n' for word in q5_10.codes_to_hex(ram).tolist())
+    _write_atomic(path, text.encode('ascii'))
+
+def load_weights(hex_path=DEFAULT_HEX_PATH, codes=False, use_sidecar=True):
+    """Weights dict straight from the RTL weight file"""
+    return weights_from_ram(load_weight_ram(hex_path, use_sidecar=use_sidecar), codes=codes)
+
+if __name__ == "__main__":
+    import time
+
+    print("📦 TinyGPT-2 Weight Store")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    ram_text = read_weight_hex(DEFAULT_HEX_PATH)
+    text_ms = (time.perf_counter() - start) * 1e3
+
+    build_sidecar(DEFAULT_HEX_PATH)
+    start = time.perf_counter()
+    ram = load_weight_ram(DEFAULT_HEX_PATH)
+    sidecar_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"Hex file:  {DEFAULT_HEX_PATH}")
+    print(f"Words:     {ram.size} (decode {text_ms:.3f} ms, sidecar map {sidecar_ms:.3f} ms)")
+    print(f"Identical: {np.array_equal(ram, ram_text)}")
+    for name, value in load_weights().items():
+        print(f"   {name:<10} {str(value.shape):<9} min {value.min():+.4f} max {value.max():+.4f}")
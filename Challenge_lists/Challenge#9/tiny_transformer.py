@@ -7,8 +7,8 @@ def float_to_q5_10(x):
     return np.round(x * 1024) / 1024
 
 def quantize_q5_10(arr):
-    """Quantize array to Q5.10 format"""
-    return np.vectorize(float_to_q5_10)(arr)
+    """Quantize array to Q5.10 format (float_to_q5_10 is already element-wise)"""
+    return float_to_q5_10(np.asarray(arr, dtype=np.float64))
 
 def tiny_transformer_inference(input_tokens, weights, quantized=False):
     """
@@ -178,18 +178,28 @@ if __name__ == "__main__":
     _ = tiny_transformer_inference(test_tokens, weights, quantized=quantized)
     
     # start benchmarking
-    start_time = time.time()
+    gen_times_ns = np.empty(num_samples, dtype=np.int64)
+    start_time = time.perf_counter_ns()
     
     for k in range(num_samples):
-        gen_start = time.time()
+        gen_start = time.perf_counter_ns()
         
         # Randomly generate input tokens
         input_tokens = generate_random_tokens()
         probs = tiny_transformer_inference(input_tokens, weights, quantized=quantized)
         
-        gen_end = time.time()
-        gen_time = gen_end - gen_start
+        gen_end = time.perf_counter_ns()
+        gen_times_ns[k] = gen_end - gen_start
         
-    end_time = time.time()
-    total_time = end_time - start_time
+    end_time = time.perf_counter_ns()
+    total_time = (end_time - start_time) / 1e9
     avg_time_per_sample = total_time / num_samples
+    
+    # per-sample latency distribution (us)
+    gen_times_us = gen_times_ns / 1e3
+    p50, p95, p99 = np.percentile(gen_times_us, [50, 95, 99])
+    print(f"Samples: {num_samples} (quantized={quantized})")
+    print(f"Latency per sample: p50 {p50:.1f} us, p95 {p95:.1f} us, p99 {p99:.1f} us, "
+          f"mean {gen_times_us.mean():.1f} us")
+    print(f"Throughput: {num_samples / total_time:.0f} samples/sec "
+          f"({avg_time_per_sample * 1e3:.3f} ms/sample)")